@@ -5,12 +5,47 @@ Application Launcher - Handles launching external applications and web content
 import subprocess
 import webbrowser
 import os
+import sys
 import threading
 import time
-import psutil
 import tkinter as tk
 from tkinter import messagebox
 
+import perf_stats
+from event_log import get_logger
+from profiler import span
+
+log = get_logger('launcher')
+
+# How long to watch a launched app for its first window
+WINDOW_WAIT_SECONDS = 15
+WINDOW_POLL_SECONDS = 0.05
+
+
+def has_visible_window(pid):
+    """Whether a process shows a top-level window; None where this can't be told"""
+    if sys.platform != 'win32':
+        return None
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    found = []
+
+    @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    def check(hwnd, lparam):
+        if user32.IsWindowVisible(hwnd):
+            owner = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(owner))
+            if owner.value == pid:
+                found.append(hwnd)
+                return False
+        return True
+
+    user32.EnumWindows(check, 0)
+    return bool(found)
+
+
 class AppLauncher:
     def __init__(self, app):
         self.app = app
@@ -20,12 +55,13 @@ class AppLauncher:
     def launch_application(self, content):
         """Launch an application based on content configuration"""
         try:
-            if content['launch_mode'] == 'desktop':
-                self.launch_desktop_app(content)
-            elif content['launch_mode'] == 'web':
-                self.launch_web_content(content)
+            with span('launch'):
+                if content['launch_mode'] == 'desktop':
+                    self.launch_desktop_app(content)
+                elif content['launch_mode'] == 'web':
+                    self.launch_web_content(content)
         except Exception as e:
-            print(f"Error launching application: {e}")
+            log.error("Error launching application: %s", e)
     
     def launch_desktop_app(self, content):
         """Launch a desktop application"""
@@ -34,10 +70,11 @@ class AppLauncher:
         
         try:
             if not os.path.exists(app_path):
-                print(f"Application not found: {app_path}")
+                log.error("Application not found: %s", app_path)
                 return
             
             # Launch application
+            launched_at = time.perf_counter()
             process = subprocess.Popen([app_path], 
                                      stdout=subprocess.PIPE, 
                                      stderr=subprocess.PIPE)
@@ -49,18 +86,18 @@ class AppLauncher:
                 'start_time': time.time()
             })
             
-            print(f"Launched application: {app_name}")
+            log.info("Launched application: %s", app_name)
             
             # Monitor application in separate thread
             monitor_thread = threading.Thread(
                 target=self._monitor_desktop_app, 
-                args=(process, content), 
+                args=(process, content, launched_at), 
                 daemon=True
             )
             monitor_thread.start()
             
         except Exception as e:
-            print(f"Error launching desktop app {app_name}: {e}")
+            log.error("Error launching desktop app %s: %s", app_name, e)
     
     def launch_web_content(self, content):
         """Launch web content in browser"""
@@ -76,7 +113,7 @@ class AppLauncher:
                 'start_time': time.time()
             })
             
-            print(f"Opened web content: {url}")
+            log.info("Opened web content: %s", url)
             
             # Schedule closing after duration
             duration = content.get('duration', 30)
@@ -84,12 +121,14 @@ class AppLauncher:
             close_timer.start()
             
         except Exception as e:
-            print(f"Error launching web content: {e}")
+            log.error("Error launching web content: %s", e)
     
-    def _monitor_desktop_app(self, process, content):
+    def _monitor_desktop_app(self, process, content, launched_at=None):
         """Monitor desktop application and close after duration"""
         duration = content.get('duration', 30)
         start_time = time.time()
+        if launched_at is not None:
+            self._time_first_window(process, launched_at)
         
         while time.time() - start_time < duration:
             if process.poll() is not None:
@@ -110,18 +149,30 @@ class AppLauncher:
                     # Force kill if still running
                     process.kill()
                     
-                print(f"Closed application: {content.get('name', 'Unknown')}")
+                log.info("Closed application: %s", content.get('name', 'Unknown'))
         except Exception as e:
-            print(f"Error closing application: {e}")
+            log.error("Error closing application: %s", e)
         
         # Remove from running processes
         self.running_processes = [p for p in self.running_processes if p['process'] != process]
     
+    def _time_first_window(self, process, launched_at):
+        """Record the time from launch to the app's first visible window"""
+        deadline = launched_at + WINDOW_WAIT_SECONDS
+        while time.perf_counter() < deadline and process.poll() is None:
+            visible = has_visible_window(process.pid)
+            if visible is None:
+                return
+            if visible:
+                perf_stats.record('launch_to_window', time.perf_counter() - launched_at)
+                return
+            time.sleep(WINDOW_POLL_SECONDS)
+    
     def _close_web_content(self, url):
         """Close web content (attempt to close browser tabs)"""
         # Note: Closing specific browser tabs programmatically is limited
         # This is a best-effort approach
-        print(f"Web content duration expired: {url}")
+        log.info("Web content duration expired: %s", url)
         
         # Remove from browser windows list
         self.browser_windows = [w for w in self.browser_windows if w['url'] != url]
@@ -138,9 +189,9 @@ class AppLauncher:
                         process.wait(timeout=5)
                     except subprocess.TimeoutExpired:
                         process.kill()
-                print(f"Closed application: {app_info['name']}")
+                log.info("Closed application: %s", app_info['name'])
             except Exception as e:
-                print(f"Error closing application {app_info['name']}: {e}")
+                log.error("Error closing application %s: %s", app_info['name'], e)
         
         self.running_processes.clear()
         
@@ -167,11 +218,11 @@ class AppLauncher:
                     process = app_info['process']
                     if process.poll() is None:
                         process.kill()
-                    print(f"Force closed application: {app_name}")
+                    log.info("Force closed application: %s", app_name)
                     self.running_processes.remove(app_info)
                     return True
                 except Exception as e:
-                    print(f"Error force closing {app_name}: {e}")
+                    log.error("Error force closing %s: %s", app_name, e)
         return False
 
 
@@ -212,7 +263,7 @@ class KioskBrowser:
                 return True
                 
         except Exception as e:
-            print(f"Error launching kiosk browser: {e}")
+            log.error("Error launching kiosk browser: %s", e)
             return False
     
     def close_browser(self):
@@ -224,7 +275,7 @@ class KioskBrowser:
             except subprocess.TimeoutExpired:
                 self.browser_process.kill()
             except Exception as e:
-                print(f"Error closing browser: {e}")
+                log.error("Error closing browser: %s", e)
             finally:
                 self.browser_process = None
 
@@ -235,6 +286,10 @@ class ApplicationMonitor:
         self.app_launcher = app_launcher
         self.monitoring = False
         self.monitor_thread = None
+        
+        # Latest resource sample, read by the heartbeat reporter
+        self.cpu_percent = None
+        self.memory_percent = None
     
     def start_monitoring(self):
         """Start monitoring launched applications"""
@@ -248,6 +303,8 @@ class ApplicationMonitor:
     
     def _monitor_loop(self):
         """Monitor loop to track application status"""
+        # Imported here: the monitor only runs when a status server is set
+        import psutil
         while self.monitoring:
             try:
                 # Update running applications list
@@ -256,13 +313,15 @@ class ApplicationMonitor:
                 # Monitor system resources
                 cpu_percent = psutil.cpu_percent(interval=1)
                 memory_percent = psutil.virtual_memory().percent
+                self.cpu_percent = cpu_percent
+                self.memory_percent = memory_percent
                 
                 # Log high resource usage
                 if cpu_percent > 80 or memory_percent > 90:
-                    print(f"High resource usage - CPU: {cpu_percent}%, Memory: {memory_percent}%")
+                    log.warning("High resource usage - CPU: %s%%, Memory: %s%%", cpu_percent, memory_percent)
                 
                 time.sleep(5)  # Check every 5 seconds
                 
             except Exception as e:
-                print(f"Error in application monitoring: {e}")
+                log.error("Error in application monitoring: %s", e)
                 time.sleep(10)
@@ -0,0 +1,97 @@
+"""
+Async Demo Engine - DemoModeCore as an asyncio task
+
+AsyncDemoEngine rotates through its content like DemoModeCore, but as a
+task on a running event loop instead of a thread, so it can live inside an
+asyncio application such as the FastAPI server. An idle engine is just a
+task waiting in asyncio.sleep, so thousands of headless "virtual kiosks"
+fit in one process:
+
+    engines = [AsyncDemoEngine(settings={}) for _ in range(1000)]
+    for engine in engines:
+        engine.add_content('photo', 'showcase.jpg', duration=8)
+        engine.start_demo()
+    ...
+    await asyncio.gather(*(engine.stop() for engine in engines))
+
+add_content, remove_content and get_status are DemoModeCore's. start_demo
+and stop_demo must be called from the event loop; stop_demo cancels the
+task without waiting, the stop() coroutine also waits for it to finish.
+"""
+
+import asyncio
+import inspect
+
+from demo_core import IDLE_RETRY_SECONDS, DemoModeCore
+from event_log import get_logger
+
+log = get_logger('engine')
+
+
+class AsyncDemoEngine(DemoModeCore):
+    """Demo rotation running as an asyncio task"""
+    def __init__(self, settings=None, on_item=None):
+        super().__init__(settings)
+        # on_item(engine, item) is called for every item played; it may be
+        # a coroutine function
+        self.on_item = on_item
+        self.items_played = 0
+        # on_item failures; the rotation carries on with the next item
+        self.item_errors = 0
+        self.demo_task = None
+
+    def start_demo(self):
+        """Start the rotation task; does nothing if it is already running"""
+        if not self.demo_content:
+            return False
+        if self.demo_task and not self.demo_task.done():
+            return True
+
+        self.is_demo_active = True
+        self.current_content_index = 0
+        self.demo_task = asyncio.get_running_loop().create_task(self._demo_loop())
+        return True
+
+    def stop_demo(self):
+        """Stop the rotation; the task ends at its next await"""
+        self.is_demo_active = False
+        task, self.demo_task = self.demo_task, None
+        if task and not task.done():
+            task.cancel()
+        return task
+
+    async def stop(self):
+        """Stop the rotation and wait until the task has finished"""
+        task = self.stop_demo()
+        if task:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _demo_loop(self):
+        while self.demo_content:
+            index, content = self.next_content(self.current_content_index)
+            if content is None:
+                # Nothing scheduled or everything capped right now
+                await asyncio.sleep(IDLE_RETRY_SECONDS)
+                continue
+            self.current_item = content
+            self.items_played += 1
+            if self.on_item:
+                try:
+                    result = self.on_item(self, content)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    self.item_errors += 1
+                    log.warning("on_item failed for %s: %s", content.get('name'), e)
+
+            self.current_content_index = index + 1
+            await asyncio.sleep(content['duration'])
+
+    def get_status(self):
+        status = super().get_status()
+        status['items_played'] = self.items_played
+        status['item_errors'] = self.item_errors
+        return status
@@ -0,0 +1,107 @@
+"""
+Content list benchmark
+
+Adds items to the playlist one at a time, the way repeated "Add Photos" /
+"Add Application" clicks do, and measures the total UI time (model update
+plus one event loop turn per add) for:
+
+    rebuild   the old Listbox view, cleared and refilled after every edit
+    diff      ContentModel + ContentList, applying insert diffs
+
+Needs a display (Tk).
+
+    python -m benchmarks.bench_content_list
+    python -m benchmarks.bench_content_list --items 5000
+"""
+
+import argparse
+import time
+
+from benchmarks.harness import save_json
+from content_list import ContentList, describe
+from content_model import ContentModel
+
+
+class _NoThumbnails:
+    """Thumbnail source that never has one, so only list work is measured"""
+    def request(self, item, callback):
+        return None
+
+
+def _items(count):
+    return [{'type': 'photo', 'path': f'/media/photo_{i:05d}.jpg', 'duration': 5} for i in range(count)]
+
+
+def bench_rebuild(root, items):
+    import tkinter as tk
+    listbox = tk.Listbox(root)
+    listbox.pack(fill=tk.BOTH, expand=True)
+    content = []
+    start = time.perf_counter()
+    for item in items:
+        content.append(item)
+        listbox.delete(0, tk.END)
+        for entry in content:
+            listbox.insert(tk.END, describe(entry))
+        root.update()
+    elapsed = time.perf_counter() - start
+    listbox.destroy()
+    return elapsed
+
+
+def bench_diff(root, items):
+    import tkinter as tk
+    frame = tk.Frame(root)
+    frame.pack(fill=tk.BOTH, expand=True)
+    frame.columnconfigure(0, weight=1)
+    frame.rowconfigure(0, weight=1)
+    model = ContentModel()
+    content_list = ContentList(frame, _NoThumbnails())
+    content_list.set_items(model)
+    model.subscribe(content_list.apply)
+    root.update()
+    start = time.perf_counter()
+    for item in items:
+        model.append(item)
+        root.update()
+    elapsed = time.perf_counter() - start
+    frame.destroy()
+    return elapsed
+
+
+STRATEGIES = {'rebuild': bench_rebuild, 'diff': bench_diff}
+
+
+def run(count, strategies=None):
+    """Total seconds per strategy for adding count items one at a time"""
+    import tkinter as tk
+    root = tk.Tk()
+    root.geometry("800x600")
+    try:
+        items = _items(count)
+        return {name: STRATEGIES[name](root, items) for name in strategies or STRATEGIES}
+    finally:
+        root.destroy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark content list updates")
+    parser.add_argument('--items', type=int, default=2000, help='Items to add one at a time')
+    parser.add_argument('--strategy', action='append', choices=sorted(STRATEGIES),
+                        help='Run only these strategies (repeatable)')
+    parser.add_argument('--output', help='Write results JSON to this file')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, elapsed in run(args.items, args.strategy).items():
+        results[name] = {'items': args.items, 'total_ms': elapsed * 1000,
+                         'per_add_ms': elapsed * 1000 / args.items}
+        print(f"{name:8s} {elapsed * 1000:10.1f} ms total  {elapsed * 1000 / args.items:8.3f} ms/add")
+
+    if args.output:
+        save_json(args.output, results)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
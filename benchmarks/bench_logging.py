@@ -0,0 +1,73 @@
+"""
+Logging overhead benchmark
+
+Times one log call from the playback path, the way media_player.py makes
+it, for:
+
+    disabled    log.debug() while the level is INFO (the per-frame case)
+    queued      log.info() handed to the queue handler of event_log.py
+    print       the old print() to stdout, here redirected to os.devnull
+
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --calls 200000 --output logging.json
+"""
+
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+import event_log
+from benchmarks.harness import save_json
+
+
+def _per_call(func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls
+
+
+def run(calls=100000):
+    """Seconds per call for each case, and the queued records dropped"""
+    log = event_log.get_logger('bench')
+    workdir = tempfile.mkdtemp()
+    log_file = os.path.join(workdir, 'events.jsonl')
+    results = {}
+    event_log.setup_logging('INFO', log_file, console=False)
+    try:
+        results['disabled'] = _per_call(lambda i: log.debug("Dropped late frame %d of %s", i, 'clip.mp4'), calls)
+        results['queued'] = _per_call(lambda i: log.info("Dropped late frame %d of %s", i, 'clip.mp4'), calls)
+        dropped = event_log.dropped_records()
+    finally:
+        event_log.shutdown_logging()
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        results['print'] = _per_call(lambda i: print(f"Dropped late frame {i} of clip.mp4"), calls)
+    return results, dropped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark logging overhead per call")
+    parser.add_argument('--calls', type=int, default=100000, help='Calls per case')
+    parser.add_argument('--output', help='Write results JSON to this file')
+    args = parser.parse_args(argv)
+
+    timings, dropped = run(args.calls)
+    results = {}
+    for name, seconds in timings.items():
+        results[name] = {'calls': args.calls, 'per_call_ns': seconds * 1e9}
+        print(f"{name:8s} {seconds * 1e9:10.0f} ns/call")
+    print(f"{dropped} of {args.calls} queued records dropped (queue full)")
+
+    if args.output:
+        save_json(args.output, results)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,291 @@
+"""
+Playback pipeline benchmark
+
+Drives MediaPlayer's decode/scale/convert stages on synthetic fixtures and
+reports per-stage latency percentiles, throughput and peak RSS. Every
+scenario runs in its own subprocess so peak RSS isn't polluted by earlier
+scenarios.
+
+    python -m benchmarks.bench_playback
+    python -m benchmarks.bench_playback --baseline benchmarks/baseline.json
+    python -m benchmarks.bench_playback --update-baseline
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from benchmarks import fixtures
+from benchmarks.harness import StageTimer, compare, load_json, save_json
+from benchmarks.sinks import SINKS
+from media_player import convert_frame, decode_photo, scale_frame, scale_photo
+from transitions import Transition
+from video_decoders import FrameCacheWriter, PreparedVideo, create_decoder, find_ffmpeg
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def bench_photo(path, screen_size, iterations, sink, draft=True):
+    timer = StageTimer()
+    for _ in range(iterations):
+        image = timer.time('decode', decode_photo, path, screen_size if draft else None)
+        image = timer.time('scale', scale_photo, image, screen_size)
+        timer.time('present', sink.show, image)
+        timer.item_done()
+    return timer.result()
+
+
+def bench_video(path, screen_size, iterations, sink):
+    timer = StageTimer()
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open {path}")
+    try:
+        for _ in range(iterations):
+            ret, frame = timer.time('decode', cap.read)
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = cap.read()
+            frame = timer.time('scale', scale_frame, frame, screen_size)
+            frame = timer.time('convert', convert_frame, frame)
+            image = timer.time('to_image', Image.fromarray, frame)
+            timer.time('present', sink.show, image)
+            timer.item_done()
+    finally:
+        cap.release()
+    return timer.result()
+
+
+def bench_decoder(backend, path, screen_size, iterations, sink):
+    """Decode+scale+convert through a video_decoders backend as one stage.
+
+    Also reports CPU time per frame including decoder subprocesses, which
+    wall-clock latency alone hides for the ffmpeg pipe.
+    """
+    timer = StageTimer()
+    cpu_start = _cpu_seconds()
+    decoder = create_decoder(backend, path, screen_size)
+    try:
+        for _ in range(iterations):
+            frame = timer.time('decode_scale_convert', decoder.read)
+            if frame is None:
+                decoder.rewind()
+                frame = decoder.read()
+            timer.time('present', sink.show, frame)
+            timer.item_done()
+    finally:
+        decoder.close()
+    result = timer.result()
+    result['cpu_ms_per_frame'] = (_cpu_seconds() - cpu_start) * 1000 / iterations
+    return result
+
+
+def bench_loop_gap(backend, path, screen_size, iterations, sink):
+    """Time from the end of a clip to the first frame of its next loop.
+
+    'seek' rewinds the same decoder, as the player used to; 'preopened'
+    switches to a decoder opened ahead of time, as it does now.
+    """
+    timer = StageTimer()
+    loops = max(3, iterations // 10)
+    decoder = create_decoder(backend, path, screen_size)
+    for _ in range(loops):
+        while decoder.read() is not None:
+            pass
+        start = time.perf_counter()
+        decoder.rewind()
+        sink.show(decoder.read())
+        timer.samples.setdefault('gap_seek', []).append(time.perf_counter() - start)
+    decoder.close()
+
+    current = PreparedVideo(backend, path, screen_size)
+    for _ in range(loops):
+        upcoming = PreparedVideo(backend, path, screen_size)
+        while current.read() is not None:
+            pass
+        start = time.perf_counter()
+        current.close()
+        current = upcoming
+        sink.show(current.read())
+        timer.samples.setdefault('gap_preopened', []).append(time.perf_counter() - start)
+        timer.item_done()
+    current.close()
+    return timer.result()
+
+
+def bench_transitions(screen_size, iterations, sink):
+    """Per-frame cost of each transition blend at screen size"""
+    timer = StageTimer()
+    width, height = screen_size
+    outgoing = np.asarray(Image.open(fixtures.image_fixture(1920, 1080)).convert('RGB'))
+    incoming = np.full((height, width, 3), 128, dtype=np.uint8)
+    for kind in ('crossfade', 'slide'):
+        transition = Transition(kind)
+        transition.prepare(outgoing, incoming)
+        for i in range(iterations):
+            frame = timer.time(kind, transition.render, (i % 60) / 60)
+            sink.show(frame)
+            timer.item_done()
+    return timer.result()
+
+
+def bench_frame_cache(path, screen_size, iterations, sink):
+    """Per-frame cost of decoding a short clip vs reading its frame cache"""
+    timer = StageTimer()
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache_file = os.path.join(cache_dir, 'clip.npy')
+        decoder = create_decoder('opencv', path, screen_size)
+        writer = FrameCacheWriter(cache_file, decoder.frame_count, decoder.fps, 2 ** 40)
+        for _ in range(iterations):
+            frame = timer.time('decode', decoder.read)
+            if frame is None:
+                if writer:
+                    writer.finish()
+                    writer = None
+                decoder.rewind()
+                frame = decoder.read()
+            if writer:
+                writer.add(frame)
+            sink.show(frame)
+        decoder.close()
+
+        cached = create_decoder('opencv', path, screen_size, frame_cache=cache_file)
+        for _ in range(iterations):
+            frame = timer.time('cached', cached.read)
+            if frame is None:
+                cached.rewind()
+                frame = cached.read()
+            sink.show(frame)
+            timer.item_done()
+        cached.close()
+    finally:
+        shutil.rmtree(cache_dir)
+    return timer.result()
+
+
+def _cpu_seconds():
+    """User+system CPU of this process and its waited-for children"""
+    import resource
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+# name -> (kind, fixture factory, iterations multiplier)
+SCENARIOS = {
+    'photo_jpeg_1080p': ('photo', lambda: fixtures.image_fixture(1920, 1080), 1),
+    'photo_jpeg_24mp': ('photo', lambda: fixtures.image_fixture(6000, 4000), 0.2),
+    # Full-resolution decode, for comparison with draft-mode decoding
+    'photo_jpeg_24mp_full': ('photo_full', lambda: fixtures.image_fixture(6000, 4000), 0.2),
+    'photo_jpeg_12mp': ('photo', lambda: fixtures.image_fixture(4000, 3000), 0.5),
+    'photo_png_1080p': ('photo', lambda: fixtures.image_fixture(1920, 1080, 'PNG'), 1),
+    'video_720p': ('video', lambda: fixtures.video_fixture(1280, 720), 5),
+    'video_1080p': ('video', lambda: fixtures.video_fixture(1920, 1080), 5),
+    'decoder_opencv_1080p': ('opencv', lambda: fixtures.video_fixture(1920, 1080), 5),
+    'decoder_ffmpeg_1080p': ('ffmpeg', lambda: fixtures.video_fixture(1920, 1080), 5),
+    'loop_gap_opencv_1080p': ('loop_gap', lambda: fixtures.video_fixture(1920, 1080, frames=30), 1),
+    'transitions': ('transitions', lambda: None, 5),
+    'frame_cache_1080p': ('frame_cache', lambda: fixtures.video_fixture(1920, 1080, frames=30), 5),
+}
+
+
+def run_scenario(name, screen_size, iterations, sink_name):
+    kind, fixture, multiplier = SCENARIOS[name]
+    path = fixture()
+    sink = SINKS[sink_name]()
+    count = max(3, int(iterations * multiplier))
+    if kind == 'photo':
+        return bench_photo(path, screen_size, count, sink)
+    if kind == 'photo_full':
+        return bench_photo(path, screen_size, count, sink, draft=False)
+    if kind == 'video':
+        return bench_video(path, screen_size, count, sink)
+    if kind == 'frame_cache':
+        return bench_frame_cache(path, screen_size, count, sink)
+    if kind == 'transitions':
+        return bench_transitions(screen_size, count, sink)
+    if kind == 'loop_gap':
+        return bench_loop_gap('opencv', path, screen_size, count, sink)
+    return bench_decoder(kind, path, screen_size, count, sink)
+
+
+def run_isolated(name, args):
+    """Run one scenario in a fresh interpreter and return its result"""
+    cmd = [sys.executable, '-m', 'benchmarks.bench_playback', '--child', name,
+           '--iterations', str(args.iterations), '--screen', args.screen, '--sink', args.sink]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(cmd, cwd=root, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_report(results):
+    for name, result in results.items():
+        print(f"\n{name}: {result['throughput_per_s']:.1f} items/s, "
+              f"peak RSS {result['peak_rss_mb']:.0f} MiB")
+        if 'cpu_ms_per_frame' in result:
+            print(f"  CPU {result['cpu_ms_per_frame']:.2f} ms/frame")
+        for stage, stats in result['stages'].items():
+            print(f"  {stage:<20} p50 {stats['p50_ms']:8.2f} ms   p95 {stats['p95_ms']:8.2f} ms"
+                  f"   p99 {stats['p99_ms']:8.2f} ms")
+
+
+def parse_screen(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the playback pipeline headless")
+    parser.add_argument('--iterations', type=int, default=30, help='Photo iterations per scenario')
+    parser.add_argument('--screen', default='1920x1080', help='Target screen size, e.g. 3840x2160')
+    parser.add_argument('--sink', choices=sorted(SINKS), default='null', help='Present stage')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Run only these scenarios (repeatable)')
+    parser.add_argument('--output', help='Write results JSON to this file')
+    parser.add_argument('--baseline', help='Compare against this baseline JSON')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help=f'Write results to {os.path.relpath(BASELINE_FILE)}')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown vs baseline (0.25 = 25%%)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = run_scenario(args.child, parse_screen(args.screen), args.iterations, args.sink)
+        print(json.dumps(result))
+        return 0
+
+    scenarios = args.scenario or [name for name in SCENARIOS
+                                  if SCENARIOS[name][0] != 'ffmpeg' or find_ffmpeg()]
+    results = {name: run_isolated(name, args) for name in scenarios}
+    print_report(results)
+
+    if args.output:
+        save_json(args.output, results)
+    if args.update_baseline:
+        save_json(BASELINE_FILE, results)
+        print(f"\nBaseline updated: {BASELINE_FILE}")
+
+    if args.baseline:
+        regressions = compare(results, load_json(args.baseline), args.tolerance)
+        if regressions:
+            print("\n❌ Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Startup benchmark
+
+Measures, in fresh interpreters, what a kiosk pays before its first item
+is on screen:
+
+    imports       `python -X importtime -c "import demo_app"`: total import
+                  time and the slowest modules it pulls in
+    first frame   interpreter start -> demo_app imported -> the first photo
+                  decoded, scaled and shown by a MediaPlayer (null backend)
+
+The first frame is timed for:
+
+    lazy    the app as it is: the media stack is imported by the first
+            item, pygame only by the first video with sound
+    eager   also importing pygame, psutil and the media stack and starting
+            the mixer up front, the way DemoModeApp.__init__ used to
+
+The auto_start_demo delay and Tk window creation are not included; the
+first needs nothing but waiting, the second needs a display.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.harness import save_json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Interpreter start to first photo on screen, on a typical kiosk PC
+FIRST_FRAME_TARGET_SECONDS = 1.0
+
+# Modules startup should not import until they are needed
+DEFERRED_MODULES = ('pygame', 'cv2', 'numpy', 'psutil')
+
+EAGER_MODULES = ('media_player', 'app_launcher', 'pygame', 'psutil')
+
+_IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+_CHILD = """
+import sys, time
+start = time.perf_counter()
+import demo_app
+imported = time.perf_counter()
+from benchmarks.bench_startup import show_first_photo
+show_first_photo(sys.argv[1], sys.argv[2], start, imported)
+"""
+
+
+class _Settings:
+    def __init__(self, **values):
+        self.values = values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+class _HeadlessApp:
+    def __init__(self):
+        self.settings_manager = _Settings(render_backend='null', frame_cache_max_mb=0)
+
+
+def show_first_photo(path, strategy, start, imported):
+    """Child process side: play one photo and print the timings as JSON"""
+    if strategy == 'eager':
+        import importlib
+        for module in EAGER_MODULES:
+            importlib.import_module(module)
+        import pygame
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            pass
+    from media_player import MediaPlayer
+    player = MediaPlayer(_HeadlessApp())
+    player.play_content({'type': 'photo', 'path': path})
+    shown = time.perf_counter()
+    assert player.renderer.frames_presented == 1
+    print(json.dumps({'import_s': imported - start, 'first_frame_s': shown - start}))
+    player.cleanup()
+
+
+def import_times(module='demo_app'):
+    """Per-module import times from -X importtime, slowest cumulative first.
+
+    Each entry is (name, self_ms, cumulative_ms, depth); depth 0 is the
+    module itself.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        # e.g. winreg, which demo_app needs, outside Windows
+        raise RuntimeError(f"import {module} failed: {result.stderr.strip().splitlines()[-1]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            entries.append((name, int(own) / 1000, int(cumulative) / 1000, (len(indent) - 1) // 2))
+    return sorted(entries, key=lambda entry: entry[2], reverse=True)
+
+
+def deferred_imports(modules):
+    """DEFERRED_MODULES that importing modules loads, in a fresh interpreter"""
+    code = (f"import sys\nimport {', '.join(modules)}\n"
+            f"print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                            check=True)
+    return result.stdout.split()
+
+
+def time_first_frame(path, strategy='lazy'):
+    """Timings of one fresh interpreter showing the photo at path"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', _CHILD, path, strategy],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['wall_s'] = time.perf_counter() - start
+    return timings
+
+
+def run(runs=3, strategies=('lazy', 'eager')):
+    """Import report and best-of-runs first frame timings per strategy"""
+    from PIL import Image
+
+    entries = import_times()
+    total_ms = next(cumulative for name, _, cumulative, depth in entries if depth == 0)
+    report = {
+        'import_ms': total_ms,
+        'slowest_imports': [{'module': name, 'cumulative_ms': cumulative}
+                            for name, _, cumulative, depth in entries if depth == 1][:10],
+        'deferred_imported': sorted({name.split('.')[0] for name, *_ in entries} & set(DEFERRED_MODULES)),
+        'first_frame': {},
+    }
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'first.jpg')
+        Image.new('RGB', (1920, 1080), (40, 80, 120)).save(path)
+        for strategy in strategies:
+            samples = [time_first_frame(path, strategy) for _ in range(runs)]
+            report['first_frame'][strategy] = min(samples, key=lambda s: s['first_frame_s'])
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark import time and time to first frame")
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters per strategy')
+    parser.add_argument('--output', help='Write results JSON to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args.runs)
+    print(f"import demo_app: {report['import_ms']:.0f} ms")
+    for entry in report['slowest_imports']:
+        print(f"  {entry['module']:24s} {entry['cumulative_ms']:8.1f} ms")
+    if report['deferred_imported']:
+        print(f"Imported at startup but should be deferred: {', '.join(report['deferred_imported'])}")
+
+    print(f"First frame (best of {args.runs}, target {FIRST_FRAME_TARGET_SECONDS * 1000:.0f} ms):")
+    for strategy, timings in report['first_frame'].items():
+        print(f"  {strategy:6s} imports {timings['import_s'] * 1000:7.0f} ms   "
+              f"first frame {timings['first_frame_s'] * 1000:7.0f} ms   "
+              f"process {timings['wall_s'] * 1000:7.0f} ms")
+
+    if args.output:
+        save_json(args.output, report)
+    lazy = report['first_frame'].get('lazy')
+    return 0 if lazy and lazy['first_frame_s'] <= FIRST_FRAME_TARGET_SECONDS else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
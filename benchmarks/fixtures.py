@@ -0,0 +1,52 @@
+"""
+Synthetic media fixtures for benchmarks
+
+Fixtures are generated deterministically on first use and cached, so runs
+are comparable across machines without shipping binary media in the repo.
+"""
+
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.fixtures')
+
+
+def _pattern(width, height, seed=0):
+    """Gradient plus noise: compresses like a real photo, unlike flat colour"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.empty((height, width, 3), dtype=np.float32)
+    base[..., 0] = x
+    base[..., 1] = y
+    base[..., 2] = (x + y) / 2
+    base += rng.normal(0, 12, size=(height, width, 1)).astype(np.float32)
+    return np.clip(base, 0, 255).astype(np.uint8)
+
+
+def image_fixture(width, height, fmt='JPEG', fixture_dir=FIXTURE_DIR):
+    """Path to a synthetic still image of the given size"""
+    ext = {'JPEG': 'jpg', 'PNG': 'png'}[fmt]
+    path = os.path.join(fixture_dir, f'photo_{width}x{height}.{ext}')
+    if not os.path.exists(path):
+        os.makedirs(fixture_dir, exist_ok=True)
+        Image.fromarray(_pattern(width, height)).save(path, fmt, quality=90)
+    return path
+
+
+def video_fixture(width, height, frames=90, fps=30, fixture_dir=FIXTURE_DIR):
+    """Path to a synthetic MP4 clip with moving content"""
+    path = os.path.join(fixture_dir, f'video_{width}x{height}_{frames}f.mp4')
+    if not os.path.exists(path):
+        os.makedirs(fixture_dir, exist_ok=True)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+        base = _pattern(width, height)
+        for i in range(frames):
+            frame = np.roll(base, i * 8, axis=1)
+            cv2.putText(frame, str(i), (40, 120), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 6)
+            writer.write(frame)
+        writer.release()
+    return path
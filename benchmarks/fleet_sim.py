@@ -0,0 +1,368 @@
+"""
+Fleet simulator - load-tests the status server with virtual kiosks
+
+Runs N virtual kiosks in one asyncio process. Each kiosk is an
+AsyncDemoEngine rotating through its own playlist and reporting its status
+to the server every heartbeat interval, either one check at a time
+(POST /api/status) or in gzip'd batches (POST /api/status/batch). Requests
+go straight into the ASGI app built by server.create_app, backed by an
+in-memory stand-in for MongoDB, so nothing but this process is needed and
+the measured latency is the server's own handling time.
+
+Faults can be injected on both sides:
+
+    --malformed-rate 0.01   fraction of heartbeats sent without client_name
+    --offline-rate 0.005    chance per heartbeat that a kiosk goes offline for
+                            --offline-seconds, then sends its backlog at once
+    --db-latency 0.002      seconds added to every database call
+    --db-error-rate 0.001   fraction of database calls that raise
+
+The report gives throughput, latency percentiles per route, status codes
+and error rates.
+
+    python -m benchmarks.fleet_sim
+    python -m benchmarks.fleet_sim --kiosks 2000 --interval 5 --seconds 60 --batch-size 4
+    python -m benchmarks.fleet_sim --playlist demo_settings.json --output fleet.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from async_demo import AsyncDemoEngine
+from benchmarks.harness import load_json, save_json, summarize
+from heartbeat import encode_batch
+
+STATUS_ROUTE = '/api/status'
+BATCH_ROUTE = '/api/status/batch'
+# Offline kiosks keep at most this many samples, like a full spool
+MAX_BACKLOG = 500
+
+
+class DatabaseError(Exception):
+    """Injected database failure"""
+
+
+class _Cursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+class MemoryCollection:
+    """Just enough of a Motor collection for the status server"""
+    def __init__(self, database):
+        self.database = database
+        self.documents = []
+
+    def _matches(self, doc, query):
+        for key, value in (query or {}).items():
+            if isinstance(value, dict):
+                if not doc.get(key, float('inf')) <= value['$lte']:
+                    return False
+            elif doc.get(key) != value:
+                return False
+        return True
+
+    async def insert_one(self, document):
+        await self.database.command()
+        self.documents.append(document)
+
+    async def insert_many(self, documents, ordered=True):
+        await self.database.command()
+        self.documents.extend(documents)
+
+    async def find_one(self, query, projection=None, sort=None):
+        await self.database.command()
+        matches = [d for d in self.documents if self._matches(d, query)]
+        if sort:
+            key, direction = sort[0]
+            matches.sort(key=lambda d: d[key], reverse=direction < 0)
+        return matches[0] if matches else None
+
+    def find(self, query=None):
+        return _Cursor([d for d in self.documents if self._matches(d, query)])
+
+    async def delete_many(self, query):
+        await self.database.command()
+        self.documents = [d for d in self.documents if not self._matches(d, query)]
+
+    async def create_index(self, keys, **kwargs):
+        pass
+
+
+class MemoryDatabase:
+    """In-memory stand-in for the Motor database, with latency and failure injection"""
+    def __init__(self, latency=0.0, error_rate=0.0, rng=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = rng or random.Random()
+        self.commands = 0
+        self.errors = 0
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self)
+        return self._collections[name]
+
+    __getitem__ = __getattr__
+
+    async def command(self):
+        """Called by every collection operation"""
+        self.commands += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            raise DatabaseError("injected database failure")
+
+
+class AsgiClient:
+    """Calls an ASGI app in-process and records status and latency per request"""
+    def __init__(self, app):
+        self.app = app
+        self.latencies = {}
+        self.statuses = Counter()
+
+    async def request(self, method, path, body=b'', headers=()):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'root_path': '', 'server': ('fleet', 80), 'client': ('fleet', 1),
+            'headers': [(k.lower().encode(), v.encode()) for k, v in headers],
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        response = {'status': 500}
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            # Starlette sends the 500 and then re-raises for the server to log
+            response['status'] = 500
+        elapsed = time.perf_counter() - start
+
+        self.latencies.setdefault(path, []).append(elapsed)
+        self.statuses[response['status']] += 1
+        return response['status']
+
+
+def synthetic_playlist(rng, count=None):
+    """A few photos and videos with short, varied durations"""
+    count = count or rng.randint(3, 8)
+    playlist = []
+    for i in range(count):
+        kind = rng.choice(['photo', 'photo', 'video'])
+        playlist.append({'type': kind, 'name': f'{kind}_{i}', 'path': f'/virtual/{kind}_{i}',
+                         'duration': round(rng.uniform(2, 10), 1)})
+    return playlist
+
+
+class VirtualKiosk:
+    """An AsyncDemoEngine that sends heartbeats the way a kiosk does"""
+    def __init__(self, name, client, playlist, interval=1.0, batch_size=1,
+                 malformed_rate=0.0, offline_rate=0.0, offline_seconds=10.0, rng=None):
+        self.name = name
+        self.client = client
+        self.interval = interval
+        self.batch_size = batch_size
+        self.malformed_rate = malformed_rate
+        self.offline_rate = offline_rate
+        self.offline_seconds = offline_seconds
+        self.rng = rng or random.Random()
+
+        self.engine = AsyncDemoEngine(settings={})
+        self.engine.demo_content = playlist
+        self.pending = []
+        self.offline_until = 0.0
+        self.sent_samples = 0
+        self.dropped_samples = 0
+
+    def sample(self):
+        status = self.engine.get_status()
+        status['client_name'] = self.name
+        status['timestamp'] = datetime.now(timezone.utc).isoformat()
+        if self.malformed_rate and self.rng.random() < self.malformed_rate:
+            del status['client_name']
+        return status
+
+    async def run(self, stop_event):
+        loop = asyncio.get_running_loop()
+        self.engine.start_demo()
+        try:
+            # Random phase, so the fleet doesn't report in lockstep
+            await asyncio.sleep(self.rng.uniform(0, self.interval))
+            while not stop_event.is_set():
+                self.pending.append(self.sample())
+                now = loop.time()
+                if self.offline_rate and now >= self.offline_until and self.rng.random() < self.offline_rate:
+                    self.offline_until = now + self.offline_seconds
+                if now >= self.offline_until and len(self.pending) >= self.batch_size:
+                    await self.flush()
+                if len(self.pending) > MAX_BACKLOG:
+                    self.dropped_samples += len(self.pending) - MAX_BACKLOG
+                    del self.pending[:-MAX_BACKLOG]
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.engine.stop()
+
+    async def flush(self):
+        samples, self.pending = self.pending, []
+        if self.batch_size == 1 and len(samples) == 1:
+            status = await self.client.request(
+                'POST', STATUS_ROUTE, json.dumps(samples[0]).encode(),
+                headers=[('Content-Type', 'application/json')])
+        else:
+            status = await self.client.request(
+                'POST', BATCH_ROUTE, encode_batch(samples),
+                headers=[('Content-Type', 'application/json'), ('Content-Encoding', 'gzip')])
+
+        if status < 300:
+            self.sent_samples += len(samples)
+        elif status >= 500:
+            # Keep them for the next heartbeat, like the spool does
+            self.pending = samples + self.pending
+        else:
+            # The server will never accept these
+            self.dropped_samples += len(samples)
+
+
+def create_server(db):
+    import server
+
+    app = server.create_app(server.ServerSettings(mongo_url='mongodb://fleet-sim', db_name='fleet_sim'))
+    # The lifespan handler (and its Mongo client) never runs in-process
+    app.state.db = db
+    return app
+
+
+async def simulate(kiosks=100, seconds=10.0, interval=1.0, batch_size=1, playlist=None,
+                   malformed_rate=0.0, offline_rate=0.0, offline_seconds=10.0,
+                   db_latency=0.0, db_error_rate=0.0, seed=None):
+    """Run a fleet against an in-process server and return the report"""
+    rng = random.Random(seed)
+    db = MemoryDatabase(db_latency, db_error_rate, random.Random(rng.random()))
+    client = AsgiClient(create_server(db))
+
+    fleet = [
+        VirtualKiosk(f'kiosk-{i:05d}', client, playlist or synthetic_playlist(rng), interval,
+                     batch_size, malformed_rate, offline_rate, offline_seconds,
+                     random.Random(rng.random()))
+        for i in range(kiosks)
+    ]
+    stop_event = asyncio.Event()
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    tasks = [asyncio.get_running_loop().create_task(kiosk.run(stop_event)) for kiosk in fleet]
+    await asyncio.sleep(seconds)
+    stop_event.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    requests = sum(client.statuses.values())
+    errors = sum(count for status, count in client.statuses.items() if status >= 400)
+    server_errors = sum(count for status, count in client.statuses.items() if status >= 500)
+    stored = len(db.status_checks.documents)
+    return {
+        'kiosks': kiosks,
+        'seconds': elapsed,
+        'requests': requests,
+        'throughput_per_s': requests / elapsed,
+        'samples_stored': stored,
+        'samples_per_s': stored / elapsed,
+        'samples_dropped': sum(kiosk.dropped_samples for kiosk in fleet),
+        'samples_pending': sum(len(kiosk.pending) for kiosk in fleet),
+        'items_played': sum(kiosk.engine.items_played for kiosk in fleet),
+        'item_errors': sum(kiosk.engine.item_errors for kiosk in fleet),
+        'latency': {path: summarize(values) for path, values in client.latencies.items()},
+        'status_codes': {str(status): count for status, count in sorted(client.statuses.items())},
+        'error_rate': errors / requests if requests else 0.0,
+        'server_error_rate': server_errors / requests if requests else 0.0,
+        'db_commands': db.commands,
+        'db_errors': db.errors,
+        'cpu_percent': cpu / elapsed * 100,
+    }
+
+
+def run(**options):
+    return asyncio.run(simulate(**options))
+
+
+def _load_playlist(path):
+    data = load_json(path)
+    if isinstance(data, dict):
+        data = data.get('demo_content', [])
+    if not data:
+        raise SystemExit(f"No playlist items in {path}")
+    return data
+
+
+def print_report(report):
+    print(f"{report['kiosks']} kiosks for {report['seconds']:.1f}s: {report['requests']} requests "
+          f"({report['throughput_per_s']:.0f}/s), {report['samples_stored']} samples stored "
+          f"({report['samples_per_s']:.0f}/s), {report['cpu_percent']:.0f}% CPU")
+    for path, stats in report['latency'].items():
+        print(f"  {path:20s} n={stats['count']:<7d} p50 {stats['p50_ms']:7.2f} ms  "
+              f"p95 {stats['p95_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms  max {stats['max_ms']:7.2f} ms")
+    codes = ', '.join(f"{status}: {count}" for status, count in report['status_codes'].items())
+    print(f"  status codes {codes}")
+    print(f"  error rate {report['error_rate']:.2%} (5xx {report['server_error_rate']:.2%}), "
+          f"{report['samples_dropped']} samples dropped, {report['samples_pending']} still pending")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the status server with virtual kiosks")
+    parser.add_argument('--kiosks', type=int, default=200, help='Number of virtual kiosks')
+    parser.add_argument('--seconds', type=float, default=10, help='How long to run')
+    parser.add_argument('--interval', type=float, default=1.0, help='Heartbeat interval per kiosk (s)')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Samples per request; above 1 uses /api/status/batch')
+    parser.add_argument('--playlist', help='JSON playlist (or settings file) for every kiosk; '
+                                           'default is a random playlist per kiosk')
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--offline-rate', type=float, default=0.0)
+    parser.add_argument('--offline-seconds', type=float, default=10.0)
+    parser.add_argument('--db-latency', type=float, default=0.0)
+    parser.add_argument('--db-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, help='Random seed for a repeatable fleet')
+    parser.add_argument('--output', help='Write the report JSON to this file')
+    args = parser.parse_args(argv)
+
+    report = run(
+        kiosks=args.kiosks, seconds=args.seconds, interval=args.interval,
+        batch_size=args.batch_size,
+        playlist=_load_playlist(args.playlist) if args.playlist else None,
+        malformed_rate=args.malformed_rate, offline_rate=args.offline_rate,
+        offline_seconds=args.offline_seconds, db_latency=args.db_latency,
+        db_error_rate=args.db_error_rate, seed=args.seed,
+    )
+    print_report(report)
+    if args.output:
+        save_json(args.output, report)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+"""
+Benchmark harness - stage timing, statistics and baseline comparison
+"""
+
+import json
+import os
+import sys
+import time
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB"""
+    if sys.platform.startswith('win'):
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """Latency distribution of a list of durations, in milliseconds"""
+    values = sorted(s * 1000 for s in samples)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': sum(values) / len(values),
+        'p50_ms': percentile(values, 0.50),
+        'p95_ms': percentile(values, 0.95),
+        'p99_ms': percentile(values, 0.99),
+        'max_ms': values[-1],
+    }
+
+
+class StageTimer:
+    """Collects per-stage durations for one scenario"""
+    def __init__(self):
+        self.samples = {}
+        self.started = time.perf_counter()
+        self.items = 0
+
+    def time(self, stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    def item_done(self):
+        self.items += 1
+
+    def result(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'stages': {stage: summarize(values) for stage, values in self.samples.items()},
+            'throughput_per_s': self.items / elapsed if elapsed > 0 else 0.0,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+
+def compare(results, baseline, tolerance=0.25, metric='p50_ms'):
+    """List regressions of `metric` beyond tolerance compared to a baseline"""
+    regressions = []
+    for scenario, result in results.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        for stage, stats in result['stages'].items():
+            base_stats = base['stages'].get(stage)
+            if not base_stats or metric not in stats or metric not in base_stats:
+                continue
+            # Ignore sub-0.05ms stages, where timer noise dominates
+            limit = max(base_stats[metric] * (1 + tolerance), base_stats[metric] + 0.05)
+            if stats[metric] > limit:
+                regressions.append(
+                    f"{scenario}/{stage}: {metric} {stats[metric]:.2f} > {base_stats[metric]:.2f} "
+                    f"(+{tolerance:.0%} allowed)")
+        if base.get('peak_rss_mb') and result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(
+                f"{scenario}: peak RSS {result['peak_rss_mb']:.0f} MiB > {base['peak_rss_mb']:.0f} MiB")
+    return regressions
+
+
+def load_json(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
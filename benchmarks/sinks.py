@@ -0,0 +1,39 @@
+"""
+Frame sinks - the "present" stage of a benchmark run
+
+A sink is a renderer from renderers.py (show(image)), so benchmarks measure
+the same presentation code MediaPlayer uses.
+"""
+
+import numpy as np
+
+from renderers import NullRenderer, Renderer, TkRenderer
+
+
+class CopySink(Renderer):
+    """Copies each frame into a reused buffer, like uploading to a texture"""
+    name = 'copy'
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = None
+
+    def show(self, image):
+        array = np.asarray(image)
+        if self.buffer is None or self.buffer.shape != array.shape:
+            self.buffer = np.empty_like(array)
+        np.copyto(self.buffer, array)
+
+
+class TkSink(TkRenderer):
+    """Tk presentation, flushed per frame. Needs a display."""
+    def __init__(self):
+        super().__init__()
+        self.open()
+
+    def show(self, image):
+        super().show(image)
+        self.window.update_idletasks()
+
+
+SINKS = {'null': NullRenderer, 'copy': CopySink, 'tk': TkSink}
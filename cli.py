@@ -1,5 +1,54 @@
 import argparse
+import json
+import os
+import time
 from demo_core import DemoModeCore
+from event_log import DEFAULT_LOG_FILE, setup_logging
+from perf_stats import DEFAULT_STATS_FILE, format_summary, load_summary
+
+
+def show_stats(path, as_json=False):
+    """Print the latency histograms last saved by the kiosk"""
+    saved = load_summary(path)
+    if saved is None:
+        print(f"📉 No stats in {path}; the kiosk saves them every minute while running")
+        return
+    if as_json:
+        print(json.dumps(saved, indent=2))
+        return
+    age = time.time() - saved['saved_at']
+    print(f"📊 Latency statistics from {path} (saved {age:.0f}s ago)")
+    print(format_summary(saved['perf']))
+
+
+def profile_kiosk(seconds, interval, output):
+    """Run the kiosk in demo mode for `seconds` while sampling its threads"""
+    from profiler import start_profiling, stop_profiling
+
+    start_profiling(interval)
+    from demo_app import DemoModeApp
+    app = DemoModeApp()
+    result = {}
+
+    def finish():
+        app.stop_demo_mode()
+        result['profile'] = stop_profiling()
+        app.on_closing()
+
+    if app.demo_content:
+        app.start_demo_mode()
+    app.root.after(int(seconds * 1000), finish)
+    app.run()
+
+    profile = result.get('profile') or stop_profiling()
+    profile.save(output)
+    report = profile.report()
+    print(f"📈 {report['samples']} samples in {report['duration_s']:.1f}s, "
+          f"profiler overhead {report['overhead_percent']:.2f}%")
+    for name, stats in report['spans'].items():
+        print(f"  {name:14s} {stats['count']:7d}x  mean {stats['mean_ms']:8.3f} ms  "
+              f"max {stats['max_ms']:8.3f} ms")
+    print(f"💾 Collapsed stacks written to {output}")
 
 
 def main():
@@ -14,29 +63,81 @@ def main():
     add.add_argument("name", nargs="?", help="Display name")
     add.add_argument("--duration", type=int, default=None, help="Duration in seconds")
 
+    ingest = sub.add_parser("ingest", help="Add many photo/video files at once")
+    ingest.add_argument("type", choices=["photo", "video"], help="Content type")
+    ingest.add_argument("paths", nargs="+", help="Files to add")
+    ingest.add_argument("--duration", type=int, default=None, help="Duration in seconds")
+
     remove = sub.add_parser("remove", help="Remove content by index")
     remove.add_argument("index", type=int, help="Index of item to remove (1-based)")
 
     exp = sub.add_parser("export", help="Export content list to JSON")
     exp.add_argument("file", help="Output file")
+    exp.add_argument("--include-media", action="store_true",
+                     help="Copy media files next to the export for use on another PC")
 
     imp = sub.add_parser("import", help="Import content list from JSON")
     imp.add_argument("file", help="Input file")
 
+    pub = sub.add_parser("publish", help="Publish content list as a server playlist")
+    pub.add_argument("server", help="Status server URL")
+    pub.add_argument("playlist", help="Playlist name")
+    pub.add_argument("--token", default=os.environ.get("PUBLISH_TOKEN"),
+                     help="Server publish token (default: PUBLISH_TOKEN environment variable)")
+
+    syn = sub.add_parser("sync", help="Keep content in sync with a server playlist")
+    syn.add_argument("server", help="Status server URL")
+    syn.add_argument("playlist", help="Playlist name")
+    syn.add_argument("--once", action="store_true", help="Sync once and exit")
+
+    stats = sub.add_parser("stats", help="Show latency statistics saved by the kiosk")
+    stats.add_argument("--file", default=None, help="Stats file (default: perf_stats_file setting)")
+    stats.add_argument("--json", action="store_true", help="Print raw JSON")
+
+    prof = sub.add_parser("profile", help="Run the kiosk in demo mode and profile it")
+    prof.add_argument("--seconds", type=float, default=60, help="How long to run")
+    prof.add_argument("--interval-ms", type=float, default=10, help="Stack sampling interval")
+    prof.add_argument("--output", default="profile.collapsed",
+                      help="Collapsed-stack output file (a .json report is written next to it)")
+
     args = parser.parse_args()
 
     demo = DemoModeCore()
+    setup_logging(demo.settings.get('log_level', 'INFO'), demo.settings.get('log_file', DEFAULT_LOG_FILE))
 
     if args.cmd == "list":
         demo.list_content()
     elif args.cmd == "add":
         demo.add_content(args.type, args.path, args.name, args.duration)
+    elif args.cmd == "ingest":
+        demo.add_files(args.type, args.paths, args.duration)
     elif args.cmd == "remove":
         demo.remove_content(args.index - 1)
     elif args.cmd == "export":
-        demo.export_content(args.file)
+        demo.export_content(args.file, args.include_media)
     elif args.cmd == "import":
         demo.import_content(args.file)
+    elif args.cmd == "publish":
+        from playlist_sync import publish_playlist
+        publish_playlist(args.server, args.playlist, demo.demo_content, demo.media_store,
+                         token=args.token)
+    elif args.cmd == "stats":
+        show_stats(args.file or demo.settings.get('perf_stats_file', DEFAULT_STATS_FILE), args.json)
+    elif args.cmd == "profile":
+        profile_kiosk(args.seconds, args.interval_ms / 1000, args.output)
+    elif args.cmd == "sync":
+        from playlist_sync import PlaylistSyncClient
+        client = PlaylistSyncClient(args.server, args.playlist, demo)
+        if args.once:
+            client.poll_timeout = 0
+            client.sync_once()
+        else:
+            client.start()
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                client.stop()
     else:
         parser.print_help()
 
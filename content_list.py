@@ -0,0 +1,196 @@
+"""
+Content List - Virtualized playlist view with thumbnails
+
+A Canvas that draws only the rows currently in view, from a small pool of
+canvas items reused while scrolling. Setting a 5,000-item playlist costs the
+same as setting a 10-item one; thumbnails are requested only for visible
+rows and drawn when the worker pool (see thumbnails.py) has made them.
+
+Bound to a ContentModel, the list applies its insert/remove/move diffs:
+each edit only shifts the selection and schedules one coalesced redraw of
+the visible rows, so adding 2,000 items one by one redraws a handful of
+times instead of 2,000.
+"""
+
+import os
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+from PIL import Image, ImageTk
+
+from thumbnails import THUMBNAIL_SIZE
+
+ROW_HEIGHT = THUMBNAIL_SIZE[1] + 6
+# Decoded thumbnails kept as Tk images; a few screens' worth of rows
+IMAGE_CACHE_SIZE = 200
+
+
+def describe(item):
+    """One-line text for a content item"""
+    text = f"{item['type'].upper()}: {os.path.basename(item['path'])}"
+    if item['type'] == 'application':
+        text += f" (Launch: {item.get('launch_mode', 'desktop')})"
+    return text
+
+
+def shift_index(index, change):
+    """Where a row index ends up after a ContentModel change (None if removed)"""
+    if index is None or change.kind == 'reset':
+        return None
+    if change.kind == 'insert':
+        return index + 1 if index >= change.index else index
+    if change.kind == 'remove':
+        if index == change.index:
+            return None
+        return index - 1 if index > change.index else index
+    if change.kind == 'move':
+        if index == change.index:
+            return change.new_index
+        # Remove at the old position, then insert at the new one
+        if index > change.index:
+            index -= 1
+        return index + 1 if index >= change.new_index else index
+    return index
+
+
+def visible_rows(offset, height, row_height, count):
+    """Range of row indices at least partly visible at a scroll offset"""
+    first = max(0, int(offset // row_height))
+    last = min(count, int((offset + height) // row_height) + 1)
+    return range(first, max(first, last))
+
+
+class ContentList:
+    """Scrollable list of content items, with a Listbox-like selection API"""
+    def __init__(self, parent, thumbnails):
+        self.thumbnails = thumbnails
+        self.items = []
+        self.offset = 0
+        self.selected = None
+        self._rows = []
+        self._images = OrderedDict()
+        self._render_pending = False
+
+        self.canvas = tk.Canvas(parent, bg='white', highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        self.canvas.bind('<Configure>', lambda event: self._scroll_to(self.offset))
+        self.canvas.bind('<Button-1>', self._on_click)
+        # Windows sends wheel events to the focused widget
+        self.canvas.bind('<Enter>', lambda event: self.canvas.focus_set())
+        self.canvas.bind('<MouseWheel>', self._on_wheel)
+        self.canvas.bind('<Button-4>', lambda event: self.yview('scroll', -1, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.yview('scroll', 1, 'units'))
+
+    def set_items(self, items):
+        """Show a new list of items (only visible rows are drawn)"""
+        self.items = items
+        if self.selected is not None and self.selected >= len(items):
+            self.selected = None
+        self._scroll_to(self.offset)
+
+    def apply(self, change):
+        """Update for one ContentModel change; self.items must be the model"""
+        self.selected = shift_index(self.selected, change)
+        self._scroll_to(self.offset)
+
+    def curselection(self):
+        """Selected indices, like Listbox.curselection()"""
+        return () if self.selected is None else (self.selected,)
+
+    def refresh(self):
+        """Redraw soon; repeated calls before the redraw are coalesced"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.canvas.after_idle(self._render)
+
+    # Scrolling
+
+    def _total_height(self):
+        return len(self.items) * ROW_HEIGHT
+
+    def _scroll_to(self, offset):
+        max_offset = max(0, self._total_height() - self.canvas.winfo_height())
+        self.offset = min(max(0, offset), max_offset)
+        self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar command ('moveto' fraction or 'scroll' n units/pages)"""
+        if args[0] == 'moveto':
+            self._scroll_to(float(args[1]) * self._total_height())
+        elif args[0] == 'scroll':
+            step = ROW_HEIGHT if args[2] == 'units' else self.canvas.winfo_height()
+            self._scroll_to(self.offset + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        self.yview('scroll', -1 if event.delta > 0 else 1, 'units')
+
+    def _on_click(self, event):
+        index = int((self.offset + event.y) // ROW_HEIGHT)
+        self.selected = index if index < len(self.items) else None
+        self.refresh()
+
+    # Drawing
+
+    def _render(self):
+        self._render_pending = False
+        height = self.canvas.winfo_height()
+        width = self.canvas.winfo_width()
+        rows = visible_rows(self.offset, height, ROW_HEIGHT, len(self.items))
+
+        while len(self._rows) < len(rows):
+            self._rows.append((
+                self.canvas.create_rectangle(0, 0, 0, 0, width=0),
+                self.canvas.create_image(0, 0, anchor=tk.W),
+                self.canvas.create_text(0, 0, anchor=tk.W),
+            ))
+
+        for slot, (background, image, text) in enumerate(self._rows):
+            if slot >= len(rows):
+                for canvas_item in (background, image, text):
+                    self.canvas.itemconfigure(canvas_item, state='hidden')
+                continue
+            index = rows[slot]
+            item = self.items[index]
+            top = index * ROW_HEIGHT - self.offset
+            middle = top + ROW_HEIGHT // 2
+            selected = index == self.selected
+
+            self.canvas.coords(background, 0, top, width, top + ROW_HEIGHT)
+            self.canvas.itemconfigure(background, state='normal',
+                                      fill='#0078d7' if selected else 'white')
+            self.canvas.coords(image, 3, middle)
+            self.canvas.itemconfigure(image, state='normal', image=self._thumbnail(item) or '')
+            self.canvas.coords(text, THUMBNAIL_SIZE[0] + 12, middle)
+            self.canvas.itemconfigure(text, state='normal', text=describe(item),
+                                      fill='white' if selected else 'black')
+
+        total = self._total_height()
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _thumbnail(self, item):
+        """Tk image for an item's thumbnail, or None while it is being made"""
+        path = self.thumbnails.request(item, self._on_thumbnail_ready)
+        if not path:
+            return None
+        photo = self._images.get(path)
+        if photo is None:
+            with Image.open(path) as image:
+                photo = ImageTk.PhotoImage(image)
+            self._images[path] = photo
+            if len(self._images) > IMAGE_CACHE_SIZE:
+                self._images.popitem(last=False)
+        else:
+            self._images.move_to_end(path)
+        return photo
+
+    def _on_thumbnail_ready(self, path):
+        # Called from a worker thread; redraw on the Tk thread
+        if path:
+            self.canvas.after(0, self.refresh)
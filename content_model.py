@@ -0,0 +1,149 @@
+"""
+Content Model - Observable, copy-on-write playlist
+
+Holds the demo content items and tells listeners what changed instead of
+just that something changed, so views can update in proportion to the edit
+rather than rebuilding themselves:
+
+    Change('insert', index, item)           item inserted at index
+    Change('remove', index, item)           item removed from index
+    Change('move', index, item, new_index)  item moved from index to new_index
+    Change('reset')                         everything replaced
+
+The items are kept in a tuple that is never modified. An edit builds a new
+tuple and swaps it in with a single assignment, so snapshot() is lock-free
+and a reader (e.g. the demo loop thread) can index its snapshot for as long
+as it likes while the GUI removes items. Writers are serialized by a lock.
+
+Listeners are called synchronously, on the thread that made the change,
+in the order the changes were made.
+"""
+
+import threading
+from collections import namedtuple
+
+from playlist_engine import item_key
+
+Change = namedtuple('Change', 'kind index item new_index', defaults=(None, None, None))
+
+
+class ContentModel:
+    """Playlist of content items that reports insert/remove/move diffs"""
+    def __init__(self, items=()):
+        self._items = tuple(items)
+        self._listeners = []
+        self._write_lock = threading.RLock()
+
+    def subscribe(self, listener):
+        """Call listener(change) after every change"""
+        self._listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def _commit(self, items, change):
+        self._items = items
+        for listener in list(self._listeners):
+            listener(change)
+
+    # Read access, like a list
+
+    def snapshot(self):
+        """Immutable tuple of the current items"""
+        return self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def to_list(self):
+        """Plain list copy, e.g. for saving"""
+        return list(self._items)
+
+    # Edits
+
+    def insert(self, index, item):
+        with self._write_lock:
+            items = self._items
+            index = max(0, min(index, len(items)))
+            self._commit(items[:index] + (item,) + items[index:], Change('insert', index, item))
+
+    def append(self, item):
+        with self._write_lock:
+            self.insert(len(self._items), item)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def remove(self, index):
+        """Remove and return the item at index"""
+        with self._write_lock:
+            items = self._items
+            if index < 0:
+                index += len(items)
+            item = items[index]
+            self._commit(items[:index] + items[index + 1:], Change('remove', index, item))
+            return item
+
+    def __delitem__(self, index):
+        self.remove(index)
+
+    def move(self, index, new_index):
+        """Move the item at index so it ends up at new_index"""
+        if index == new_index:
+            return
+        with self._write_lock:
+            items = list(self._items)
+            item = items.pop(index)
+            new_index = max(0, min(new_index, len(items)))
+            items.insert(new_index, item)
+            self._commit(tuple(items), Change('move', index, item, new_index))
+
+    def reset(self, items):
+        """Replace all items"""
+        with self._write_lock:
+            self._commit(tuple(items), Change('reset'))
+
+    def assign(self, items, key=None):
+        """Turn the content into items through insert/remove/move changes.
+
+        Items are matched by key(item), by default their 'id' or else their
+        path; a matched item whose fields changed is removed and inserted
+        again. Unlike reset(), views only update the rows that changed.
+        """
+        key = key or item_key
+        items = list(items)
+        with self._write_lock:
+            wanted = {key(item) for item in items}
+            for index in reversed(range(len(self._items))):
+                if key(self._items[index]) not in wanted:
+                    self.remove(index)
+
+            for index, item in enumerate(items):
+                current = self._items
+                if index < len(current) and key(current[index]) == key(item):
+                    if current[index] != item:
+                        self.remove(index)
+                        self.insert(index, item)
+                    continue
+                found = next((i for i in range(index + 1, len(current))
+                              if key(current[i]) == key(item)), None)
+                if found is None:
+                    self.insert(index, item)
+                    continue
+                self.move(found, index)
+                if self._items[index] != item:
+                    self.remove(index)
+                    self.insert(index, item)
+
+            # Left over duplicates of a key
+            while len(self._items) > len(items):
+                self.remove(len(self._items) - 1)
+
@@ -6,25 +6,54 @@ A retail demo application for showcasing PCs in stores like MediaMarkt.
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
+import multiprocessing
 import time
 import os
 import sys
+import socket
 from datetime import datetime
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 from settings_manager import SettingsManager
 from input_controller import InputController
-from media_player import MediaPlayer
-from app_launcher import AppLauncher
+from displays import create_display_pipelines
 from system_utils import SystemUtils
+from heartbeat import HeartbeatReporter
+from media_store import MediaStore
+from thumbnails import ThumbnailCache
+from content_list import ContentList
+from content_model import ContentModel
+from event_log import DEFAULT_LOG_FILE, get_logger, setup_logging, shutdown_logging
+from playlist_engine import PlaylistEngine, item_key
+from profiler import start_profiling, stop_profiling
+import perf_stats
+
+# Seconds to wait before looking again when no item may play
+IDLE_RETRY_SECONDS = 5
+# How often the latency histograms are written out for `cli.py stats`
+PERF_STATS_SAVE_SECONDS = 60
+
+log = get_logger('app')
 
 class DemoModeApp:
     def __init__(self):
         self.root = tk.Tk()
         self.settings_manager = SettingsManager()
+        setup_logging(self.settings_manager.get('log_level', 'INFO'),
+                      self.settings_manager.get('log_file', DEFAULT_LOG_FILE))
+        if self.settings_manager.get('profiling', False):
+            start_profiling(self.settings_manager.get('profile_interval_ms', 10) / 1000)
+        self.media_store = MediaStore(self.settings_manager.get('media_store_dir', 'media_store'))
+        self.thumbnails = ThumbnailCache(self.media_store)
+        # Files added through the UI are hashed and stored off the Tk thread
+        self._ingest_pool = ThreadPoolExecutor(max_workers=1)
         self.input_controller = InputController(self)
-        self.media_player = MediaPlayer(self)
-        self.app_launcher = AppLauncher(self)
+        # Built on first use (see the media_player and app_launcher properties)
+        self._media_player = None
+        self._app_launcher = None
+        # Additional screens, each with its own playlist (see displays.py)
+        self.displays = create_display_pipelines(self, self.settings_manager.get('displays', []))
         self.system_utils = SystemUtils()
         
         # Application state
@@ -32,8 +61,15 @@ class DemoModeApp:
         self.is_fullscreen = False
         self.is_keyboard_locked = False
         self.last_activity_time = time.time()
-        self.demo_content = []
+        self.demo_content = ContentModel()
         self.current_content_index = 0
+        self.current_item = None
+        self.next_item = None
+        self.playlist = None
+        self.content_timer = None
+        self.started_at = time.time()
+        # Heartbeats carry the latency summary only now and then
+        self.perf_report = perf_stats.SummaryReport()
         
         # Emergency escape combination: Ctrl+Alt+Shift+Esc
         self.escape_keys = {'ctrl', 'alt', 'shift', 'esc'}
@@ -46,9 +82,64 @@ class DemoModeApp:
         # Start input monitoring
         self.input_controller.start_monitoring()
         
+        # Report status to the fleet server if one is configured
+        self.app_monitor = None
+        self.heartbeat = None
+        self.playlist_sync = None
+        server_url = self.settings_manager.get('status_server_url')
+        if server_url:
+            from app_launcher import ApplicationMonitor
+            self.app_monitor = ApplicationMonitor(self.app_launcher)
+            self.app_monitor.start_monitoring()
+            self.heartbeat = HeartbeatReporter(
+                server_url,
+                self.settings_manager.get('kiosk_name') or socket.gethostname(),
+                self.get_status,
+                interval=self.settings_manager.get('heartbeat_interval', 30)
+            )
+            self.heartbeat.start()
+            
+            # Follow a server playlist; updates are applied as content edits
+            playlist_name = self.settings_manager.get('sync_playlist')
+            if playlist_name:
+                from playlist_sync import PlaylistSyncClient
+                self.playlist_sync = PlaylistSyncClient(server_url, playlist_name, self)
+                self.playlist_sync.start()
+        
         # Check if should start in demo mode
         if self.settings_manager.get('auto_start_demo', False):
             self.root.after(2000, self.start_demo_mode)  # Start after 2 seconds
+        
+        self.root.after(PERF_STATS_SAVE_SECONDS * 1000, self.save_perf_stats)
+    
+    @property
+    def media_player(self):
+        """Player for the main screen, created when first needed.
+
+        Importing the media stack (OpenCV, NumPy) takes longer than the
+        rest of startup, so it is left until something plays.
+        """
+        if self._media_player is None:
+            from media_player import MediaPlayer
+            self._media_player = MediaPlayer(self)
+        return self._media_player
+    
+    @property
+    def app_launcher(self):
+        """Launcher for application items, created when first needed"""
+        if self._app_launcher is None:
+            from app_launcher import AppLauncher
+            self._app_launcher = AppLauncher(self)
+        return self._app_launcher
+    
+    def save_perf_stats(self, reschedule=True):
+        """Write the latency histograms' summary for `cli.py stats`"""
+        try:
+            perf_stats.stats.save(self.settings_manager.get('perf_stats_file', perf_stats.DEFAULT_STATS_FILE))
+        except OSError as e:
+            log.warning("Could not save perf stats: %s", e)
+        if reschedule:
+            self.root.after(PERF_STATS_SAVE_SECONDS * 1000, self.save_perf_stats)
     
     def setup_main_window(self):
         """Initialize the main application window"""
@@ -136,65 +227,63 @@ class DemoModeApp:
         listbox_frame.columnconfigure(0, weight=1)
         listbox_frame.rowconfigure(0, weight=1)
         
-        self.content_listbox = tk.Listbox(listbox_frame)
-        self.content_listbox.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Scrollbar for listbox
-        scrollbar = ttk.Scrollbar(listbox_frame, orient="vertical", command=self.content_listbox.yview)
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        self.content_listbox.configure(yscrollcommand=scrollbar.set)
+        # Only visible rows are drawn, with thumbnails made in the background
+        self.content_list = ContentList(listbox_frame, self.thumbnails)
         
-        # Update content display
-        self.update_content_display()
+        # Edits to the content are applied to the list as diffs
+        self.content_list.set_items(self.demo_content)
+        self.demo_content.subscribe(self.on_content_changed)
     
     def load_settings(self):
         """Load application settings"""
         # Update UI based on settings
         content = self.settings_manager.get('demo_content', [])
-        self.demo_content = content
-        self.update_content_display()
-    
-    def update_content_display(self):
-        """Update the content listbox display"""
-        self.content_listbox.delete(0, tk.END)
-        for item in self.demo_content:
-            display_text = f"{item['type'].upper()}: {os.path.basename(item['path'])}"
-            if item['type'] == 'application':
-                display_text += f" (Launch: {item.get('launch_mode', 'desktop')})"
-            self.content_listbox.insert(tk.END, display_text)
-        
+        self.demo_content.reset(content)
+    
+    def on_content_changed(self, change):
+        """Apply one content change (insert/remove/move/reset) to the display"""
+        self.content_list.apply(change)
         self.content_count_label.config(text=str(len(self.demo_content)))
     
     def add_photos(self):
         """Add photo files to demo content"""
         filetypes = [("Image files", "*.jpg *.jpeg *.png *.gif *.bmp")]
         files = filedialog.askopenfilenames(title="Select Photos", filetypes=filetypes)
-        
-        for file in files:
-            content_item = {
-                'type': 'photo',
-                'path': file,
-                'duration': self.settings_manager.get('photo_duration', 5)
-            }
-            self.demo_content.append(content_item)
-        
-        self.save_content()
-        self.update_content_display()
+        self.add_files('photo', files, duration=self.settings_manager.get('photo_duration', 5))
     
     def add_videos(self):
         """Add video files to demo content"""
         filetypes = [("Video files", "*.mp4 *.avi *.mov *.wmv *.mkv")]
         files = filedialog.askopenfilenames(title="Select Videos", filetypes=filetypes)
+        self.add_files('video', files)
+    
+    def add_files(self, content_type, files, **fields):
+        """Ingest files into the media store in the background, then add them.
+
+        Hashing and storing multi-GB videos takes a while, so it runs on the
+        ingest thread and the items are appended from the Tk thread when done.
+        """
+        files = list(files)
+        if not files:
+            return
+        future = self._ingest_pool.submit(self.media_store.ingest_many, files)
+        future.add_done_callback(
+            lambda f: self.root.after(0, self._add_ingested, content_type, files, fields, f))
+    
+    def _add_ingested(self, content_type, files, fields, future):
+        try:
+            hashes = future.result()
+        except Exception as e:
+            log.error("Could not add %s files: %s", content_type, e)
+            hashes = {}
         
         for file in files:
-            content_item = {
-                'type': 'video',
-                'path': file
-            }
+            content_item = {'type': content_type, 'path': file, **fields}
+            if file in hashes:
+                content_item['sha256'] = hashes[file]
             self.demo_content.append(content_item)
         
         self.save_content()
-        self.update_content_display()
     
     def add_application(self):
         """Add application to demo content"""
@@ -204,23 +293,45 @@ class DemoModeApp:
         if app_dialog.result:
             self.demo_content.append(app_dialog.result)
             self.save_content()
-            self.update_content_display()
     
     def remove_content(self):
         """Remove selected content item"""
-        selection = self.content_listbox.curselection()
+        selection = self.content_list.curselection()
         if selection:
             index = selection[0]
             del self.demo_content[index]
             self.save_content()
-            self.update_content_display()
+    
+    def apply_content(self, content):
+        """Take over a synced playlist (called from the sync thread)"""
+        self.root.after(0, self._apply_synced_content, list(content))
+    
+    def _apply_synced_content(self, content):
+        """Apply a synced playlist on the Tk thread without interrupting playback.
+
+        The content list gets only the inserts, removals and moves needed,
+        the current item keeps playing and the rotation continues after it.
+        """
+        self.demo_content.assign(content)
+        self.save_content()
+        if not self.is_demo_active:
+            return
+        index = self.current_content_index
+        if self.current_item is not None:
+            for i, item in enumerate(self.demo_content.snapshot()):
+                if item_key(item) == item_key(self.current_item):
+                    index = i
+                    break
+        self.current_content_index, self.next_item = self.next_content(index + 1)
     
     def save_content(self):
         """Save demo content to settings"""
-        self.settings_manager.set('demo_content', self.demo_content)
+        self.settings_manager.set('demo_content', self.demo_content.to_list())
     
     def start_demo_mode(self):
-        """Start the demo mode"""
+        """Start the demo mode; does nothing if it is already running"""
+        if self.is_demo_active:
+            return
         if not self.demo_content:
             messagebox.showwarning("No Content", "Please add some content before starting demo mode.")
             return
@@ -231,6 +342,8 @@ class DemoModeApp:
         # Hide main window and show fullscreen demo
         self.root.withdraw()
         self.show_fullscreen_demo()
+        for display in self.displays:
+            display.start()
         
         # Apply keyboard lock if enabled
         if self.settings_manager.get('keyboard_lock_enabled', False):
@@ -242,13 +355,21 @@ class DemoModeApp:
         self.is_demo_active = False
         self.is_fullscreen = False
         
+        # A pending switch to the next item would otherwise fire after a restart
+        if self.content_timer:
+            self.content_timer.cancel()
+            self.content_timer = None
+        
         # Unlock keyboard
         if self.is_keyboard_locked:
             self.input_controller.unlock_keyboard()
             self.is_keyboard_locked = False
         
         # Hide fullscreen and show main window
-        self.media_player.stop_playback()
+        if self._media_player:
+            self._media_player.stop_playback()
+        for display in self.displays:
+            display.stop()
         self.root.deiconify()
         self.update_status_display()
     
@@ -258,7 +379,7 @@ class DemoModeApp:
             return
         
         self.is_fullscreen = True
-        self.current_content_index = 0
+        self.current_content_index, self.next_item = self.next_content(0)
         self.play_current_content()
     
     def play_current_content(self):
@@ -266,7 +387,17 @@ class DemoModeApp:
         if not self.is_demo_active or not self.demo_content:
             return
         
-        content = self.demo_content[self.current_content_index]
+        if self.next_item is None:
+            # Nothing is scheduled (or everything is capped) right now
+            self.current_content_index, self.next_item = self.next_content(0)
+            if self.next_item is None:
+                self.schedule_content_timer(IDLE_RETRY_SECONDS)
+                return
+        
+        # The item was picked from a snapshot, so edits since then can't
+        # make it point at another item or past the end of the list
+        content = self.next_item
+        self.current_item = content
         
         if content['type'] in ['photo', 'video']:
             self.media_player.play_content(content)
@@ -281,14 +412,41 @@ class DemoModeApp:
         if not self.is_demo_active:
             return
         
-        content = self.demo_content[self.current_content_index]
-        duration = content.get('duration', 10)  # Default 10 seconds
+        duration = self.current_item.get('duration', 10)  # Default 10 seconds
         
-        # Move to next content
-        self.current_content_index = (self.current_content_index + 1) % len(self.demo_content)
+        # Pick the next content by order, weight, schedule and caps
+        self.current_content_index, self.next_item = self.next_content(self.current_content_index + 1)
+        
+        # Open the next video now so it starts without a gap. Preloading
+        # needs the player's renderer, so it only applies once something
+        # has played; don't build the player for it (app-only playlists)
+        player = self._media_player
+        if player and self.next_item is not None and self.next_item.get('type') == 'video':
+            player.preload(self.next_item)
         
         # Schedule next content
-        threading.Timer(duration, self.play_current_content).start()
+        self.schedule_content_timer(duration)
+    
+    def schedule_content_timer(self, delay):
+        """Play the next item after delay seconds (cancelled by stop_demo_mode)"""
+        self.content_timer = threading.Timer(delay, self.play_current_content)
+        self.content_timer.daemon = True
+        self.content_timer.start()
+    
+    def next_content(self, start):
+        """(index, item) to play next, or (None, None) if nothing may play now.
+
+        Both come from one snapshot of the content, so UI edits made at the
+        same time can't invalidate them.
+        """
+        snapshot = self.demo_content.snapshot()
+        playlist = self.playlist
+        if playlist is None or playlist.items is not snapshot:
+            # The content changed: rebuild, keeping frequency-cap history
+            playlist = PlaylistEngine(snapshot, playlist.history() if playlist else None)
+            self.playlist = playlist
+        index = playlist.next_index(start)
+        return (None, None) if index is None else (index, snapshot[index])
     
     def handle_escape_attempt(self):
         """Handle emergency escape key combination"""
@@ -355,6 +513,32 @@ class DemoModeApp:
         else:
             self.keyboard_status_label.config(text="Unlocked", foreground="green")
     
+    def get_status(self):
+        """Get current kiosk status for reporting"""
+        current = self.current_item
+        monitor = self.app_monitor
+        status = {
+            'demo_active': self.is_demo_active,
+            'content_count': len(self.demo_content),
+            'current_item': (current.get('name') or os.path.basename(current['path'])) if current else None,
+            'cpu_percent': monitor.cpu_percent if monitor else None,
+            'memory_percent': monitor.memory_percent if monitor else None,
+            'uptime_seconds': round(time.time() - self.started_at, 1)
+        }
+        
+        # Called from the heartbeat thread; nothing has played without a player
+        player = self._media_player
+        playback = player.get_playback_stats() if player else {'fps': 0.0, 'dropped_frames': 0}
+        status['fps'] = playback['fps']
+        status['dropped_frames'] = playback['dropped_frames']
+        if self.displays:
+            status['displays'] = [display.get_status() for display in self.displays]
+        if self.settings_manager.get('report_perf_stats', False):
+            perf = self.perf_report.due()
+            if perf:
+                status['perf'] = perf
+        return status
+    
     def on_activity_detected(self):
         """Called when user activity is detected"""
         self.last_activity_time = time.time()
@@ -401,8 +585,27 @@ class DemoModeApp:
         # Stop input monitoring
         self.input_controller.stop_monitoring()
         
+        # Stop status reporting and playlist sync
+        if self.playlist_sync:
+            self.playlist_sync.stop()
+        if self.heartbeat:
+            self.heartbeat.stop()
+        if self.app_monitor:
+            self.app_monitor.stop_monitoring()
+        self._ingest_pool.shutdown(wait=False)
+        self.thumbnails.shutdown()
+        
+        for display in self.displays:
+            display.cleanup()
+        
         # Clean up and exit
+        self.save_perf_stats(reschedule=False)
         self.root.destroy()
+        profile = stop_profiling()
+        if profile:
+            profile_dir = self.settings_manager.get('profile_dir', 'profiles')
+            profile.save(os.path.join(profile_dir, time.strftime('kiosk-%Y%m%d-%H%M%S.collapsed')))
+        shutdown_logging()
     
     def run(self):
         """Start the application"""
@@ -629,6 +832,10 @@ class SettingsDialog:
     
     def setup_general_tab(self, parent):
         """Setup general settings tab"""
+        from renderers import RENDER_BACKENDS
+        from transitions import TRANSITIONS
+        from video_decoders import VIDEO_DECODERS
+        
         frame = ttk.Frame(parent, padding="20")
         frame.pack(fill=tk.BOTH, expand=True)
         
@@ -642,6 +849,27 @@ class SettingsDialog:
         self.photo_duration_var = tk.StringVar()
         ttk.Spinbox(frame, from_=1, to=60, textvariable=self.photo_duration_var, 
                    width=10).pack(anchor=tk.W, pady=(0, 10))
+        
+        # Display backend
+        ttk.Label(frame, text="Display backend (takes effect after restart):").pack(anchor=tk.W)
+        self.render_backend_var = tk.StringVar()
+        ttk.Combobox(frame, values=RENDER_BACKENDS, textvariable=self.render_backend_var,
+                     state='readonly', width=10).pack(anchor=tk.W, pady=(0, 10))
+        
+        # Video decoder and audio
+        ttk.Label(frame, text="Video decoder (ffmpeg must be installed):").pack(anchor=tk.W)
+        self.video_decoder_var = tk.StringVar()
+        ttk.Combobox(frame, values=VIDEO_DECODERS, textvariable=self.video_decoder_var,
+                     state='readonly', width=10).pack(anchor=tk.W, pady=(0, 10))
+        self.video_audio_var = tk.BooleanVar()
+        ttk.Checkbutton(frame, text="Play video sound (requires ffmpeg)", 
+                       variable=self.video_audio_var).pack(anchor=tk.W, pady=(0, 10))
+        
+        # Transition between items
+        ttk.Label(frame, text="Transition between items:").pack(anchor=tk.W)
+        self.transition_var = tk.StringVar()
+        ttk.Combobox(frame, values=TRANSITIONS, textvariable=self.transition_var,
+                     state='readonly', width=10).pack(anchor=tk.W, pady=(0, 10))
     
     def setup_security_tab(self, parent):
         """Setup security settings tab"""
@@ -694,6 +922,10 @@ class SettingsDialog:
         """Load current settings into UI"""
         self.auto_start_var.set(self.settings_manager.get('auto_start_demo', False))
         self.photo_duration_var.set(str(self.settings_manager.get('photo_duration', 5)))
+        self.render_backend_var.set(self.settings_manager.get('render_backend', 'tk'))
+        self.video_decoder_var.set(self.settings_manager.get('video_decoder', 'opencv'))
+        self.video_audio_var.set(self.settings_manager.get('video_audio', True))
+        self.transition_var.set(self.settings_manager.get('transition', 'crossfade'))
         self.keyboard_lock_var.set(self.settings_manager.get('keyboard_lock_enabled', False))
         self.inactivity_timeout_var.set(str(self.settings_manager.get('inactivity_timeout', 30)))
         self.windows_startup_var.set(self.settings_manager.get('windows_startup', False))
@@ -721,6 +953,10 @@ class SettingsDialog:
         try:
             self.settings_manager.set('auto_start_demo', self.auto_start_var.get())
             self.settings_manager.set('photo_duration', int(self.photo_duration_var.get()))
+            self.settings_manager.set('render_backend', self.render_backend_var.get())
+            self.settings_manager.set('video_decoder', self.video_decoder_var.get())
+            self.settings_manager.set('video_audio', self.video_audio_var.get())
+            self.settings_manager.set('transition', self.transition_var.get())
             self.settings_manager.set('keyboard_lock_enabled', self.keyboard_lock_var.get())
             self.settings_manager.set('inactivity_timeout', int(self.inactivity_timeout_var.get()))
             self.settings_manager.set('windows_startup', self.windows_startup_var.get())
@@ -737,5 +973,7 @@ class SettingsDialog:
 
 
 if __name__ == "__main__":
+    # Needed by the thumbnail worker processes in the PyInstaller build
+    multiprocessing.freeze_support()
     app = DemoModeApp()
     app.run()
@@ -7,9 +7,19 @@ import os
 import sys
 import json
 import time
+import shutil
 import threading
 from datetime import datetime
 
+from content_model import ContentModel
+from event_log import get_logger, setup_logging
+from media_store import MediaStore
+import perf_stats
+from playlist_engine import PlaylistEngine
+from profiler import span
+
+log = get_logger('core')
+
 # Mock Windows-specific modules for demonstration
 class MockWinReg:
     HKEY_CURRENT_USER = "HKEY_CURRENT_USER"
@@ -42,20 +52,44 @@ class MockWinReg:
 class MockCtypes:
     windll = None
 
+# Seconds to wait before looking again when no item may play
+IDLE_RETRY_SECONDS = 5
+# Longest stop_demo() waits for the demo thread to finish
+STOP_TIMEOUT_SECONDS = 2
+
 class DemoModeCore:
     """Core demo mode functionality without GUI dependencies"""
     
-    def __init__(self):
-        self.settings = self.load_settings()
-        self.demo_content = []
+    def __init__(self, settings=None):
+        # Settings passed in are kept in memory only (e.g. virtual kiosks)
+        self.persist_settings = settings is None
+        self.settings = self.load_settings() if settings is None else settings
+        self.content = ContentModel()
         self.is_demo_active = False
         self.current_content_index = 0
+        self.current_item = None
+        self.playlist = None
+        self.demo_thread = None
+        self._stop_event = threading.Event()
+        self.started_at = time.time()
+        # The latency summary goes into get_status() only now and then
+        self.perf_report = perf_stats.SummaryReport()
+        self.media_store = MediaStore(self.settings.get('media_store_dir', 'media_store'))
         
+    @property
+    def demo_content(self):
+        """Immutable snapshot of the content list; safe to index from any thread"""
+        return self.content.snapshot()
+    
+    @demo_content.setter
+    def demo_content(self, items):
+        self.content.reset(items)
+    
     def load_settings(self):
         """Load settings from JSON file"""
         try:
             if os.path.exists("demo_settings.json"):
-                with open("demo_settings.json", 'r') as f:
+                with span('settings_load'), open("demo_settings.json", 'r') as f:
                     return json.load(f)
         except:
             pass
@@ -73,8 +107,10 @@ class DemoModeCore:
     
     def save_settings(self):
         """Save settings to JSON file"""
+        if not self.persist_settings:
+            return True
         try:
-            with open("demo_settings.json", 'w') as f:
+            with span('settings_save'), open("demo_settings.json", 'w') as f:
                 json.dump(self.settings, f, indent=2)
             return True
         except:
@@ -90,81 +126,151 @@ class DemoModeCore:
             'added_date': datetime.now().isoformat()
         }
         
-        self.demo_content.append(content_item)
-        self.settings['demo_content'] = self.demo_content
+        # Local media is stored by content hash so duplicates are kept once
+        if content_type in ('photo', 'video') and os.path.isfile(path):
+            content_item['sha256'] = self.media_store.ingest(path)
+        
+        self.content.append(content_item)
+        self.settings['demo_content'] = self.content.to_list()
         self.save_settings()
         
         print(f"✅ Added {content_type}: {content_item['name']}")
     
+    def add_files(self, content_type, paths, duration=None):
+        """Add many photo/video files at once, hashing them in parallel"""
+        hashes = self.media_store.ingest_many(paths)
+        for path in paths:
+            if path not in hashes:
+                continue
+            self.content.append({
+                'type': content_type,
+                'path': path,
+                'name': os.path.basename(path),
+                'duration': duration or self.settings.get(f'{content_type}_duration', 10),
+                'added_date': datetime.now().isoformat(),
+                'sha256': hashes[path]
+            })
+        
+        self.settings['demo_content'] = self.content.to_list()
+        self.save_settings()
+        print(f"✅ Added {len(hashes)} {content_type} file(s)")
+        return len(hashes)
+    
     def remove_content(self, index):
         """Remove content by index"""
-        if 0 <= index < len(self.demo_content):
-            removed = self.demo_content.pop(index)
-            self.settings['demo_content'] = self.demo_content
-            self.save_settings()
-            print(f"❌ Removed: {removed['name']}")
-            return True
-        return False
+        if index < 0:
+            return False
+        try:
+            # Checked by the model itself, in case another thread removed first
+            removed = self.content.remove(index)
+        except IndexError:
+            return False
+        self.settings['demo_content'] = self.content.to_list()
+        self.save_settings()
+        print(f"❌ Removed: {removed['name']}")
+        return True
     
     def start_demo(self):
-        """Start demo mode"""
+        """Start demo mode; does nothing if it is already running"""
         if not self.demo_content:
             print("⚠️  No demo content available. Add some content first.")
             return False
         
+        # A thread that outlived stop_demo's join is still stopping (its
+        # event is set) and exits on its own, so start a new one beside it
+        if self.demo_thread and self.demo_thread.is_alive() and not self._stop_event.is_set():
+            return True
+        
         self.is_demo_active = True
         self.current_content_index = 0
         
-        print("🚀 Demo mode started!")
-        print(f"📊 Content items: {len(self.demo_content)}")
+        log.info("🚀 Demo mode started with %d content items", len(self.demo_content))
         
-        # Start demo loop
-        self.demo_thread = threading.Thread(target=self._demo_loop, daemon=True)
+        # Start demo loop; each run gets its own stop event
+        self._stop_event = threading.Event()
+        self.demo_thread = threading.Thread(target=self._demo_loop, args=(self._stop_event,),
+                                            name="demo-loop", daemon=True)
         self.demo_thread.start()
         
         return True
     
     def stop_demo(self):
-        """Stop demo mode"""
+        """Stop demo mode and wait for the demo thread to finish"""
         self.is_demo_active = False
-        print("🛑 Demo mode stopped!")
+        self._stop_event.set()
+        thread = self.demo_thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=STOP_TIMEOUT_SECONDS)
+            if thread.is_alive():
+                log.warning("⚠️  Demo thread did not stop in time")
+            else:
+                self.demo_thread = None
+        log.info("🛑 Demo mode stopped!")
     
-    def _demo_loop(self):
-        """Main demo loop"""
-        while self.is_demo_active and self.demo_content:
-            content = self.demo_content[self.current_content_index]
+    def _demo_loop(self, stop_event):
+        """Main demo loop; waits are cut short as soon as stop_event is set"""
+        while not stop_event.is_set() and self.demo_content:
+            index, content = self.next_content(self.current_content_index)
+            if content is None:
+                # Nothing scheduled or everything capped right now
+                stop_event.wait(IDLE_RETRY_SECONDS)
+                continue
+            self.current_item = content
             
-            print(f"🎬 Playing: {content['name']} ({content['type']})")
-            print(f"⏱️  Duration: {content['duration']} seconds")
+            log.info("🎬 Playing: %s (%s) for %s seconds", content['name'], content['type'],
+                     content['duration'], extra={'item': content['name'], 'type': content['type']})
             
             # Simulate content playback
             self._simulate_content_playback(content)
             
-            # Move to next content
-            self.current_content_index = (self.current_content_index + 1) % len(self.demo_content)
+            # Move to next content, wrapping like the engine does
+            self.current_content_index = (index + 1) % max(len(self.demo_content), 1)
             
             # Wait for content duration
-            time.sleep(content['duration'])
+            if stop_event.wait(content['duration']):
+                break
+    
+    def next_content(self, start):
+        """(index, item) to play next by order, weight, schedule and caps, or
+        (None, None) if nothing may play now.
+
+        Both come from the same snapshot, so a concurrent edit can't make
+        the index point past the end or at another item.
+        """
+        snapshot = self.demo_content
+        playlist = self.playlist
+        if playlist is None or playlist.items is not snapshot:
+            # The content changed: rebuild, keeping frequency-cap history
+            playlist = PlaylistEngine(snapshot, playlist.history() if playlist else None)
+            self.playlist = playlist
+        index = playlist.next_index(start)
+        return (None, None) if index is None else (index, snapshot[index])
     
     def _simulate_content_playback(self, content):
         """Simulate content playback"""
         if content['type'] == 'photo':
-            print(f"📸 Displaying photo: {content['path']}")
+            log.debug("📸 Displaying photo: %s", self.media_store.resolve(content))
         elif content['type'] == 'video':
-            print(f"🎥 Playing video: {content['path']}")
+            log.debug("🎥 Playing video: %s", self.media_store.resolve(content))
         elif content['type'] == 'application':
-            print(f"🖥️  Launching application: {content['path']}")
+            log.debug("🖥️  Launching application: %s", content['path'])
         elif content['type'] == 'web':
-            print(f"🌐 Opening web content: {content['path']}")
+            log.debug("🌐 Opening web content: %s", content['path'])
     
     def get_status(self):
-        """Get current demo status"""
-        return {
+        """Get current demo status; 'perf' is included when a new latency summary is due"""
+        status = {
             'demo_active': self.is_demo_active,
             'content_count': len(self.demo_content),
             'current_content': self.current_content_index if self.demo_content else None,
-            'settings_loaded': bool(self.settings)
+            'current_item': self.current_item['name'] if self.current_item else None,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'settings_loaded': bool(self.settings),
         }
+        perf = self.perf_report.due()
+        if perf:
+            status['perf'] = perf
+        return status
     
     def list_content(self):
         """List all demo content"""
@@ -181,11 +287,29 @@ class DemoModeCore:
             print(f"   Duration: {content['duration']}s")
             print()
 
-    def export_content(self, export_path):
-        """Export demo content list to a JSON file"""
+    def export_content(self, export_path, include_media=False):
+        """Export demo content list to a JSON file.
+
+        Hashed media items are exported by hash and file name rather than by
+        absolute path, so the export works on other machines. With
+        include_media the media files are copied to a 'media' folder next to
+        the JSON file.
+        """
         try:
+            media_dir = os.path.join(os.path.dirname(os.path.abspath(export_path)), 'media')
+            exported = []
+            for content in self.demo_content:
+                item = dict(content)
+                if item.get('sha256'):
+                    item['path'] = os.path.basename(item['path'])
+                    stored = self.media_store.find(item['sha256'])
+                    if include_media and stored:
+                        os.makedirs(media_dir, exist_ok=True)
+                        shutil.copyfile(stored, os.path.join(media_dir, os.path.basename(stored)))
+                exported.append(item)
+
             with open(export_path, 'w') as f:
-                json.dump(self.demo_content, f, indent=2)
+                json.dump(exported, f, indent=2)
             print(f"💾 Content exported to {export_path}")
             return True
         except Exception as e:
@@ -196,15 +320,58 @@ class DemoModeCore:
         """Import demo content list from a JSON file"""
         try:
             with open(import_path, 'r') as f:
-                self.demo_content = json.load(f)
-            self.settings['demo_content'] = self.demo_content
-            self.save_settings()
+                content = json.load(f)
+            media_dir = os.path.join(os.path.dirname(os.path.abspath(import_path)), 'media')
+            for item in content:
+                if item.get('sha256'):
+                    self._import_media(item, media_dir)
+            self.apply_content(content)
             print(f"📥 Imported content from {import_path}")
             return True
         except Exception as e:
             print(f"❌ Failed to import content: {e}")
             return False
 
+    def _import_media(self, item, media_dir):
+        """Make sure a hashed item's media is in the local store"""
+        sha256 = item['sha256']
+        if sha256 in self.media_store:
+            return
+        candidates = [os.path.join(media_dir, sha256 + os.path.splitext(item['path'])[1].lower()),
+                      item['path']]
+        for candidate in candidates:
+            if os.path.isfile(candidate) and self.media_store.ingest(candidate) == sha256:
+                return
+        log.warning("⚠️  Media for %s not found locally", item.get('name', sha256))
+
+    def apply_content(self, content):
+        """Replace the content list in one step without interrupting playback.
+
+        The new list is fully built before it is swapped in, and the rotation
+        continues after the item that is currently playing if it is still
+        part of the new list.
+        """
+        new_content = list(content)
+        next_index = 0
+        if new_content and self.current_item is not None:
+            for i, item in enumerate(new_content):
+                if self._same_item(item, self.current_item):
+                    next_index = (i + 1) % len(new_content)
+                    break
+            else:
+                next_index = self.current_content_index % len(new_content)
+
+        self.current_content_index = next_index
+        self.demo_content = new_content
+        self.settings['demo_content'] = new_content
+        self.save_settings()
+
+    @staticmethod
+    def _same_item(a, b):
+        if a.get('id') and b.get('id'):
+            return a['id'] == b['id']
+        return a.get('path') == b.get('path')
+
 
 def demo_interactive_session():
     """Interactive demo session"""
@@ -212,6 +379,7 @@ def demo_interactive_session():
     print("=" * 50)
     
     demo = DemoModeCore()
+    setup_logging(demo.settings.get('log_level', 'INFO'), log_file=None)
     
     # Add some sample content
     print("\n📥 Adding sample demo content...")
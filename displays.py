@@ -0,0 +1,116 @@
+"""
+Displays - Additional screens with their own playlists
+
+The main window's MediaPlayer drives the primary screen. Every entry in the
+'displays' setting adds another screen with its own playlist, rotation
+thread, decode thread and renderer:
+
+    'displays': [
+        {
+            'name': 'Side screen',
+            'geometry': '1920x1080+1920+0',    # WxH+X+Y of the monitor
+            'content': [ ...content items... ],
+            'render_backend': 'tk',            # optional, see renderers.py
+            'video_audio': False               # only one screen should play sound
+        }
+    ]
+
+Any MediaPlayer setting can be overridden per display. Pipelines share the
+decoded-photo cache and the memory-mapped frame caches, so two screens
+showing the same asset decode it once. Each pipeline hands the renderer at
+most one frame at a time and drops its own frames when it falls behind, so a
+heavy video on one screen cannot queue up work that delays the other.
+"""
+
+import os
+import threading
+
+from event_log import get_logger
+from playlist_engine import PlaylistEngine
+
+PLAYABLE_TYPES = ('photo', 'video')
+# Seconds to wait before looking again when no item may play
+IDLE_RETRY_SECONDS = 5
+
+log = get_logger('displays')
+
+
+class DisplayPipeline:
+    """Plays one display's playlist on its own MediaPlayer"""
+    def __init__(self, app, config):
+        # Imported here so a kiosk without extra displays starts without them
+        from media_player import MediaPlayer
+        from renderers import parse_geometry
+        self.app = app
+        # Fail early on a bad geometry instead of when the window first opens
+        parse_geometry(config.get('geometry'))
+        self.name = config.get('name') or config.get('geometry') or 'display'
+        self.content = [c for c in config.get('content', []) if c.get('type') in PLAYABLE_TYPES]
+        # Secondary screens are silent unless configured otherwise
+        self.player = MediaPlayer(app, display=dict({'video_audio': False}, **config))
+        self.playlist = PlaylistEngine(self.content)
+        self.current_item = None
+        self.thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Start rotating through this display's content"""
+        if not self.content or (self.thread and self.thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name=f"display-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the rotation and playback"""
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+        self.player.stop_playback()
+
+    def cleanup(self):
+        self.stop()
+        self.player.cleanup()
+
+    def _run(self):
+        index = self.playlist.next_index(0)
+        while not self._stop_event.is_set():
+            if index is None:
+                # Nothing is scheduled (or everything is capped) right now
+                if self._stop_event.wait(IDLE_RETRY_SECONDS):
+                    break
+                index = self.playlist.next_index(0)
+                continue
+            content = self.content[index]
+            self.current_item = content
+            self.player.play_content(content)
+
+            # Open the next video now so it starts without a gap
+            index = self.playlist.next_index(index + 1)
+            if index is not None:
+                self.player.preload(self.content[index])
+
+            if self._stop_event.wait(content.get('duration', 10)):
+                break
+
+    def get_status(self):
+        """Status of this display for status reporting"""
+        current = self.current_item
+        status = {
+            'name': self.name,
+            'current_item': (current.get('name') or os.path.basename(current['path'])) if current else None
+        }
+        status.update(self.player.get_playback_stats())
+        return status
+
+
+def create_display_pipelines(app, configs):
+    """Pipelines for the 'displays' setting; invalid entries are skipped"""
+    pipelines = []
+    for config in configs or []:
+        try:
+            pipelines.append(DisplayPipeline(app, config))
+        except (TypeError, ValueError, AttributeError) as e:
+            log.warning("Ignoring display %r: %s", config, e)
+    return pipelines
@@ -0,0 +1,168 @@
+"""
+Event Log - Structured, non-blocking logging
+
+Subsystems log through standard loggers under "demo":
+
+    log = get_logger('player')
+    log.debug("Dropped late frame %d", index)
+    log.info("Playing %s", name, extra={'item': name, 'type': kind})
+
+setup_logging() attaches a single QueueHandler to the "demo" logger. The
+thread that logs only puts the record on a bounded queue; a listener thread
+formats it and writes it as one JSON object per line to a rotating file,
+and as a plain message to the console. A slow console (e.g. a redirected
+stdout on Windows) therefore never stalls playback, and a full queue drops
+records instead of blocking.
+
+Keep arguments lazy ("%s", value rather than f-strings): a call below the
+configured level then returns after the logger's cached level check, well
+under a microsecond (see benchmarks/bench_logging.py).
+
+Fields passed with extra= become keys of the JSON line. Until
+setup_logging() is called, records go to Python's default handling:
+warnings and errors to stderr, nothing else.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+LOGGER_NAME = 'demo'
+DEFAULT_LOG_FILE = os.path.join('logs', 'events.jsonl')
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_handler = None
+_listener = None
+# logging module flags setup_logging() changed, restored on shutdown
+_saved_flags = None
+
+
+def get_logger(name):
+    """Logger for a subsystem, e.g. get_logger('player') -> "demo.player" """
+    return logging.getLogger(f'{LOGGER_NAME}.{name}')
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a record as one line of JSON"""
+    def format(self, record):
+        event = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                event[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            event['exc'] = record.exc_text
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class EventQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the logging thread"""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge the arguments now, while they still hold their values, but
+        # leave formatting to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class EventQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop waits for room in a full queue"""
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def setup_logging(level='INFO', log_file=DEFAULT_LOG_FILE, max_bytes=DEFAULT_MAX_BYTES,
+                  backup_count=DEFAULT_BACKUP_COUNT, console=True):
+    """Route "demo" loggers through the queue to a JSON lines file and the console.
+
+    log_file=None skips the file. Calling it again replaces the previous setup.
+    """
+    global _handler, _listener, _saved_flags
+    shutdown_logging()
+
+    handlers = []
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+        handlers.append(console_handler)
+
+    # Skip the record fields the JSON lines don't use (see "Optimization" in
+    # the logging documentation); finding the caller's frame is the costliest.
+    # These are process-wide, so shutdown_logging() puts them back.
+    _saved_flags = (logging._srcfile, logging.logProcesses, logging.logMultiprocessing)
+    logging._srcfile = None
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    _handler = EventQueueHandler(queue.Queue(QUEUE_SIZE))
+    _listener = EventQueueListener(_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.addHandler(_handler)
+    # The app's own handlers only; don't duplicate into root handlers
+    logger.propagate = False
+    return _listener
+
+
+def shutdown_logging():
+    """Write out queued records and detach the queue handler"""
+    global _handler, _listener, _saved_flags
+    if _listener is None:
+        return
+    logging._srcfile, logging.logProcesses, logging.logMultiprocessing = _saved_flags
+    _saved_flags = None
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.removeHandler(_handler)
+    logger.propagate = True
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _handler = _listener = None
+
+
+def dropped_records():
+    """Records dropped because the queue was full"""
+    return _handler.dropped if _handler else 0
+
+
+atexit.register(shutdown_logging)
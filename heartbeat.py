@@ -0,0 +1,251 @@
+"""
+Heartbeat Reporter - Pushes kiosk status to the fleet status server
+"""
+
+import asyncio
+import email.utils
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+from event_log import get_logger
+
+log = get_logger('heartbeat')
+
+
+class ServerBusy(Exception):
+    """Server asked us to slow down (429/503)"""
+    def __init__(self, retry_after=None):
+        super().__init__(f"Server busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header, or None if absent or unparseable.
+
+    The header is either a number of seconds or an HTTP date (RFC 9110).
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class StatusSpool:
+    """Bounded on-disk queue of compressed status batches.
+
+    Each batch is one gzip file named by its creation time, so the oldest
+    batch is always first in sort order. When the spool is full the oldest
+    batches are dropped: fresh status is worth more than stale status.
+    """
+    def __init__(self, directory, max_batches=500):
+        self.directory = directory
+        self.max_batches = max_batches
+        os.makedirs(directory, exist_ok=True)
+
+    def _batch_files(self):
+        return sorted(f for f in os.listdir(self.directory) if f.endswith('.json.gz'))
+
+    def __len__(self):
+        return len(self._batch_files())
+
+    def push(self, payload):
+        """Store a compressed batch, evicting the oldest if over capacity"""
+        name = f"{time.time_ns():020d}.json.gz"
+        tmp_path = os.path.join(self.directory, name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+
+        files = self._batch_files()
+        for old in files[:max(0, len(files) - self.max_batches)]:
+            self._remove(os.path.join(self.directory, old))
+
+    def peek(self):
+        """Return (path, payload) of the oldest batch, or None"""
+        files = self._batch_files()
+        if not files:
+            return None
+        path = os.path.join(self.directory, files[0])
+        with open(path, 'rb') as f:
+            return path, f.read()
+
+    def remove(self, path):
+        self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def encode_batch(samples):
+    """Serialize a list of status samples to compact gzip'd JSON"""
+    body = json.dumps(samples, separators=(',', ':'), default=str).encode('utf-8')
+    return gzip.compress(body, compresslevel=6)
+
+
+class HeartbeatReporter:
+    """Periodically samples kiosk status and ships it to the server in batches.
+
+    status_provider is a callable returning a dict of status fields (see
+    DemoModeApp.get_status / DemoModeCore.get_status). Samples are collected
+    every `interval` seconds and sent every `batch_size` samples. Every batch
+    goes through the on-disk spool first, so nothing is lost while offline.
+    """
+    def __init__(self, server_url, client_name, status_provider, interval=30,
+                 batch_size=4, spool_dir="status_spool", max_spool_batches=500,
+                 timeout=10, max_backoff=600):
+        self.endpoint = server_url.rstrip('/') + '/api/status/batch'
+        self.client_name = client_name
+        self.status_provider = status_provider
+        self.interval = interval
+        self.batch_size = batch_size
+        self.spool = StatusSpool(spool_dir, max_spool_batches)
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+
+        self.pending = []
+        self.failures = 0
+        self.next_send_time = 0.0
+        self.sent_batches = 0
+
+        self._stop_event = None
+        self._loop = None
+        self._thread = None
+
+    def sample(self):
+        """Take one status sample"""
+        status = dict(self.status_provider())
+        status['client_name'] = self.client_name
+        status['timestamp'] = datetime.now(timezone.utc).isoformat()
+        return status
+
+    def _post(self, payload):
+        """Blocking HTTP POST of one compressed batch"""
+        request = urllib.request.Request(
+            self.endpoint,
+            data=payload,
+            method='POST',
+            headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            if e.code in (429, 503):
+                raise ServerBusy(parse_retry_after(e.headers.get('Retry-After')))
+            raise
+
+    def _backoff_delay(self, retry_after=None):
+        """Exponential backoff with full jitter, honoring Retry-After"""
+        delay = min(self.max_backoff, self.interval * (2 ** min(self.failures, 10)))
+        delay = random.uniform(delay / 2, delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    async def flush(self):
+        """Spool pending samples and try to drain the spool"""
+        loop = asyncio.get_running_loop()
+        if self.pending:
+            payload = encode_batch(self.pending)
+            self.pending = []
+            await loop.run_in_executor(None, self.spool.push, payload)
+
+        if time.monotonic() < self.next_send_time:
+            return
+
+        while True:
+            batch = await loop.run_in_executor(None, self.spool.peek)
+            if batch is None:
+                break
+            path, payload = batch
+            try:
+                await loop.run_in_executor(None, self._post, payload)
+            except urllib.error.HTTPError as e:
+                if 400 <= e.code < 500:
+                    # The server will never accept this batch; drop it
+                    log.warning("Status batch rejected (%s), dropping", e.code)
+                    self.spool.remove(path)
+                    continue
+                self._register_failure()
+                break
+            except ServerBusy as e:
+                self._register_failure(e.retry_after)
+                break
+            except (urllib.error.URLError, OSError):
+                self._register_failure()
+                break
+            self.spool.remove(path)
+            self.sent_batches += 1
+            self.failures = 0
+
+    def _register_failure(self, retry_after=None):
+        self.failures += 1
+        self.next_send_time = time.monotonic() + self._backoff_delay(retry_after)
+
+    async def run(self):
+        """Sampling loop; runs until stop() is called"""
+        if self._stop_event is None:
+            self._stop_event = asyncio.Event()
+        while not self._stop_event.is_set():
+            try:
+                self.pending.append(self.sample())
+                if len(self.pending) >= self.batch_size:
+                    await self.flush()
+            except Exception as e:
+                log.error("Error in heartbeat reporter: %s", e)
+
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+        # Keep what we have for the next start
+        if self.pending:
+            self.spool.push(encode_batch(self.pending))
+            self.pending = []
+
+    def start(self):
+        """Run the reporter on its own event loop thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._loop = asyncio.new_event_loop()
+        self._stop_event = asyncio.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(self._loop,), daemon=True)
+        self._thread.start()
+
+    def _run_loop(self, loop):
+        try:
+            loop.run_until_complete(self.run())
+        finally:
+            # Release the selector and the executor threads used for I/O
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    def stop(self, timeout=5):
+        """Stop the reporter thread"""
+        if self._loop and self._stop_event:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self._stop_event = None
+        self._loop = None
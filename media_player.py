@@ -2,31 +2,146 @@
 Media Player - Handles photo and video playback in fullscreen mode
 """
 
-import tkinter as tk
-from tkinter import ttk
-import pygame
 import cv2
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
 import os
-from PIL import Image, ImageTk
-import numpy as np
+import functools
+import hashlib
+from PIL import Image
+
+from event_log import get_logger
+from profiler import span
+from renderers import TkRenderer, create_renderer
+from transitions import Transition
+from video_decoders import (FrameCacheWriter, PlaybackClock, PreparedVideo, extract_audio, find_ffmpeg,
+                            fit_size, frame_cache_path, temp_audio_path)
+
+log = get_logger('player')
+
+
+# Reduce by an integer factor first while the image is more than this many
+# times larger than the target (see PIL's Image.resize)
+REDUCING_GAP = 3.0
+
+# Recently shown photos kept decoded and scaled (shared by all displays)
+PHOTO_CACHE_SIZE = 8
+
+
+# Pipeline stages shared by MediaPlayer and the headless benchmarks. Each
+# stage is a plain function so it can be timed without a display.
+
+def decode_photo(path, screen_size=None):
+    """Open and decode an image file.
+
+    With a screen size, JPEGs are decoded in draft mode: the decoder scales
+    by 1/2, 1/4 or 1/8 while decoding, to the smallest size that still
+    covers the screen, so a 6000x4000 photo for a 1080p screen is decoded at
+    1500x1000 instead of full resolution.
+    """
+    with span('photo_decode'):
+        image = Image.open(path)
+        if screen_size and image.format == 'JPEG':
+            image.draft('RGB', fit_size(image.size, screen_size))
+        image.load()
+    return image
+
+
+def scale_photo(image, screen_size):
+    """Resize a decoded image to fit the screen.
+
+    Large reductions first shrink by an integer factor with a fast box
+    filter (reducing_gap) and apply LANCZOS only for the final step.
+    """
+    with span('photo_scale'):
+        return image.resize(fit_size(image.size, screen_size), Image.Resampling.LANCZOS,
+                            reducing_gap=REDUCING_GAP)
+
+
+@functools.lru_cache(maxsize=PHOTO_CACHE_SIZE)
+def _prepared_photo(path, mtime_ns, screen_size, scale):
+    image = decode_photo(path, screen_size)
+    return scale_photo(image, screen_size) if scale else image
+
+
+def prepare_photo(path, screen_size, scale=True):
+    """Decoded photo fitted to the screen, from a small cache shared by all
+    players, so displays showing the same photo decode it once"""
+    return _prepared_photo(path, os.stat(path).st_mtime_ns, tuple(screen_size), scale)
+
+
+def scale_frame(frame, screen_size):
+    """Resize a decoded BGR video frame to fit the screen"""
+    frame_height, frame_width = frame.shape[:2]
+    with span('frame_scale'):
+        return cv2.resize(frame, fit_size((frame_width, frame_height), screen_size))
+
+
+def convert_frame(frame):
+    """Convert a BGR video frame to RGB for display"""
+    with span('frame_convert'):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
 
 class MediaPlayer:
-    def __init__(self, app):
+    def __init__(self, app, display=None):
         self.app = app
+        # Per-display overrides of the app settings (see displays.py)
+        self.display = display or {}
         self.current_content = None
-        self.fullscreen_window = None
+        self.renderer = None
         self.is_playing = False
         self.video_thread = None
         
-        # Initialize pygame for audio/video
-        pygame.mixer.init()
+        # Display backend: 'tk' (default), 'pygame' or 'null'
+        self.render_backend = self._setting('render_backend', 'tk')
+        
+        # The pygame mixer is started by the first video with sound, so
+        # photos and silent videos don't wait for pygame; None until then
+        self.audio_available = None
+        
+        # Video decoding: 'opencv' (default) or 'ffmpeg'
+        self.video_decoder_backend = self._setting('video_decoder', 'opencv')
+        self.play_audio = self._setting('video_audio', True)
         
         # Video playback variables
-        self.video_cap = None
+        self.video_decoder = None
         self.video_fps = 30
         self.frame_delay = 1.0 / self.video_fps
+        
+        # Playback statistics reported in heartbeats
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.playback_fps = 0.0
+        self._fps_window_start = time.time()
+        self._fps_window_frames = 0
+        self._frame_pending = False
+        self.av_drift = 0.0
+        self.max_av_drift = 0.0
+        
+        # Transition between items: 'crossfade' (default), 'slide' or 'cut'
+        self.transition = Transition(self._setting('transition', 'crossfade'),
+                                     self._setting('transition_duration', 0.5))
+        self.last_frame = None
+        self._transition_lock = threading.Lock()
+        
+        # Memory-mapped frame caches for short looping clips
+        self.frame_cache_dir = self._setting('frame_cache_dir', 'frame_cache')
+        self.frame_cache_max_bytes = self._setting('frame_cache_max_mb', 2048) * 1024 * 1024
+        self.frame_cache_total_bytes = self._setting('frame_cache_total_mb', 8192) * 1024 * 1024
+        
+        # Videos opened ahead of time (next item and next loop iteration)
+        self._preloader = ThreadPoolExecutor(max_workers=1)
+        self._preload_lock = threading.Lock()
+        self._preloaded = None
+    
+    def _setting(self, key, default):
+        """Display override, else app setting, else default"""
+        if key in self.display:
+            return self.display[key]
+        settings_manager = getattr(self.app, 'settings_manager', None)
+        return settings_manager.get(key, default) if settings_manager else default
     
     def play_content(self, content):
         """Play media content (photo or video)"""
@@ -37,165 +152,340 @@ class MediaPlayer:
         elif content['type'] == 'video':
             self.play_video(content)
     
+    def _resolve_path(self, content):
+        """Local file for a content item, preferring the media store copy"""
+        media_store = getattr(self.app, 'media_store', None)
+        if media_store:
+            return media_store.resolve(content)
+        return content['path']
+    
     def play_photo(self, content):
         """Display a photo in fullscreen"""
+        with span('play_photo'):
+            self._play_photo(content)
+    
+    def _play_photo(self, content):
         try:
             # Load and display image
-            image_path = content['path']
+            image_path = self._resolve_path(content)
             if not os.path.exists(image_path):
-                print(f"Image file not found: {image_path}")
+                log.error("Image file not found: %s", image_path)
                 return
             
-            # Create fullscreen window if not exists
-            if not self.fullscreen_window:
-                self.create_fullscreen_window()
-            
-            # Load and resize image to fit screen
-            pil_image = Image.open(image_path)
-            screen_width = self.fullscreen_window.winfo_screenwidth()
-            screen_height = self.fullscreen_window.winfo_screenheight()
-            
-            # Calculate scaling to fit screen while maintaining aspect ratio
-            img_width, img_height = pil_image.size
-            scale_x = screen_width / img_width
-            scale_y = screen_height / img_height
-            scale = min(scale_x, scale_y)
-            
-            new_width = int(img_width * scale)
-            new_height = int(img_height * scale)
+            renderer = self.get_renderer()
             
-            pil_image = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            # Stop a video that is still playing
+            self.video_decoder = None
             
-            # Convert to tkinter format
-            tk_image = ImageTk.PhotoImage(pil_image)
-            
-            # Display image
-            if hasattr(self, 'image_label'):
-                self.image_label.destroy()
-            
-            self.image_label = tk.Label(self.fullscreen_window, image=tk_image, bg='black')
-            self.image_label.image = tk_image  # Keep a reference
-            self.image_label.pack(expand=True)
+            # Load and resize image to fit screen
+            pil_image = prepare_photo(image_path, renderer.screen_size(),
+                                      scale=not renderer.hardware_scaling)
             
             self.is_playing = True
-            self.fullscreen_window.deiconify()
-            self.fullscreen_window.lift()
-            self.fullscreen_window.focus_force()
+            if self.transition.kind == 'cut' or self.last_frame is None:
+                renderer.call_soon(self._present_frame, pil_image)
+            else:
+                still_current = lambda: self.current_content is content
+                threading.Thread(target=self._transition_to, args=(pil_image, still_current),
+                                 daemon=True).start()
+            renderer.reveal()
             
         except Exception as e:
-            print(f"Error playing photo: {e}")
+            log.exception("Error playing photo: %s", e)
     
     def play_video(self, content):
         """Play a video in fullscreen"""
         try:
-            video_path = content['path']
+            video_path = self._resolve_path(content)
             if not os.path.exists(video_path):
-                print(f"Video file not found: {video_path}")
+                log.error("Video file not found: %s", video_path)
                 return
             
-            # Create fullscreen window if not exists
-            if not self.fullscreen_window:
-                self.create_fullscreen_window()
+            renderer = self.get_renderer()
             
-            # Open video with OpenCV
-            self.video_cap = cv2.VideoCapture(video_path)
-            if not self.video_cap.isOpened():
-                print(f"Could not open video: {video_path}")
+            # Use the decoder opened by preload() if it is for this video,
+            # otherwise open one now
+            try:
+                prepared = self._take_preloaded(video_path)
+                if prepared is None:
+                    prepared = self._prepare_video(content, video_path)
+            except (IOError, OSError) as e:
+                log.error("Could not open video: %s", e)
                 return
             
             # Get video properties
-            self.video_fps = self.video_cap.get(cv2.CAP_PROP_FPS) or 30
+            self.video_decoder = prepared
+            self.video_fps = prepared.fps
             self.frame_delay = 1.0 / self.video_fps
-            
-            # Create video label
-            if hasattr(self, 'video_label'):
-                self.video_label.destroy()
-            
-            self.video_label = tk.Label(self.fullscreen_window, bg='black')
-            self.video_label.pack(expand=True, fill=tk.BOTH)
+            self.av_drift = 0.0
+            self.max_av_drift = 0.0
             
             self.is_playing = True
-            self.fullscreen_window.deiconify()
-            self.fullscreen_window.lift()
-            self.fullscreen_window.focus_force()
+            renderer.reveal()
             
             # Start video playback thread
-            self.video_thread = threading.Thread(target=self._video_playback_loop, daemon=True)
+            self.video_thread = threading.Thread(target=self._video_playback_loop,
+                                                 args=(content, video_path, prepared), daemon=True)
             self.video_thread.start()
             
         except Exception as e:
-            print(f"Error playing video: {e}")
+            log.exception("Error playing video: %s", e)
+    
+    def _target_size(self):
+        """Decode size: the screen, or native size if the renderer scales on the GPU"""
+        renderer = self.renderer
+        return None if renderer.hardware_scaling else renderer.screen_size()
     
-    def _video_playback_loop(self):
+    def _prepare_video(self, content, video_path):
+        """Open a video and decode its first frame and audio ahead of playback"""
+        prepared = PreparedVideo(self.video_decoder_backend, video_path, self._target_size(),
+                                 self._frame_cache_file(content, video_path))
+        prepared.audio_file = self._audio_file(content, video_path)
+        return prepared
+    
+    def _frame_cache_file(self, content, video_path):
+        """Where the decoded frames of this clip are cached, or None if disabled"""
+        if self.frame_cache_max_bytes <= 0:
+            return None
+        key = content.get('sha256')
+        if not key:
+            stat = os.stat(video_path)
+            identity = f"{os.path.abspath(video_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+            key = hashlib.sha256(identity.encode('utf-8')).hexdigest()
+        return frame_cache_path(self.frame_cache_dir, key, self._target_size())
+    
+    def _frame_recorder(self, content, video_path, decoder):
+        """Recorder that caches this pass's frames if the clip is short enough"""
+        if decoder.cached or not decoder.frame_count:
+            return None
+        cache_file = self._frame_cache_file(content, video_path)
+        if not cache_file:
+            return None
+        return FrameCacheWriter(cache_file, decoder.frame_count, decoder.fps,
+                                self.frame_cache_max_bytes, self.frame_cache_dir,
+                                self.frame_cache_total_bytes)
+    
+    def preload(self, content):
+        """Prepare the next video in the background so it starts without a gap"""
+        # Decode size depends on the renderer, which play_content creates
+        if content.get('type') != 'video' or not self.renderer:
+            return
+        video_path = self._resolve_path(content)
+        if not os.path.exists(video_path):
+            return
+        with self._preload_lock:
+            if self._preloaded and self._preloaded[0] == video_path:
+                return
+            self._discard(self._preloaded)
+            self._preloaded = (video_path, self._preloader.submit(self._prepare_video, content, video_path))
+    
+    def _take_preloaded(self, video_path):
+        """The preloaded video for a path, or None"""
+        with self._preload_lock:
+            preloaded, self._preloaded = self._preloaded, None
+        if preloaded and preloaded[0] == video_path:
+            try:
+                return preloaded[1].result()
+            except (IOError, OSError) as e:
+                log.warning("Preloading %s failed: %s", video_path, e)
+                return None
+        self._discard(preloaded)
+        return None
+    
+    def _discard(self, preloaded):
+        """Close a preloaded video that won't be played"""
+        if preloaded:
+            preloaded[1].add_done_callback(
+                lambda future: future.exception() is None and future.result().close())
+    
+    def _init_audio(self):
+        """Start the pygame mixer on first use; whether audio can play"""
+        if self.audio_available is None:
+            import pygame
+            try:
+                pygame.mixer.init()
+                self.audio_available = True
+            except pygame.error as e:
+                # No audio device (e.g. headless test machines); video still plays
+                log.warning("Audio unavailable: %s", e)
+                self.audio_available = False
+        return self.audio_available
+    
+    def _audio_file(self, content, video_path):
+        """WAV of the video's audio track, extracted once and cached"""
+        if not (self.play_audio and find_ffmpeg() and self._init_audio()):
+            return None
+        media_store = getattr(self.app, 'media_store', None)
+        if media_store and content.get('sha256'):
+            dest = media_store.transform_path(content['sha256'], 'audio.wav')
+        else:
+            dest = temp_audio_path(video_path)
+        return extract_audio(video_path, dest)
+    
+    def _video_playback_loop(self, content, video_path, decoder):
         """Video playback loop running in separate thread"""
-        screen_width = self.fullscreen_window.winfo_screenwidth()
-        screen_height = self.fullscreen_window.winfo_screenheight()
+        renderer = self.renderer
+        frame_index = 0
         
-        while self.is_playing and self.video_cap and self.video_cap.isOpened():
-            ret, frame = self.video_cap.read()
-            
-            if not ret:
-                # Loop video
-                self.video_cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                continue
-            
+        # Short clips are recorded into a memory-mapped frame cache during
+        # their first complete pass and played from it afterwards
+        recorder = self._frame_recorder(content, video_path, decoder)
+        
+        # Blend from the previous item into the first frame
+        if self.transition.kind != 'cut' and self.last_frame is not None:
+            first_frame = decoder.read()
+            if first_frame is not None:
+                if recorder:
+                    recorder.add(first_frame)
+                self._transition_to(first_frame, lambda: self.video_decoder is decoder)
+                frame_index = 1
+        
+        clock = PlaybackClock(decoder.audio_file)
+        clock.start()
+        
+        # Open the next loop iteration while this one plays, so looping
+        # doesn't stall on a seek back to the start
+        next_loop = self._preloader.submit(self._prepare_video, content, video_path)
+        
+        while self.is_playing and self.video_decoder is decoder:
             try:
-                # Resize frame to fit screen
-                frame_height, frame_width = frame.shape[:2]
-                scale_x = screen_width / frame_width
-                scale_y = screen_height / frame_height
-                scale = min(scale_x, scale_y)
+                # Pace frames by the media clock rather than sleeping a fixed
+                # delay, so decode time doesn't accumulate into A/V drift.
+                # Frames that are already a frame late are skipped without
+                # being decoded to pixels.
+                pts = frame_index * self.frame_delay
+                late = clock.time() - pts > self.frame_delay
+                frame = None if late else decoder.read()
+                if (decoder.skip() if late else frame is not None):
+                    frame_index += 1
+                else:
+                    # Loop video (and its audio) by switching to the
+                    # pre-opened decoder, or to the frame cache if this pass
+                    # was just recorded
+                    finished = decoder
+                    if recorder and recorder.finish():
+                        self._discard((video_path, next_loop))
+                        next_loop = self._preloader.submit(self._prepare_video, content, video_path)
+                    recorder = None
+                    decoder = next_loop.result()
+                    next_loop = None
+                    if self.video_decoder is not finished:
+                        # Stopped at the loop boundary; the new decoder is
+                        # closed below
+                        finished.close()
+                        break
+                    self.video_decoder = decoder
+                    self._preloader.submit(finished.close)
+                    next_loop = self._preloader.submit(self._prepare_video, content, video_path)
+                    clock.restart()
+                    frame_index = 0
+                    continue
+                if late:
+                    # A skipped frame leaves a hole in the recording
+                    if recorder:
+                        recorder.abort()
+                        recorder = None
+                    self.frames_dropped += 1
+                    log.debug("Dropped late frame %d of %s", frame_index, video_path)
+                    continue
+                if recorder:
+                    recorder.add(frame)
                 
-                new_width = int(frame_width * scale)
-                new_height = int(frame_height * scale)
+                wait = pts - clock.time()
+                if wait > 0:
+                    time.sleep(wait)
                 
-                frame = cv2.resize(frame, (new_width, new_height))
-                
-                # Convert BGR to RGB
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Convert to PIL Image and then to tkinter
-                pil_image = Image.fromarray(frame)
-                tk_image = ImageTk.PhotoImage(pil_image)
-                
-                # Update video label on main thread
-                if self.video_label and self.is_playing:
-                    self.fullscreen_window.after(0, self._update_video_frame, tk_image)
-                
-                time.sleep(self.frame_delay)
+                # Present on the renderer thread. If the previous frame
+                # hasn't been shown yet the renderer is behind, so drop this
+                # one instead of queueing it.
+                if self.is_playing and self._post_frame(frame):
+                    self.av_drift = clock.time() - pts
+                    self.max_av_drift = max(self.max_av_drift, abs(self.av_drift))
                 
             except Exception as e:
-                print(f"Error in video playback: {e}")
+                log.exception("Error in video playback: %s", e)
                 break
         
         # Clean up
-        if self.video_cap:
-            self.video_cap.release()
-            self.video_cap = None
+        if recorder:
+            recorder.abort()
+        clock.stop()
+        decoder.close()
+        if next_loop:
+            self._discard((video_path, next_loop))
+        if self.video_decoder is decoder:
+            self.video_decoder = None
+    
+    def _post_frame(self, frame):
+        """Queue a frame for the renderer thread. Returns False if dropped.
+
+        If the previous frame hasn't been shown yet the renderer is behind,
+        so this one is dropped instead of queued.
+        """
+        if self._frame_pending:
+            self.frames_dropped += 1
+            return False
+        self._frame_pending = True
+        self.renderer.call_soon(self._present_frame, frame)
+        return True
     
-    def _update_video_frame(self, tk_image):
-        """Update video frame on main thread"""
-        if self.video_label and self.is_playing:
-            self.video_label.configure(image=tk_image)
-            self.video_label.image = tk_image  # Keep reference
+    def _present_frame(self, frame):
+        """Show a frame on the renderer thread"""
+        self._frame_pending = False
+        if self.is_playing:
+            with span('blit'):
+                self.renderer.show(frame)
+            self.last_frame = frame
+            self._count_frame()
     
-    def create_fullscreen_window(self):
-        """Create fullscreen window for media display"""
-        self.fullscreen_window = tk.Toplevel()
-        self.fullscreen_window.title("Demo Content")
-        self.fullscreen_window.configure(bg='black')
-        
-        # Make fullscreen
-        self.fullscreen_window.attributes('-fullscreen', True)
-        self.fullscreen_window.attributes('-topmost', True)
-        self.fullscreen_window.overrideredirect(True)
-        
-        # Hide initially
-        self.fullscreen_window.withdraw()
-        
-        # Bind escape key (in case keyboard isn't locked)
-        self.fullscreen_window.bind('<KeyPress>', self._on_key_press)
-        self.fullscreen_window.focus_set()
+    def _transition_to(self, frame, should_continue):
+        """Blend from the last shown frame to frame, then show frame"""
+        # One transition at a time; a superseded one stops at its next frame
+        with self._transition_lock:
+            if not should_continue():
+                return
+            try:
+                self.transition.run(self.last_frame, frame, self._post_frame, should_continue)
+            except Exception as e:
+                log.warning("Transition failed: %s", e)
+            self.renderer.call_soon(self._present_frame, frame)
+    
+    def _count_frame(self):
+        """Update frame counters and the rolling FPS estimate"""
+        self.frames_shown += 1
+        self._fps_window_frames += 1
+        now = time.time()
+        elapsed = now - self._fps_window_start
+        if elapsed >= 1.0:
+            self.playback_fps = self._fps_window_frames / elapsed
+            self._fps_window_start = now
+            self._fps_window_frames = 0
+    
+    def get_playback_stats(self):
+        """Get playback statistics for status reporting"""
+        playing_video = self.is_playing and self.video_decoder is not None
+        return {
+            'fps': round(self.playback_fps, 1) if playing_video else 0.0,
+            'frames_shown': self.frames_shown,
+            'dropped_frames': self.frames_dropped,
+            'av_drift_ms': round(self.av_drift * 1000, 1) if playing_video else 0.0
+        }
+    
+    def get_renderer(self):
+        """Display backend, created on first use"""
+        if not self.renderer:
+            geometry = self.display.get('geometry')
+            renderer = create_renderer(self.render_backend, self._on_key_press, geometry)
+            try:
+                renderer.open()
+            except Exception as e:
+                if self.render_backend == 'tk':
+                    raise
+                log.warning("Could not open %s renderer (%s), using tk", self.render_backend, e)
+                renderer = create_renderer('tk', self._on_key_press, geometry)
+                renderer.open()
+            self.renderer = renderer
+        return self.renderer
     
     def _on_key_press(self, event):
         """Handle key press in fullscreen window"""
@@ -206,95 +496,75 @@ class MediaPlayer:
     
     def show_fullscreen(self):
         """Show fullscreen window"""
-        if self.fullscreen_window:
-            self.fullscreen_window.deiconify()
-            self.fullscreen_window.lift()
-            self.fullscreen_window.focus_force()
+        if self.renderer:
+            self.renderer.reveal()
     
     def hide_fullscreen(self):
         """Hide fullscreen window"""
-        if self.fullscreen_window:
-            self.fullscreen_window.withdraw()
+        if self.renderer:
+            self.renderer.hide()
     
     def stop_playback(self):
         """Stop current media playback"""
         self.is_playing = False
         
-        # Stop video
-        if self.video_cap:
-            self.video_cap.release()
-            self.video_cap = None
+        # Stop video; the playback thread closes its decoder
+        self.video_decoder = None
+        self.last_frame = None
         
         # Hide fullscreen window
-        if self.fullscreen_window:
-            self.fullscreen_window.withdraw()
+        if self.renderer:
+            self.renderer.hide()
     
     def cleanup(self):
         """Cleanup resources"""
         self.stop_playback()
         
-        if self.fullscreen_window:
-            self.fullscreen_window.destroy()
-            self.fullscreen_window = None
+        self._discard(self._preloaded)
+        self._preloaded = None
+        self._preloader.shutdown(wait=False)
+        
+        if self.renderer:
+            self.renderer.close()
+            self.renderer = None
         
-        pygame.mixer.quit()
+        if self.audio_available:
+            import pygame
+            pygame.mixer.quit()
 
 
 class SimpleImageViewer:
     """Simple image viewer for systems without full multimedia support"""
     def __init__(self, app):
         self.app = app
-        self.fullscreen_window = None
+        self.renderer = None
         self.current_image = None
     
     def show_image(self, image_path, duration=5):
         """Show image for specified duration"""
         try:
-            if not self.fullscreen_window:
+            if not self.renderer:
                 self.create_fullscreen_window()
             
-            # Load and display image
-            pil_image = Image.open(image_path)
-            
-            # Get screen dimensions
-            screen_width = self.fullscreen_window.winfo_screenwidth()
-            screen_height = self.fullscreen_window.winfo_screenheight()
-            
-            # Resize image to fit screen
-            img_width, img_height = pil_image.size
-            scale_x = screen_width / img_width
-            scale_y = screen_height / img_height
-            scale = min(scale_x, scale_y)
-            
-            new_width = int(img_width * scale)
-            new_height = int(img_height * scale)
-            
-            pil_image = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            tk_image = ImageTk.PhotoImage(pil_image)
-            
-            # Display image
-            if hasattr(self, 'image_label'):
-                self.image_label.destroy()
-            
-            self.image_label = tk.Label(self.fullscreen_window, image=tk_image, bg='black')
-            self.image_label.image = tk_image
-            self.image_label.pack(expand=True)
+            # Load and resize image to fit screen
+            screen_size = self.renderer.screen_size()
+            pil_image = scale_photo(decode_photo(image_path, screen_size), screen_size)
             
-            self.fullscreen_window.deiconify()
-            self.fullscreen_window.lift()
+            # Display image in the persistent window
+            self.renderer.show(pil_image)
+            self.current_image = image_path
+            self.renderer.window.deiconify()
+            self.renderer.window.lift()
             
         except Exception as e:
-            print(f"Error displaying image: {e}")
+            log.exception("Error displaying image: %s", e)
     
     def create_fullscreen_window(self):
         """Create simple fullscreen window"""
-        self.fullscreen_window = tk.Toplevel()
-        self.fullscreen_window.title("Demo Image")
-        self.fullscreen_window.configure(bg='black')
-        self.fullscreen_window.attributes('-fullscreen', True)
-        self.fullscreen_window.withdraw()
+        self.renderer = TkRenderer(title="Demo Image")
+        self.renderer.open()
     
     def hide(self):
         """Hide the image viewer"""
-        if self.fullscreen_window:
-            self.fullscreen_window.withdraw()
+        if self.renderer:
+            self.renderer.hide()
@@ -0,0 +1,155 @@
+"""
+Media Store - Local content-addressed storage for demo media
+
+Files are stored once under their SHA-256, no matter how many playlist
+entries or folders refer to them. Derived data (thumbnails, decoded frame
+caches, ...) is stored per hash as well, so identical files share it.
+
+Layout:
+    <root>/objects/ab/abcdef...<ext>     original bytes
+    <root>/transforms/ab/abcdef.../      cached derived files
+"""
+
+import hashlib
+import mmap
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from event_log import get_logger
+
+READ_BUFFER_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+log = get_logger('media')
+
+
+def hash_file(path):
+    """SHA-256 of a file.
+
+    Large files are hashed straight from a memory map so the digest runs over
+    the page cache without copying into Python buffers; smaller ones use
+    large buffered reads. hashlib releases the GIL while hashing, so this
+    scales across threads.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            buffer = bytearray(READ_BUFFER_SIZE)
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                digest.update(view[:n])
+    return digest.hexdigest()
+
+
+class MediaStore:
+    """Content-addressed store for photos and videos"""
+    def __init__(self, root="media_store"):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.transforms_dir = os.path.join(root, 'transforms')
+
+    def _shard(self, base, sha256):
+        return os.path.join(base, sha256[:2])
+
+    def find(self, sha256):
+        """Path of a stored object, or None"""
+        shard = self._shard(self.objects_dir, sha256)
+        try:
+            names = os.listdir(shard)
+        except FileNotFoundError:
+            return None
+        for name in names:
+            if name.startswith(sha256) and not name.endswith('.part'):
+                return os.path.join(shard, name)
+        return None
+
+    def __contains__(self, sha256):
+        return self.find(sha256) is not None
+
+    def object_path(self, sha256, ext=''):
+        """Where an object with this hash is (or would be) stored.
+
+        The original extension is kept because some decoders pick their
+        demuxer from it.
+        """
+        return self.find(sha256) or os.path.join(
+            self._shard(self.objects_dir, sha256), sha256 + ext.lower())
+
+    def transform_path(self, sha256, name, create=True):
+        """Path for a derived file of an object, shared by all its copies.
+
+        Its directory is created unless create is False, for lookups.
+        """
+        directory = os.path.join(self._shard(self.transforms_dir, sha256), sha256)
+        if create:
+            os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, name)
+
+    def ingest(self, path, sha256=None):
+        """Add a file to the store and return its hash.
+
+        Files already in the store (by content) are not stored again. New
+        ones are hard-linked into the store where the filesystem allows it,
+        so multi-GB videos take neither the time nor the space of a copy,
+        and copied otherwise (e.g. from another drive).
+        """
+        sha256 = sha256 or hash_file(path)
+        if self.find(sha256):
+            return sha256
+
+        dest = self.object_path(sha256, os.path.splitext(path)[1])
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp_path = f"{dest}.{uuid.uuid4().hex}.part"
+        try:
+            try:
+                os.link(path, tmp_path)
+            except OSError:
+                shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, dest)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return sha256
+
+    def ingest_many(self, paths, workers=None):
+        """Hash (in parallel) and ingest many files. Returns {path: sha256}.
+
+        Files that can't be read or stored (e.g. disk full) are logged and
+        left out of the result; the others are still ingested.
+        """
+        workers = workers or os.cpu_count() or 1
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {path: pool.submit(hash_file, path) for path in paths}
+            for path, future in futures.items():
+                try:
+                    results[path] = future.result()
+                except OSError as e:
+                    log.warning("Could not hash %s: %s", path, e)
+
+        # Stores are serialized so duplicates within the batch are stored once
+        for path, sha256 in list(results.items()):
+            try:
+                self.ingest(path, sha256)
+            except OSError as e:
+                log.warning("Could not store %s: %s", path, e)
+                del results[path]
+        return results
+
+    def resolve(self, content):
+        """Local path to play for a content item"""
+        sha256 = content.get('sha256')
+        if sha256:
+            stored = self.find(sha256)
+            if stored:
+                return stored
+        return content['path']
@@ -0,0 +1,302 @@
+"""
+Metrics - Lightweight Prometheus-style metrics for the status server
+"""
+
+import bisect
+import threading
+import time
+
+from pymongo import monitoring
+
+# Latency buckets in seconds, tuned for API calls that are mostly sub-10ms
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    """Format a sample value the way Prometheus expects"""
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names, values, extra=None):
+    """Render a label set as {name="value",...}"""
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join(
+        '%s="%s"' % (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return '{' + body + '}'
+
+
+class _Metric:
+    """Base class for a metric family with optional labels"""
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+
+    def labels(self, *values):
+        """Get the child metric for a set of label values"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        """Render the family in Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child):
+        labels = _format_labels(self.labelnames, values)
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def dec(self, amount=1):
+        self._default.dec(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+    def get(self):
+        return self._default.value
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds"""
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, ('le', _format_value(float(bound))))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together on /metrics"""
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Render all metrics in Prometheus text format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class ServerMetrics:
+    """The metric families exported by the status server"""
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+
+        self.requests_total = r.counter(
+            'http_requests_total', 'Total HTTP requests handled',
+            ('method', 'route', 'status'))
+        self.request_duration = r.histogram(
+            'http_request_duration_seconds', 'HTTP request latency by route',
+            ('method', 'route'))
+        self.requests_in_progress = r.gauge(
+            'http_requests_in_progress', 'HTTP requests currently being served')
+        self.request_errors = r.counter(
+            'http_request_errors_total', 'HTTP requests that raised or returned 5xx',
+            ('method', 'route'))
+
+        self.mongo_duration = r.histogram(
+            'mongodb_command_duration_seconds', 'MongoDB command latency by command',
+            ('command',))
+        self.mongo_in_progress = r.gauge(
+            'mongodb_commands_in_progress', 'MongoDB commands currently in flight')
+        self.mongo_errors = r.counter(
+            'mongodb_command_errors_total', 'MongoDB commands that failed',
+            ('command',))
+
+        self.cold_start = r.gauge(
+            'server_cold_start_seconds', 'Seconds from server module import to worker ready')
+
+    def render(self):
+        return self.registry.render()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency, in-flight and errors.
+
+    Written against the raw ASGI interface rather than BaseHTTPMiddleware so
+    that the per-request overhead stays in the low microseconds.
+    """
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        metrics.requests_in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.requests_in_progress.dec()
+
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get('route')
+            route_path = getattr(route, 'path', None) or '<unmatched>'
+            method = scope['method']
+
+            metrics.request_duration.labels(method, route_path).observe(elapsed)
+            metrics.requests_total.labels(method, route_path, str(status_code)).inc()
+            if status_code >= 500:
+                metrics.request_errors.labels(method, route_path).inc()
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener feeding MongoDB timings into ServerMetrics"""
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        self.metrics.mongo_in_progress.inc()
+
+    def succeeded(self, event):
+        self.metrics.mongo_in_progress.dec()
+        self.metrics.mongo_duration.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.metrics.mongo_in_progress.dec()
+        self.metrics.mongo_duration.labels(event.command_name).observe(event.duration_micros / 1e6)
+        self.metrics.mongo_errors.labels(event.command_name).inc()
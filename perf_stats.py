@@ -0,0 +1,224 @@
+"""
+Perf Stats - Always-on latency histograms for hot operations
+
+Every instrumented operation (photo decode, per-frame video stages, app
+launch, settings load/save, ...) records its duration into a histogram
+named after it:
+
+    with timer('photo_decode'):
+        image.load()
+
+    stats.summary()   # {'photo_decode': {'count': 12, 'p50_ms': 8.1, ...}, ...}
+
+The histograms are HDR-style: values are kept in microseconds in
+log-linear buckets, 16 per power of two, so any recorded value is known to
+within about 3% at any magnitude, from microseconds to an hour. Recording
+is a bucket computation and a few integer updates, about a microsecond,
+and memory stays at a few hundred buckets per operation however many
+values are recorded. Histograms with the same layout can be merged, e.g.
+across kiosks.
+
+The summaries appear in DemoModeCore.get_status()['perf'], in
+`cli.py stats` (from the file the app saves them to) and, with the
+report_perf_stats setting, in the heartbeats sent to the status server.
+Status payloads get them through a SummaryReport, every few minutes rather
+than with every heartbeat.
+"""
+
+import json
+import os
+import threading
+import time
+
+# Sub-buckets per power of two are 2 ** (SIGNIFICANT_BITS - 1)
+SIGNIFICANT_BITS = 5
+_HALF = 1 << (SIGNIFICANT_BITS - 1)
+_LINEAR_LIMIT = 1 << SIGNIFICANT_BITS
+
+DEFAULT_STATS_FILE = 'perf_stats.json'
+# Status payloads carry the summary at most this often (see SummaryReport)
+REPORT_INTERVAL_SECONDS = 300
+
+
+def bucket_index(micros):
+    """Bucket of a non-negative integer number of microseconds"""
+    if micros < _LINEAR_LIMIT:
+        return micros
+    shift = micros.bit_length() - SIGNIFICANT_BITS
+    return shift * _HALF + (micros >> shift)
+
+
+def bucket_value(index):
+    """Midpoint of a bucket, in microseconds"""
+    if index < _LINEAR_LIMIT:
+        return index
+    shift = index // _HALF - 1
+    low = (index - shift * _HALF) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+class Histogram:
+    """Log-linear histogram of durations with about 3% precision"""
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        micros = int(seconds * 1e6) if seconds > 0 else 0
+        index = bucket_index(micros)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.count += 1
+            self.total_us += micros
+            if micros > self.max_us:
+                self.max_us = micros
+
+    def merge(self, other):
+        with self._lock:
+            for index, count in other.counts.items():
+                self.counts[index] = self.counts.get(index, 0) + count
+            self.count += other.count
+            self.total_us += other.total_us
+            self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, fraction):
+        """Duration in seconds below which `fraction` of the values fall"""
+        with self._lock:
+            counts = sorted(self.counts.items())
+            total = self.count
+        if not total:
+            return 0.0
+        rank = max(1, int(round(fraction * total)))
+        if rank >= total:
+            return self.max_us / 1e6
+        seen = 0
+        for index, count in counts:
+            seen += count
+            if seen >= rank:
+                return min(bucket_value(index), self.max_us) / 1e6
+        return self.max_us / 1e6
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean_ms': self.total_us / self.count / 1000,
+            'p50_ms': self.percentile(0.50) * 1000,
+            'p90_ms': self.percentile(0.90) * 1000,
+            'p99_ms': self.percentile(0.99) * 1000,
+            'max_ms': self.max_us / 1000,
+        }
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.start)
+        return False
+
+
+class PerfStats:
+    """Histograms by operation name"""
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    def timer(self, name):
+        """Context manager recording the duration of its block under name"""
+        return _Timer(self.histogram(name))
+
+    def summary(self):
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def total_count(self):
+        """Values recorded across all histograms"""
+        return sum(histogram.count for histogram in list(self.histograms.values()))
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def save(self, path=DEFAULT_STATS_FILE):
+        """Write the summary for `cli.py stats`"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'saved_at': time.time(), 'pid': os.getpid(), 'perf': self.summary()}, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class SummaryReport:
+    """Summary for status payloads, at most every interval seconds and only
+    when values were recorded since the last one, so frequent heartbeats
+    don't build and send every histogram each time"""
+    def __init__(self, perf=None, interval=REPORT_INTERVAL_SECONDS):
+        self.perf = perf
+        self.interval = interval
+        self._reported_at = None
+        self._reported_count = None
+
+    def due(self):
+        """The summary if one should be reported now, else None"""
+        now = time.monotonic()
+        if self._reported_at is not None and now - self._reported_at < self.interval:
+            return None
+        perf = self.perf or stats
+        count = perf.total_count()
+        if count == self._reported_count:
+            return None
+        self._reported_at = now
+        self._reported_count = count
+        return perf.summary()
+
+
+# Process-wide statistics
+stats = PerfStats()
+
+
+def timer(name):
+    return stats.timer(name)
+
+
+def record(name, seconds):
+    stats.record(name, seconds)
+
+
+def load_summary(path=DEFAULT_STATS_FILE):
+    """Summary saved by a running or finished kiosk, or None"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def format_summary(summary):
+    """Table of a summary, one operation per line"""
+    lines = [f"{'operation':22s} {'count':>8s} {'p50 ms':>9s} {'p90 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}"]
+    for name, entry in summary.items():
+        if not entry.get('count'):
+            continue
+        lines.append(f"{name:22s} {entry['count']:8d} {entry['p50_ms']:9.3f} {entry['p90_ms']:9.3f} "
+                     f"{entry['p99_ms']:9.3f} {entry['max_ms']:9.3f}")
+    return '\n'.join(lines)
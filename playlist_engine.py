@@ -0,0 +1,269 @@
+"""
+Playlist Engine - Chooses the next content item
+
+Items play in playlist order unless they ask for something else through
+these optional fields:
+
+    'weight': 3                  shown 3x as often as weight-1 items; any
+                                 weight in the playlist switches to weighted
+                                 random rotation
+    'schedule': [                only shown in these dayparts (local time);
+        {'start': '06:00', 'end': '11:00'},
+        {'days': ['sat', 'sun'], 'start': '18:00', 'end': '02:00'}
+    ]                            end before start runs past midnight
+    'max_per_hour': 4            at most 4 plays in any rolling hour
+
+Picking is O(log n) so it stays fast on catalogs with 100k items:
+
+- Items with the same schedule form a group. The week is cut into
+  segments at every schedule boundary once, with the groups active in each
+  segment; the segment for "now" is found by binary search.
+- Each group keeps its items' weights in a Fenwick tree, so a weighted
+  pick, the next item in order, and taking a capped item out (and putting it
+  back when its hour is up) are all O(log n).
+"""
+
+import bisect
+import heapq
+import random
+import time
+from collections import deque
+from datetime import datetime
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+CAP_WINDOW_SECONDS = 3600
+
+
+class FenwickTree:
+    """Prefix sums over non-negative weights with O(log n) updates and search"""
+    def __init__(self, weights):
+        self.weights = list(weights)
+        self.size = len(self.weights)
+        self.tree = [0.0] * (self.size + 1)
+        for i, weight in enumerate(self.weights, 1):
+            self.tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+        self._top = 1 << self.size.bit_length() if self.size else 0
+
+    @property
+    def total(self):
+        return self.prefix(self.size)
+
+    def prefix(self, count):
+        """Sum of the first count weights"""
+        total = 0.0
+        while count > 0:
+            total += self.tree[count]
+            count -= count & -count
+        return total
+
+    def set(self, index, weight):
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, target):
+        """Index whose cumulative weight range contains target (0 <= target < total)"""
+        position = 0
+        step = self._top
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self.tree[nxt] <= target:
+                position = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return min(position, self.size - 1)
+
+
+def _parse_time(value):
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def schedule_intervals(schedule):
+    """[start, end) minute-of-week intervals for a schedule, or None for always"""
+    if not schedule:
+        return None
+    if isinstance(schedule, dict):
+        schedule = [schedule]
+    intervals = []
+    for window in schedule:
+        days = window.get('days') or DAYS
+        start = _parse_time(window.get('start', '00:00'))
+        end = _parse_time(window.get('end', '24:00'))
+        length = (end - start) % MINUTES_PER_DAY or MINUTES_PER_DAY
+        for day in days:
+            begin = DAYS.index(day.lower()[:3]) * MINUTES_PER_DAY + start
+            finish = begin + length
+            if finish <= MINUTES_PER_WEEK:
+                intervals.append((begin, finish))
+            else:
+                # Sunday night into Monday morning
+                intervals.append((begin, MINUTES_PER_WEEK))
+                intervals.append((0, finish - MINUTES_PER_WEEK))
+
+    # Merge overlapping windows
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def minute_of_week(timestamp):
+    now = datetime.fromtimestamp(timestamp)
+    return now.weekday() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+
+
+def item_key(item):
+    """Identity of an item across playlist edits"""
+    return item.get('id') or item.get('path')
+
+
+class _Group:
+    """Items sharing one schedule"""
+    def __init__(self, intervals):
+        self.intervals = intervals
+        self.positions = []
+        self.tree = None
+
+
+class PlaylistEngine:
+    """Picks the next item of a playlist by order or weight, schedule and caps"""
+    def __init__(self, items, history=None, rng=None):
+        # A ContentModel snapshot is kept as is, so callers can tell by
+        # identity whether the engine is still current
+        self.items = items if isinstance(items, tuple) else tuple(items)
+        self.weighted = any('weight' in item for item in self.items)
+        self.rng = rng or random.Random()
+        self._plays = {}
+        self._capped = []
+
+        groups = {}
+        self._group_of = []
+        for index, item in enumerate(self.items):
+            intervals = schedule_intervals(item.get('schedule'))
+            key = tuple(intervals) if intervals is not None else None
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = _Group(intervals)
+            self._group_of.append((group, len(group.positions)))
+            group.positions.append(index)
+        self.groups = list(groups.values())
+        for group in self.groups:
+            group.tree = FenwickTree(self._base_weight(self.items[i]) for i in group.positions)
+        self._build_segments()
+
+        # Carry frequency-cap history over from a previous engine
+        for index, item in enumerate(self.items):
+            plays = (history or {}).get(item_key(item))
+            if plays and item.get('max_per_hour'):
+                self._plays[index] = deque(plays)
+                self._check_cap(index, time.time())
+
+    @staticmethod
+    def _base_weight(item):
+        return max(0.0, float(item.get('weight', 1)))
+
+    def _build_segments(self):
+        """Cut the week at every schedule boundary; note the groups active in each segment"""
+        always = [g for g in self.groups if g.intervals is None]
+        scheduled = [g for g in self.groups if g.intervals is not None]
+        bounds = {0, MINUTES_PER_WEEK}
+        for group in scheduled:
+            for start, end in group.intervals:
+                bounds.update((start, end))
+        self._bounds = sorted(bounds)
+        self._segments = [list(always) for _ in self._bounds]
+        for group in scheduled:
+            for start, end in group.intervals:
+                for segment in range(bisect.bisect_left(self._bounds, start),
+                                     bisect.bisect_left(self._bounds, end)):
+                    self._segments[segment].append(group)
+
+    def active_groups(self, now):
+        segment = bisect.bisect_right(self._bounds, minute_of_week(now)) - 1
+        return self._segments[segment]
+
+    def next_index(self, start=0, now=None):
+        """Index of the item to play next, or None if nothing may play now.
+
+        In playlist order this is the first playable item at or after start
+        (wrapping around); with weights, start is ignored. The pick counts
+        as a play for frequency caps.
+        """
+        if not self.items:
+            return None
+        now = time.time() if now is None else now
+        self._release_caps(now)
+        groups = [g for g in self.active_groups(now) if g.tree.total > 0]
+        if not groups:
+            return None
+
+        if self.weighted:
+            index = self._weighted_pick(groups)
+        else:
+            index = self._ordered_pick(groups, start % len(self.items))
+
+        self._record_play(index, now)
+        return index
+
+    def _weighted_pick(self, groups):
+        totals = [group.tree.total for group in groups]
+        target = self.rng.random() * sum(totals)
+        for group, total in zip(groups, totals):
+            if target < total:
+                return group.positions[group.tree.find(target)]
+            target -= total
+        group = groups[-1]
+        return group.positions[group.tree.find(group.tree.total * 0.999999)]
+
+    def _ordered_pick(self, groups, start):
+        best = None
+        first = None
+        for group in groups:
+            local = bisect.bisect_left(group.positions, start)
+            before = group.tree.prefix(local)
+            if before < group.tree.total:
+                candidate = group.positions[group.tree.find(before)]
+                best = candidate if best is None else min(best, candidate)
+            wrapped = group.positions[group.tree.find(0)]
+            first = wrapped if first is None else min(first, wrapped)
+        return best if best is not None else first
+
+    # Frequency caps
+
+    def _record_play(self, index, now):
+        if not self.items[index].get('max_per_hour'):
+            return
+        self._plays.setdefault(index, deque()).append(now)
+        self._check_cap(index, now)
+
+    def _check_cap(self, index, now):
+        plays = self._plays[index]
+        while plays and plays[0] <= now - CAP_WINDOW_SECONDS:
+            plays.popleft()
+        group, local = self._group_of[index]
+        if len(plays) >= self.items[index]['max_per_hour']:
+            group.tree.set(local, 0.0)
+            heapq.heappush(self._capped, (plays[0] + CAP_WINDOW_SECONDS, index))
+        else:
+            group.tree.set(local, self._base_weight(self.items[index]))
+
+    def _release_caps(self, now):
+        while self._capped and self._capped[0][0] <= now:
+            _, index = heapq.heappop(self._capped)
+            self._check_cap(index, now)
+
+    def history(self):
+        """Recent play times per item, to hand to the engine for an edited playlist"""
+        return {item_key(self.items[index]): list(plays) for index, plays in self._plays.items()}
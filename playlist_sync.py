@@ -0,0 +1,293 @@
+"""
+Playlist Sync - Versioned playlist distribution between the server and kiosks
+
+The server keeps every published version of a playlist. Kiosks long-poll for
+a newer version and receive only the delta from the version they already
+have; media files are content-addressed by SHA-256 so a kiosk downloads only
+the files it is missing, with resumable ranged requests.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from event_log import get_logger
+from media_store import MediaStore, hash_file
+
+CHUNK_SIZE = 1024 * 1024
+
+log = get_logger('sync')
+
+
+def compute_delta(old_items, new_items):
+    """Describe how to turn old_items into new_items.
+
+    Items are matched by their 'id'. The delta lists removed ids, items that
+    are new or changed ('upserted') and, only if the resulting order can't be
+    inferred from appending new items, the full id order.
+    """
+    old_by_id = {item['id']: item for item in old_items}
+    new_ids = [item['id'] for item in new_items]
+    new_id_set = set(new_ids)
+
+    removed = [item_id for item_id in old_by_id if item_id not in new_id_set]
+    upserted = [item for item in new_items if old_by_id.get(item['id']) != item]
+
+    added_ids = [item['id'] for item in new_items if item['id'] not in old_by_id]
+    implied_order = [item['id'] for item in old_items if item['id'] in new_id_set] + added_ids
+
+    return {
+        'removed': removed,
+        'upserted': upserted,
+        'order': new_ids if implied_order != new_ids else None,
+    }
+
+
+def apply_delta(items, delta):
+    """Apply a delta from compute_delta() and return the new item list"""
+    removed = set(delta.get('removed', ()))
+    upserted = {item['id']: item for item in delta.get('upserted', ())}
+
+    result = []
+    for item in items:
+        if item['id'] in removed:
+            continue
+        result.append(upserted.pop(item['id'], item))
+    result.extend(item for item in delta.get('upserted', ()) if item['id'] in upserted)
+
+    order = delta.get('order')
+    if order is not None:
+        by_id = {item['id']: item for item in result}
+        result = [by_id[item_id] for item_id in order]
+    return result
+
+
+def assign_item_ids(items):
+    """Give playlist items stable ids so deltas can match them across versions.
+
+    Ids are derived from the content (hash or path), with a counter for the
+    same content appearing more than once.
+    """
+    seen = {}
+    for item in items:
+        if item.get('id'):
+            continue
+        base = item.get('sha256') or hashlib.sha256(item['path'].encode('utf-8')).hexdigest()
+        base = base[:16]
+        count = seen.get(base, 0)
+        seen[base] = count + 1
+        item['id'] = base if count == 0 else f"{base}-{count}"
+    return items
+
+
+class _HttpClient:
+    """Tiny urllib wrapper shared by the publisher and the sync client"""
+    def __init__(self, server_url, timeout=30, token=None):
+        self.server_url = server_url.rstrip('/')
+        self.timeout = timeout
+        self.token = token
+
+    def request(self, method, path, data=None, headers=None, timeout=None):
+        """Perform a request and return the open response (caller closes).
+
+        HTTP errors are returned as responses as well, so callers can
+        inspect the status code uniformly.
+        """
+        headers = dict(headers or {})
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        req = urllib.request.Request(self.server_url + path, data=data,
+                                     method=method, headers=headers)
+        try:
+            return urllib.request.urlopen(req, timeout=timeout or self.timeout)
+        except urllib.error.HTTPError as e:
+            return e
+
+    def json(self, method, path, payload=None, timeout=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if data is not None else {}
+        with self.request(method, path, data, headers, timeout) as response:
+            body = response.read()
+            if response.status >= 400:
+                raise IOError(f"{method} {path} failed with {response.status}: {body[:200]!r}")
+            return response.status, json.loads(body) if body else None
+
+
+def publish_playlist(server_url, playlist_name, content_items, store=None, timeout=300, token=None):
+    """Upload missing media and publish content_items as a new playlist version.
+
+    token is the server's publish token (PUBLISH_TOKEN).
+    """
+    client = _HttpClient(server_url, timeout, token)
+    store = store or MediaStore()
+    items = []
+    for content in content_items:
+        item = {key: content[key] for key in ('id', 'name', 'type', 'duration', 'launch_mode')
+                if content.get(key) is not None}
+        item.setdefault('name', os.path.basename(content['path']))
+
+        source = store.resolve(content)
+        if content['type'] in ('photo', 'video') and os.path.isfile(source):
+            sha256 = content.get('sha256') or hash_file(source)
+            size = os.path.getsize(source)
+            item.update({'sha256': sha256, 'size': size,
+                         'path': os.path.basename(content['path'])})
+            _upload_media(client, sha256, source, size)
+        else:
+            item['path'] = content['path']
+        items.append(item)
+
+    assign_item_ids(items)
+    _, result = client.json('PUT', f"/api/playlists/{urllib.parse.quote(playlist_name)}",
+                            {'items': items})
+    log.info("📤 Published %s v%s (%d items)", playlist_name, result['version'], len(items))
+    return result
+
+
+def _upload_media(client, sha256, path, size):
+    """Upload a media file unless the server already has it"""
+    with client.request('HEAD', f"/api/media/{sha256}") as response:
+        if response.status == 200:
+            return
+    with open(path, 'rb') as f:
+        with client.request('PUT', f"/api/media/{sha256}", data=f,
+                            headers={'Content-Length': str(size),
+                                     'Content-Type': 'application/octet-stream'}) as response:
+            if response.status >= 400:
+                raise IOError(f"Upload of {path} failed with {response.status}")
+    log.info("⬆️  Uploaded %s", os.path.basename(path))
+
+
+class PlaylistSyncClient:
+    """Kiosk-side subscriber that keeps a kiosk's content in sync with the server.
+
+    core is a DemoModeCore or the DemoModeApp; each new version is handed to
+    its apply_content() from the sync thread.
+    """
+    def __init__(self, server_url, playlist_name, core, store=None,
+                 state_file="playlist_state.json", poll_timeout=25):
+        self.http = _HttpClient(server_url, timeout=poll_timeout + 10)
+        self.playlist_name = playlist_name
+        self.core = core
+        self.store = store or getattr(core, 'media_store', None) or MediaStore()
+        self.state_file = state_file
+        self.poll_timeout = poll_timeout
+
+        self.version = 0
+        self.items = []
+        self.running = False
+        self.sync_thread = None
+        self._stop_event = threading.Event()
+
+        self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            if state.get('playlist') == self.playlist_name:
+                self.version = state['version']
+                self.items = state['items']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save_state(self):
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'playlist': self.playlist_name, 'version': self.version,
+                       'items': self.items}, f)
+        os.replace(tmp_path, self.state_file)
+
+    def media_path(self, item):
+        """Local path of a content-addressed media item"""
+        ext = os.path.splitext(item.get('path') or '')[1]
+        return self.store.object_path(item['sha256'], ext)
+
+    def sync_once(self):
+        """Wait for a newer playlist version and apply it. Returns True if updated."""
+        name = urllib.parse.quote(self.playlist_name)
+        status, data = self.http.json(
+            'GET', f"/api/playlists/{name}/poll?since={self.version}&timeout={self.poll_timeout}")
+        if status == 204 or not data or data.get('unchanged'):
+            return False
+
+        if data.get('full'):
+            items = data['items']
+        else:
+            items = apply_delta(self.items, data['delta'])
+
+        for item in items:
+            if item.get('sha256'):
+                self.download_media(item)
+
+        self.core.apply_content([self._to_content(item) for item in items])
+        self.items = items
+        self.version = data['version']
+        self._save_state()
+        log.info("🔄 Synced %s to v%s (%d items)", self.playlist_name, self.version, len(items))
+        return True
+
+    def _to_content(self, item):
+        content = dict(item)
+        if item.get('sha256'):
+            content['path'] = self.media_path(item)
+        return content
+
+    def download_media(self, item):
+        """Fetch a media file by hash, resuming a partial download if present"""
+        dest = self.media_path(item)
+        if os.path.exists(dest):
+            return dest
+
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        part_path = dest + '.part'
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f"bytes={offset}-"} if offset else {}
+
+        with self.http.request('GET', f"/api/media/{item['sha256']}", headers=headers) as response:
+            if response.status == 416:
+                # Partial file is already complete (or bogus); verify below
+                pass
+            elif response.status >= 400:
+                raise IOError(f"Download of {item['sha256']} failed with {response.status}")
+            else:
+                mode = 'ab' if response.status == 206 else 'wb'
+                with open(part_path, mode) as f:
+                    for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                        f.write(chunk)
+
+        if hash_file(part_path) != item['sha256']:
+            os.remove(part_path)
+            raise IOError(f"Hash mismatch for {item.get('name', item['sha256'])}")
+        os.replace(part_path, dest)
+        return dest
+
+    def start(self):
+        """Start syncing in a background thread"""
+        if self.sync_thread and self.sync_thread.is_alive():
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.sync_thread.start()
+
+    def stop(self):
+        """Stop the background sync"""
+        self.running = False
+        self._stop_event.set()
+
+    def _sync_loop(self):
+        failures = 0
+        while self.running:
+            try:
+                self.sync_once()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(300, 5 * 2 ** min(failures, 6))
+                log.warning("Playlist sync failed (%s), retrying in %ss", e, delay)
+                self._stop_event.wait(delay)
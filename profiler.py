@@ -0,0 +1,211 @@
+"""
+Profiler - Opt-in sampling profiler and span timings for the kiosk runtime
+
+While profiling is on, a background thread samples the stack of every
+thread at a fixed interval (sys._current_frames) and counts identical
+stacks. The result is written in collapsed-stack format, one line per
+stack, which flamegraph.pl, speedscope and similar tools read directly:
+
+    MainThread;mainloop (__init__.py:1458);_present_frame (media_player.py:409) 42
+
+Hot operations are also wrapped in named spans. A span always records
+its duration in the perf_stats histogram of the same name; while profiling
+is on it is also added to the profile's span timings:
+
+    with span('photo_decode'):
+        image.load()
+
+Profiling is started by the 'profiling' setting or `cli.py profile`. The
+sampler measures its own time, so the report includes the overhead, a
+fraction of a percent at the default 10 ms interval.
+
+    start_profiling(interval=0.01)
+    ...
+    profile = stop_profiling()
+    profile.save('profiles/kiosk.collapsed')   # also writes kiosk.json
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import perf_stats
+
+DEFAULT_INTERVAL = 0.01
+MAX_STACK_DEPTH = 100
+
+_profiler = None
+# SpanStats of the running profiler; None while profiling is off
+_spans = None
+
+
+class SpanStats:
+    """Count, total and max duration per span name"""
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            entry = self.stats.get(name)
+            if entry is None:
+                self.stats[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+
+    def summary(self):
+        with self._lock:
+            return {
+                name: {'count': count, 'total_ms': total * 1000,
+                       'mean_ms': total * 1000 / count, 'max_ms': longest * 1000}
+                for name, (count, total, longest) in sorted(self.stats.items())
+            }
+
+
+class _Span:
+    __slots__ = ('histogram', 'spans', 'name', 'start')
+
+    def __init__(self, histogram, spans, name):
+        self.histogram = histogram
+        self.spans = spans
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.histogram.record(elapsed)
+        if self.spans is not None:
+            self.spans.add(self.name, elapsed)
+        return False
+
+
+def span(name):
+    """Context manager timing a block under name (see perf_stats)"""
+    return _Span(perf_stats.stats.histogram(name), _spans, name)
+
+
+def _frame_label(code):
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples all thread stacks every interval seconds into collapsed stacks"""
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.spans = SpanStats()
+        self.samples = 0
+        # Seconds spent taking samples, i.e. the profiler's own cost
+        self.sampling_time = 0.0
+        self.started = None
+        self.stopped = None
+        self._labels = {}
+        self._thread_names = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.stopped = time.perf_counter()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            start = time.perf_counter()
+            self.sample(own_ident)
+            self.sampling_time += time.perf_counter() - start
+
+    def sample(self, skip_ident=None):
+        """Record the current stack of every thread except skip_ident"""
+        labels = self._labels
+        for ident, frame in sys._current_frames().items():
+            if ident == skip_ident:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(self._thread_name(ident))
+            stack.reverse()
+            self.stacks[';'.join(stack)] += 1
+        self.samples += 1
+
+    def _thread_name(self, ident):
+        name = self._thread_names.get(ident)
+        if name is None:
+            self._thread_names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._thread_names.get(ident, f"thread-{ident}")
+        return name
+
+    def collapsed(self):
+        """Collapsed-stack lines, most frequent first"""
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+
+    def report(self):
+        end = self.stopped or time.perf_counter()
+        duration = end - self.started if self.started else 0.0
+        return {
+            'duration_s': duration,
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'overhead_percent': self.sampling_time / duration * 100 if duration else 0.0,
+            'mean_sample_us': self.sampling_time / self.samples * 1e6 if self.samples else 0.0,
+            'spans': self.spans.summary(),
+        }
+
+    def save(self, path):
+        """Write collapsed stacks to path and the report next to it as .json"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.collapsed()) + '\n')
+        with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write('\n')
+
+
+def start_profiling(interval=DEFAULT_INTERVAL):
+    """Start sampling and span timing; returns the profiler already running, if any"""
+    global _profiler, _spans
+    if _profiler is None:
+        _profiler = SamplingProfiler(interval)
+        _spans = _profiler.spans
+        _profiler.start()
+    return _profiler
+
+
+def stop_profiling():
+    """Stop profiling and return the profiler, or None if it wasn't running"""
+    global _profiler, _spans
+    profiler, _profiler = _profiler, None
+    _spans = None
+    if profiler:
+        profiler.stop()
+    return profiler
+
+
+def is_profiling():
+    return _profiler is not None
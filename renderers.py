@@ -0,0 +1,411 @@
+"""
+Renderers - Display backends for MediaPlayer
+
+MediaPlayer prepares frames (decode, scale, convert) and hands them to a
+renderer. All renderers take RGB frames as PIL images or HxWx3 uint8 arrays.
+
+    tk      Fullscreen Tk window with one persistent Label (default)
+    pygame  SDL window; frames are uploaded to a streaming texture and
+            scaled by SDL (on the GPU where available)
+    null    No window at all; keeps the last frame (tests, benchmarks)
+
+show() must run on the renderer's own thread; use call_soon() from other
+threads (e.g. the video decode thread).
+
+A geometry ('WxH+X+Y') places the output on one monitor of a multi-display
+setup; without one the primary screen is used.
+"""
+
+import queue
+import re
+import threading
+
+import numpy as np
+from PIL import Image
+
+from event_log import get_logger
+from profiler import span
+
+RENDER_BACKENDS = ('tk', 'pygame', 'null')
+
+log = get_logger('renderer')
+
+
+def _to_array(image):
+    """Contiguous HxWx3 uint8 array for a PIL image or array"""
+    if isinstance(image, Image.Image):
+        image = np.asarray(image.convert('RGB') if image.mode != 'RGB' else image)
+    return np.ascontiguousarray(image)
+
+
+def parse_geometry(geometry):
+    """(width, height, x, y) from a Tk-style 'WxH+X+Y' string, or None"""
+    if not geometry:
+        return None
+    match = re.fullmatch(r'(\d+)x(\d+)([+-]\d+)([+-]\d+)', geometry.strip())
+    if not match:
+        raise ValueError(f"Invalid display geometry '{geometry}', expected WxH+X+Y")
+    return tuple(int(value) for value in match.groups())
+
+
+def _centered(frame_size, screen_size):
+    """Top-left position that centers a frame on the screen"""
+    return ((screen_size[0] - frame_size[0]) // 2, (screen_size[1] - frame_size[1]) // 2)
+
+
+class Renderer:
+    """Interface for display backends"""
+    name = None
+    # True if show() accepts frames of any size and scales them itself, so
+    # the player can skip CPU scaling
+    hardware_scaling = False
+
+    def __init__(self, on_key=None, geometry=None):
+        self.on_key = on_key
+        self.geometry = parse_geometry(geometry)
+        self.frames_presented = 0
+
+    def open(self):
+        """Create the (hidden) output window"""
+
+    def screen_size(self):
+        """Output size in pixels as (width, height)"""
+        raise NotImplementedError
+
+    def show(self, image):
+        """Present an RGB frame. Call on the renderer thread."""
+        raise NotImplementedError
+
+    def call_soon(self, func, *args):
+        """Run func(*args) on the renderer thread"""
+        func(*args)
+
+    def reveal(self):
+        """Show the output window on top and focused"""
+
+    def hide(self):
+        """Hide the output window"""
+
+    def close(self):
+        """Destroy the output window"""
+
+
+class NullRenderer(Renderer):
+    """Offscreen renderer that only keeps the last frame"""
+    name = 'null'
+
+    def __init__(self, on_key=None, size=(1920, 1080), geometry=None):
+        super().__init__(on_key, geometry)
+        self.size = self.geometry[:2] if self.geometry else size
+        self.last_frame = None
+        self.visible = False
+
+    def screen_size(self):
+        return self.size
+
+    def show(self, image):
+        self.last_frame = image
+        self.frames_presented += 1
+
+    def reveal(self):
+        self.visible = True
+
+    def hide(self):
+        self.visible = False
+
+
+class TkRenderer(Renderer):
+    """Fullscreen Tk window with one Label and one PhotoImage, updated in place.
+
+    The window and label are created once; frames of the same size are
+    pasted into the existing PhotoImage.
+    """
+    name = 'tk'
+
+    def __init__(self, on_key=None, title="Demo Content", geometry=None):
+        super().__init__(on_key, geometry)
+        self.title = title
+        self.window = None
+        self.label = None
+        self.photo = None
+
+    def open(self):
+        import tkinter as tk
+        from PIL import ImageTk
+        self._image_tk = ImageTk
+
+        self.window = tk.Toplevel()
+        self.window.title(self.title)
+        self.window.configure(bg='black')
+
+        # Move onto the target monitor first; fullscreen then covers the
+        # monitor the window is on
+        if self.geometry:
+            width, height, x, y = self.geometry
+            self.window.geometry(f"{width}x{height}{x:+d}{y:+d}")
+
+        # Make fullscreen
+        self.window.attributes('-fullscreen', True)
+        self.window.attributes('-topmost', True)
+        self.window.overrideredirect(True)
+
+        # Hide initially
+        self.window.withdraw()
+
+        if self.on_key:
+            self.window.bind('<KeyPress>', self.on_key)
+        self.window.focus_set()
+
+        self.label = tk.Label(self.window, bg='black')
+        self.label.pack(expand=True, fill=tk.BOTH)
+
+    def screen_size(self):
+        if self.geometry:
+            return self.geometry[:2]
+        return self.window.winfo_screenwidth(), self.window.winfo_screenheight()
+
+    def show(self, image):
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        if self.photo is not None and (self.photo.width(), self.photo.height()) == image.size:
+            # Same size as the last frame: update the Tk image in place, so
+            # no new image object is created and the label needs no relayout
+            with span('tk_photo_paste'):
+                self.photo.paste(image)
+        else:
+            with span('tk_photo_image'):
+                self.photo = self._image_tk.PhotoImage(image)
+            self.label.configure(image=self.photo)
+        self.frames_presented += 1
+
+    def call_soon(self, func, *args):
+        self.window.after(0, func, *args)
+
+    def reveal(self):
+        self.window.deiconify()
+        self.window.lift()
+        self.window.focus_force()
+
+    def hide(self):
+        self.window.withdraw()
+
+    def close(self):
+        if self.window:
+            self.window.destroy()
+            self.window = None
+            self.label = None
+            self.photo = None
+
+
+# SDL has one video subsystem and one event queue per process, shared by
+# every PygameRenderer (one per display, see displays.py). Open renderers by
+# SDL window id, so key events reach the renderer whose window they came
+# from, and the number of renderers using the video subsystem, so it is
+# quit only when the last one closes.
+_pygame_windows = {}
+_pygame_users = 0
+_pygame_lock = threading.Lock()
+
+
+class PygameRenderer(Renderer):
+    """SDL window driven from its own thread.
+
+    With pygame._sdl2 each frame is uploaded into one reused streaming
+    texture and scaled to the screen by the GPU. Otherwise it falls back to
+    blitting onto the display surface.
+    """
+    name = 'pygame'
+
+    def __init__(self, on_key=None, geometry=None):
+        super().__init__(on_key, geometry)
+        self.calls = queue.Queue()
+        self.thread = None
+        self.ready = threading.Event()
+        self.size = None
+        self.error = None
+        self._window = None
+        self._renderer = None
+        self._texture = None
+        self._surface = None
+        # Frame on the fallback surface, redrawn when the surface is recreated
+        self._last_frame = None
+        self._display_held = False
+        self.visible = False
+
+    @property
+    def hardware_scaling(self):
+        return self._renderer is not None
+
+    def open(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error:
+            self.thread = None
+            raise self.error
+
+    def _init_display(self):
+        global _pygame_users
+        import pygame
+        self._pygame = pygame
+        with _pygame_lock:
+            pygame.display.init()
+            _pygame_users += 1
+        self._display_held = True
+        info = pygame.display.Info()
+        self.size = self.geometry[:2] if self.geometry else (info.current_w, info.current_h)
+        try:
+            self._open_window()
+        except Exception as e:
+            log.warning("SDL2 renderer unavailable, using display surface: %s", e)
+            if self._window is not None:
+                self._window.destroy()
+            self._window = None
+            self._renderer = None
+            self._set_surface_mode(visible=False)
+
+    def _open_window(self):
+        from pygame._sdl2 import video
+        self._video = video
+        if self.geometry:
+            # Borderless window covering the target monitor
+            self._window = video.Window("Demo Content", size=self.size,
+                                        position=self.geometry[2:], borderless=True)
+        else:
+            self._window = video.Window("Demo Content", size=self.size, fullscreen_desktop=True)
+        self._window.hide()
+        self._renderer = video.Renderer(self._window, accelerated=-1, vsync=True)
+        with _pygame_lock:
+            _pygame_windows[self._window.id] = self
+
+    def _set_surface_mode(self, visible):
+        """(Re)create the fallback display surface, shown or hidden"""
+        pygame = self._pygame
+        flags = pygame.FULLSCREEN | (pygame.SHOWN if visible else pygame.HIDDEN)
+        self._surface = pygame.display.set_mode(self.size, flags)
+        # A new surface starts out black; put the current frame back
+        if visible and self._last_frame is not None:
+            height, width = self._last_frame.shape[:2]
+            self._blit_surface(pygame.image.frombuffer(self._last_frame, (width, height), 'RGB'))
+
+    def _blit_surface(self, surface):
+        self._surface.fill((0, 0, 0))
+        self._surface.blit(surface, _centered(surface.get_size(), self.size))
+        self._pygame.display.flip()
+
+    def _run(self):
+        try:
+            self._init_display()
+        except Exception as e:
+            self.error = e
+            self._release_display()
+            return
+        finally:
+            self.ready.set()
+        while True:
+            try:
+                func, args = self.calls.get(timeout=0.05)
+            except queue.Empty:
+                self._pump_events()
+                continue
+            if func is None:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                log.error("Renderer error: %s", e)
+        self._release_display()
+
+    def _release_display(self):
+        """Destroy this renderer's window; the last renderer also quits SDL video"""
+        global _pygame_users
+        window, self._window = self._window, None
+        self._texture = None
+        self._renderer = None
+        with _pygame_lock:
+            if window is not None:
+                _pygame_windows.pop(window.id, None)
+                window.destroy()
+            if not self._display_held:
+                return
+            self._display_held = False
+            _pygame_users -= 1
+            if not _pygame_users:
+                self._pygame.display.quit()
+
+    def _pump_events(self):
+        # Whichever renderer drains the shared queue hands each key event to
+        # the renderer owning its window, on that renderer's thread
+        for event in self._pygame.event.get():
+            if event.type != self._pygame.KEYDOWN:
+                continue
+            window = getattr(event, 'window', None)
+            with _pygame_lock:
+                owner = _pygame_windows.get(getattr(window, 'id', None), self)
+            if owner is self:
+                if self.on_key:
+                    self.on_key(event)
+            elif owner.on_key:
+                owner.call_soon(owner.on_key, event)
+
+    def screen_size(self):
+        return self.size
+
+    def call_soon(self, func, *args):
+        self.calls.put((func, args))
+
+    def show(self, image):
+        frame = _to_array(image)
+        height, width = frame.shape[:2]
+        surface = self._pygame.image.frombuffer(frame, (width, height), 'RGB')
+
+        if self._renderer is not None:
+            if self._texture is None or self._texture.get_rect().size != (width, height):
+                self._texture = self._video.Texture(self._renderer, (width, height), streaming=True)
+            self._texture.update(surface)
+            scale = min(self.size[0] / width, self.size[1] / height)
+            dest = (int(width * scale), int(height * scale))
+            self._renderer.clear()
+            self._renderer.blit(self._texture, self._pygame.Rect(_centered(dest, self.size), dest))
+            self._renderer.present()
+        else:
+            self._last_frame = frame
+            self._blit_surface(surface)
+        self.frames_presented += 1
+        self._pump_events()
+
+    def reveal(self):
+        def _reveal():
+            if self._window is not None:
+                self._window.show()
+                self._window.focus()
+            elif self._surface is not None:
+                self._set_surface_mode(visible=True)
+            self.visible = True
+        self.call_soon(_reveal)
+
+    def hide(self):
+        def _hide():
+            if self._window is not None:
+                self._window.hide()
+            elif self._surface is not None:
+                self._set_surface_mode(visible=False)
+            self.visible = False
+        self.call_soon(_hide)
+
+    def close(self):
+        if self.thread:
+            self.calls.put((None, ()))
+            self.thread.join(timeout=2)
+            self.thread = None
+
+
+def create_renderer(backend='tk', on_key=None, geometry=None):
+    """Renderer for a backend name from RENDER_BACKENDS"""
+    if backend == 'pygame':
+        return PygameRenderer(on_key, geometry=geometry)
+    if backend == 'null':
+        return NullRenderer(on_key, geometry=geometry)
+    if backend != 'tk':
+        log.warning("Unknown render backend '%s', using tk", backend)
+    return TkRenderer(on_key, geometry=geometry)
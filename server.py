@@ -1,75 +1,494 @@
-from fastapi import FastAPI, APIRouter
-from dotenv import load_dotenv
+import time
+
+# Reference point for the cold-start gauge, taken before the heavy imports
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import re
 import uuid
 from datetime import datetime
 
+import aiofiles
+
+from metrics import ServerMetrics, MetricsMiddleware, MongoCommandMetrics
+from playlist_sync import compute_delta
 
 ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+logger = logging.getLogger(__name__)
+
+
+class ServerSettings(BaseModel):
+    """Server configuration, usually read from the environment / .env"""
+    mongo_url: str
+    db_name: str
+    # Pool sizes are per worker process: total connections to MongoDB are
+    # roughly workers * max_pool_size, so keep this modest for multi-worker
+    # deployments. min_pool_size keeps warm sockets for bursty heartbeats.
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 5
+    mongo_max_idle_time_ms: int = 60000
+    cors_origins: List[str] = ["*"]
+    # Heartbeat batches are rejected with 503 above this many in-flight requests
+    max_in_flight_requests: int = 200
+    max_status_batch: int = 500
+    # Content-addressed media served to kiosks, and how many old playlist
+    # versions to keep for delta sync
+    media_dir: str = str(ROOT_DIR / 'media_store')
+    playlist_history: int = 50
+    # Shared secret for publishing playlists and uploading media, sent as
+    # 'Authorization: Bearer <token>'. Without one, both are refused.
+    publish_token: Optional[str] = None
+    max_upload_bytes: int = 8 * 1024 ** 3
+
+    @classmethod
+    def from_env(cls, env_file=None):
+        """Build settings from environment variables, loading .env first"""
+        from dotenv import load_dotenv
+
+        load_dotenv(env_file or ROOT_DIR / '.env')
+        return cls(
+            mongo_url=os.environ['MONGO_URL'],
+            db_name=os.environ['DB_NAME'],
+            mongo_max_pool_size=int(os.environ.get('MONGO_MAX_POOL_SIZE', 50)),
+            mongo_min_pool_size=int(os.environ.get('MONGO_MIN_POOL_SIZE', 5)),
+            mongo_max_idle_time_ms=int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000)),
+            cors_origins=[o.strip() for o in os.environ.get('CORS_ORIGINS', '*').split(',')],
+            max_in_flight_requests=int(os.environ.get('MAX_IN_FLIGHT_REQUESTS', 200)),
+            media_dir=os.environ.get('MEDIA_DIR', str(ROOT_DIR / 'media_store')),
+            playlist_history=int(os.environ.get('PLAYLIST_HISTORY', 50)),
+            publish_token=os.environ.get('PUBLISH_TOKEN') or None,
+            max_upload_bytes=int(os.environ.get('MAX_UPLOAD_BYTES', 8 * 1024 ** 3)),
+        )
+
+
+def create_mongo_client(settings, metrics):
+    """Create the Motor client for the current worker process"""
+    # Imported here so that importing this module stays cheap for tooling
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    return AsyncIOMotorClient(
+        settings.mongo_url,
+        maxPoolSize=settings.mongo_max_pool_size,
+        minPoolSize=settings.mongo_min_pool_size,
+        maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+        event_listeners=[MongoCommandMetrics(metrics)],
+    )
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open the MongoDB client once the worker is running, close it on shutdown.
+
+    The client is created here rather than at import time so that every
+    uvicorn/gunicorn worker gets its own client after forking.
+    """
+    settings = app.state.settings
+    client = create_mongo_client(settings, app.state.metrics)
+    app.state.mongo_client = client
+    app.state.db = client[settings.db_name]
+
+    cold_start = time.perf_counter() - _IMPORT_STARTED
+    app.state.metrics.cold_start.set(cold_start)
+    logger.info(f"Worker {os.getpid()} ready in {cold_start * 1000:.1f} ms")
+
+    try:
+        yield
+    finally:
+        client.close()
+
+
+def get_db(request: Request):
+    """Dependency returning the database of the current app"""
+    return request.app.state.db
+
+
+def require_publish_token(request: Request):
+    """Dependency guarding the write endpoints with the shared publish token"""
+    token = request.app.state.settings.publish_token
+    if not token:
+        raise HTTPException(status_code=403, detail="Publishing is disabled on this server")
+    scheme, _, credentials = request.headers.get('authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(credentials.encode(), token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid publish token",
+                            headers={'WWW-Authenticate': 'Bearer'})
 
-# Create the main app without a prefix
-app = FastAPI()
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 
 # Define Models
-class StatusCheck(BaseModel):
+class KioskStatus(BaseModel):
+    """Optional kiosk telemetry carried by a status check"""
+    demo_active: Optional[bool] = None
+    current_item: Optional[str] = None
+    content_count: Optional[int] = None
+    fps: Optional[float] = None
+    dropped_frames: Optional[int] = None
+    cpu_percent: Optional[float] = None
+    memory_percent: Optional[float] = None
+    uptime_seconds: Optional[float] = None
+    # Per-screen playback stats from kiosks with additional displays
+    displays: Optional[List[dict]] = None
+    # Latency summaries per operation (see perf_stats.py), if the kiosk reports them
+    perf: Optional[dict] = None
+
+class StatusCheck(KioskStatus):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     client_name: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
-class StatusCheckCreate(BaseModel):
+class StatusCheckCreate(KioskStatus):
     client_name: str
+    # Set by kiosks that batch samples; defaults to the server time
+    timestamp: Optional[datetime] = None
 
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
     return {"message": "Hello World"}
 
+def _to_document(status_obj):
+    # Unset telemetry fields are left out so plain checks stay small
+    return status_obj.dict(exclude_none=True)
+
 @api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
+async def create_status_check(input: StatusCheckCreate, db=Depends(get_db)):
+    status_dict = input.dict(exclude_none=True)
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await db.status_checks.insert_one(_to_document(status_obj))
     return status_obj
 
+@api_router.post("/status/batch")
+async def create_status_batch(request: Request, db=Depends(get_db)):
+    """Store a batch of kiosk heartbeats, optionally gzip-compressed"""
+    settings = request.app.state.settings
+    if request.app.state.metrics.requests_in_progress.get() > settings.max_in_flight_requests:
+        # Shed load; heartbeat clients back off and keep the batch spooled
+        return Response(status_code=503, headers={'Retry-After': '30'})
+
+    body = await request.body()
+    try:
+        if request.headers.get('content-encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        samples = json.loads(body)
+    except (OSError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid status batch")
+
+    if not isinstance(samples, list) or len(samples) > settings.max_status_batch:
+        raise HTTPException(status_code=400, detail="Invalid status batch")
+
+    try:
+        documents = [
+            _to_document(StatusCheck(**StatusCheckCreate(**sample).dict(exclude_none=True)))
+            for sample in samples
+        ]
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if documents:
+        await db.status_checks.insert_many(documents, ordered=False)
+    return {"accepted": len(documents)}
+
+
+class PlaylistItem(BaseModel):
+    id: str
+    name: str
+    type: str
+    path: Optional[str] = None
+    duration: Optional[int] = None
+    launch_mode: Optional[str] = None
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+
+class PlaylistUpdate(BaseModel):
+    items: List[PlaylistItem]
+
+# Long-polling kiosks re-check MongoDB at most this often, so that updates
+# published through another worker are picked up without a query per kiosk
+PLAYLIST_RECHECK_SECONDS = 2.0
+# Versions tried by one publish that races others for the next number
+PUBLISH_ATTEMPTS = 10
+
+def _playlist_state(app):
+    if not hasattr(app.state, 'playlists'):
+        app.state.playlists = {'versions': {}, 'events': {}, 'indexed': False}
+    return app.state.playlists
+
+async def _latest_version(app, db, name, max_age=PLAYLIST_RECHECK_SECONDS):
+    """Latest version number of a playlist, cached briefly per worker"""
+    cache = _playlist_state(app)['versions']
+    loop = asyncio.get_running_loop()
+    cached = cache.get(name)
+    if cached and loop.time() - cached[1] < max_age:
+        return cached[0]
+    doc = await db.playlists.find_one({'name': name}, {'version': 1}, sort=[('version', -1)])
+    version = doc['version'] if doc else 0
+    cache[name] = (version, loop.time())
+    return version
+
+def _playlist_event(app, name):
+    events = _playlist_state(app)['events']
+    if name not in events:
+        events[name] = asyncio.Event()
+    return events[name]
+
+async def _playlist_response(db, name, since):
+    latest = await db.playlists.find_one({'name': name}, sort=[('version', -1)])
+    if not latest:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    if since == latest['version']:
+        return {'name': name, 'version': since, 'unchanged': True}
+
+    base = await db.playlists.find_one({'name': name, 'version': since}) if since else None
+    if base is None:
+        # Unknown or pruned base version: send the whole playlist
+        return {'name': name, 'version': latest['version'], 'full': True, 'items': latest['items']}
+    return {
+        'name': name,
+        'version': latest['version'],
+        'from_version': since,
+        'delta': compute_delta(base['items'], latest['items']),
+    }
+
+@api_router.put("/playlists/{name}", dependencies=[Depends(require_publish_token)])
+async def publish_playlist(name: str, update: PlaylistUpdate, request: Request, db=Depends(get_db)):
+    """Store a new version of a playlist and wake up waiting kiosks"""
+    app = request.app
+    state = _playlist_state(app)
+    if not state['indexed']:
+        await db.playlists.create_index([('name', 1), ('version', -1)], unique=True)
+        state['indexed'] = True
+
+    # Imported here, like motor, to keep importing this module cheap
+    from pymongo.errors import DuplicateKeyError
+
+    items = [item.dict(exclude_none=True) for item in update.items]
+    for _ in range(PUBLISH_ATTEMPTS):
+        version = await _latest_version(app, db, name, max_age=0) + 1
+        try:
+            await db.playlists.insert_one({
+                'name': name, 'version': version, 'items': items, 'created_at': datetime.utcnow()
+            })
+            break
+        except DuplicateKeyError:
+            # A concurrent publish took this version; take the next one
+            continue
+    else:
+        raise HTTPException(status_code=503, detail="Playlist is being published concurrently")
+
+    keep = app.state.settings.playlist_history
+    await db.playlists.delete_many({'name': name, 'version': {'$lte': version - keep}})
+
+    cached = state['versions'].get(name)
+    if not cached or cached[0] < version:
+        state['versions'][name] = (version, asyncio.get_running_loop().time())
+    state['events'].pop(name, asyncio.Event()).set()
+    return {'name': name, 'version': version}
+
+@api_router.get("/playlists/{name}")
+async def get_playlist(name: str, since: int = 0, db=Depends(get_db)):
+    """Playlist as a delta from version `since`, or in full"""
+    return await _playlist_response(db, name, since)
+
+@api_router.get("/playlists/{name}/poll")
+async def poll_playlist(name: str, request: Request, since: int = 0, timeout: float = 25,
+                        db=Depends(get_db)):
+    """Long-poll until a version newer than `since` exists (204 on timeout)"""
+    app = request.app
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(0.0, min(timeout, 60.0))
+    while True:
+        latest = await _latest_version(app, db, name)
+        if latest and latest != since:
+            return await _playlist_response(db, name, since)
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return Response(status_code=204)
+        try:
+            await asyncio.wait_for(_playlist_event(app, name).wait(),
+                                   timeout=min(remaining, PLAYLIST_RECHECK_SECONDS))
+        except asyncio.TimeoutError:
+            pass
+
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+MEDIA_CHUNK_SIZE = 1024 * 1024
+
+def _media_path(request, sha256):
+    if not SHA256_RE.match(sha256):
+        raise HTTPException(status_code=400, detail="Invalid content hash")
+    media_dir = request.app.state.settings.media_dir
+    return os.path.join(media_dir, sha256[:2], sha256)
+
+def _parse_range(header, size):
+    """Parse a single 'bytes=start-end' range; None means the whole file"""
+    match = re.match(r'^bytes=(\d*)-(\d*)$', header or '')
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if match.group(1):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else size - 1
+    else:
+        start = max(0, size - int(match.group(2)))
+        end = size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={'Content-Range': f'bytes */{size}'})
+    return start, min(end, size - 1)
+
+async def _file_chunks(path, start, length):
+    async with aiofiles.open(path, 'rb') as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(MEDIA_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+@api_router.head("/media/{sha256}")
+async def media_info(sha256: str, request: Request):
+    path = _media_path(request, sha256)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Media not found")
+    return Response(headers={'Content-Length': str(os.path.getsize(path)),
+                             'Accept-Ranges': 'bytes', 'ETag': f'"{sha256}"'})
+
+@api_router.get("/media/{sha256}")
+async def download_media(sha256: str, request: Request):
+    """Serve a media file by hash, honoring Range for resumable downloads"""
+    path = _media_path(request, sha256)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    size = os.path.getsize(path)
+    headers = {'Accept-Ranges': 'bytes', 'ETag': f'"{sha256}"',
+               'Cache-Control': 'public, max-age=31536000, immutable'}
+    byte_range = _parse_range(request.headers.get('range'), size)
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    headers['Content-Length'] = str(end - start + 1)
+
+    return StreamingResponse(_file_chunks(path, start, end - start + 1), status_code=status_code,
+                             headers=headers, media_type='application/octet-stream')
+
+@api_router.put("/media/{sha256}", status_code=201, dependencies=[Depends(require_publish_token)])
+async def upload_media(sha256: str, request: Request):
+    """Store an uploaded media file, verifying its content hash and size"""
+    path = _media_path(request, sha256)
+    if os.path.exists(path):
+        return {'sha256': sha256, 'stored': False}
+
+    max_bytes = request.app.state.settings.max_upload_bytes
+    too_large = HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+    if int(request.headers.get('content-length') or 0) > max_bytes:
+        raise too_large
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    received = 0
+    try:
+        async with aiofiles.open(tmp_path, 'wb') as f:
+            async for chunk in request.stream():
+                # Content-Length may be missing (chunked) or wrong, so count
+                received += len(chunk)
+                if received > max_bytes:
+                    raise too_large
+                digest.update(chunk)
+                await f.write(chunk)
+        if digest.hexdigest() != sha256:
+            raise HTTPException(status_code=400, detail="Content hash mismatch")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {'sha256': sha256, 'stored': True}
+
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
+async def get_status_checks(db=Depends(get_db)):
     status_checks = await db.status_checks.find().to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
-# Include the router in the main app
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+async def get_metrics(request: Request):
+    return Response(request.app.state.metrics.render(),
+                    media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def create_app(settings=None):
+    """Build the FastAPI application.
+
+    Nothing touches the environment or the database until the app starts:
+    settings default to ServerSettings.from_env() and the Mongo client is
+    created in the lifespan handler.
+    """
+    if settings is None:
+        settings = ServerSettings.from_env()
+
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+    app.state.metrics = ServerMetrics()
+
+    # Include the router in the main app
+    app.include_router(api_router)
+    app.add_api_route("/metrics", get_metrics, methods=["GET"], include_in_schema=False)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=settings.cors_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Added last so it wraps everything, including CORS handling
+    app.add_middleware(MetricsMiddleware, metrics=app.state.metrics)
+
+    return app
+
+
+def __getattr__(name):
+    # Keeps `uvicorn server:app` working without building the app on import
+    if name == 'app':
+        app = create_app()
+        globals()['app'] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Each worker calls the factory after fork and opens its own Mongo pool
+    uvicorn.run(
+        "server:create_app",
+        factory=True,
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', 8000)),
+        workers=int(os.environ.get('WEB_CONCURRENCY', 1)),
+    )
@@ -10,6 +10,8 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from profiler import span
+
 class SettingsManager:
     def __init__(self, config_file="demo_config.json"):
         self.config_file = config_file
@@ -20,7 +22,7 @@ class SettingsManager:
         """Load settings from file"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r') as f:
+                with span('settings_load'), open(self.config_file, 'r') as f:
                     self.settings = json.load(f)
             except (json.JSONDecodeError, IOError):
                 self.settings = {}
@@ -30,7 +32,7 @@ class SettingsManager:
     def save_settings(self):
         """Save settings to file"""
         try:
-            with open(self.config_file, 'w') as f:
+            with span('settings_save'), open(self.config_file, 'w') as f:
                 json.dump(self.settings, f, indent=2)
             return True
         except IOError:
@@ -74,10 +76,27 @@ class SettingsManager:
         return {
             'auto_start_demo': False,
             'photo_duration': 5,
+            'render_backend': 'tk',
+            'video_decoder': 'opencv',
+            'video_audio': True,
+            'transition': 'crossfade',
+            'transition_duration': 0.5,
+            'frame_cache_dir': 'frame_cache',
+            # Per clip (10 s of 1080p30 is about 1.8 GB) and for the whole cache
+            'frame_cache_max_mb': 2048,
+            'frame_cache_total_mb': 8192,
             'keyboard_lock_enabled': False,
             'inactivity_timeout': 30,
             'windows_startup': False,
             'demo_content': [],
+            'displays': [],
+            'log_level': 'INFO',
+            'log_file': os.path.join('logs', 'events.jsonl'),
+            'profiling': False,
+            'profile_interval_ms': 10,
+            'profile_dir': 'profiles',
+            'report_perf_stats': False,
+            'perf_stats_file': 'perf_stats.json',
             'master_password': None
         }
     
@@ -0,0 +1,122 @@
+"""Tests for the asyncio demo engine."""
+
+import asyncio
+import contextlib
+import io
+import time
+
+from async_demo import AsyncDemoEngine
+
+
+def _engine(durations, on_item=None):
+    engine = AsyncDemoEngine(settings={}, on_item=on_item)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, duration in enumerate(durations):
+            engine.add_content('photo', f'/virtual/slide{i}.jpg', f'slide{i}', duration)
+    return engine
+
+
+def test_engine_rotates_and_stops():
+    """Items rotate in order, callbacks run, and stop interrupts a long item"""
+    played = []
+
+    async def on_item(engine, item):
+        played.append(item['name'])
+
+    async def run():
+        engine = _engine([0.01, 0.01, 0.01], on_item)
+        assert engine.start_demo()
+        task = engine.demo_task
+        assert engine.start_demo() and engine.demo_task is task
+        await asyncio.sleep(0.2)
+        await engine.stop()
+        assert played[:4] == ['slide0', 'slide1', 'slide2', 'slide0']
+        status = engine.get_status()
+        assert not status['demo_active'] and status['items_played'] == len(played)
+
+        slow = _engine([30])
+        slow.start_demo()
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        await slow.stop()
+        return time.perf_counter() - start
+
+    latency = asyncio.run(run())
+    assert latency < 0.05, f"stop took {latency * 1000:.1f} ms"
+    print(f"✅ Async engine rotation, stop in {latency * 1000:.2f} ms")
+
+
+def test_sync_stop_demo_stops_the_task():
+    """stop_demo keeps DemoModeCore's synchronous signature and still stops"""
+    async def run():
+        engine = _engine([30])
+        engine.start_demo()
+        await asyncio.sleep(0.01)
+        task = engine.demo_task
+        assert engine.stop_demo() is task
+        await asyncio.sleep(0)
+        return task, engine
+
+    task, engine = asyncio.run(run())
+    assert task.cancelled() and not engine.is_demo_active
+    print("✅ Synchronous stop_demo")
+
+
+def test_on_item_errors_are_counted():
+    """A failing on_item callback is counted and the rotation carries on"""
+    async def on_item(engine, item):
+        if item['name'] == 'slide1':
+            raise RuntimeError("display went away")
+
+    async def run():
+        engine = _engine([0.01, 0.01], on_item)
+        engine.start_demo()
+        await asyncio.sleep(0.1)
+        assert not engine.demo_task.done()
+        await engine.stop()
+        return engine.get_status()
+
+    status = asyncio.run(run())
+    assert status['item_errors'] >= 2
+    assert status['items_played'] > status['item_errors']
+    print(f"✅ on_item errors counted ({status['item_errors']}), rotation continued")
+
+
+def test_thousands_of_engines_in_one_process():
+    """2,000 virtual kiosks share one event loop at a small CPU cost"""
+    count = 2000
+    seconds = 1.5
+
+    async def run():
+        engines = [_engine([0.2, 0.3, 0.5]) for _ in range(count)]
+        cpu_start = time.process_time()
+        for engine in engines:
+            engine.start_demo()
+        await asyncio.sleep(seconds)
+        await asyncio.gather(*(engine.stop() for engine in engines))
+        return engines, time.process_time() - cpu_start
+
+    engines, cpu = asyncio.run(run())
+    played = [engine.items_played for engine in engines]
+    assert min(played) >= 3, f"slowest kiosk played {min(played)} items"
+    switches = sum(played)
+    per_switch_us = cpu / switches * 1e6
+    assert cpu < seconds * 0.5, f"{cpu:.2f}s CPU for {seconds}s of {count} kiosks"
+    print(f"✅ {count} kiosks: {switches} items in {seconds}s using {cpu:.2f}s CPU "
+          f"({per_switch_us:.0f} µs per item)")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_engine_rotates_and_stops, test_sync_stop_demo_stops_the_task,
+                 test_on_item_errors_are_counted,
+                 test_thousands_of_engines_in_one_process):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 async engine tests passed")
+    else:
+        print("⚠️  Some async engine tests failed")
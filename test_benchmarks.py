@@ -0,0 +1,121 @@
+"""Smoke tests for the headless benchmark suite."""
+
+import os
+import shutil
+import tempfile
+
+from benchmarks import fixtures
+from benchmarks.bench_playback import bench_photo, bench_video
+from benchmarks.harness import compare, summarize
+from renderers import NullRenderer
+
+
+def test_pipeline_runs_headless():
+    """Photo and video scenarios run without a display and report every stage"""
+    workdir = tempfile.mkdtemp()
+    try:
+        photo = fixtures.image_fixture(320, 240, fixture_dir=workdir)
+        video = fixtures.video_fixture(160, 120, frames=5, fixture_dir=workdir)
+
+        result = bench_photo(photo, (640, 480), 3, NullRenderer())
+        assert set(result['stages']) == {'decode', 'scale', 'present'}
+        assert result['stages']['decode']['count'] == 3
+        assert result['peak_rss_mb'] > 0
+
+        # More iterations than frames: the clip loops like MediaPlayer does
+        result = bench_video(video, (640, 480), 8, NullRenderer())
+        assert set(result['stages']) == {'decode', 'scale', 'convert', 'to_image', 'present'}
+        assert result['throughput_per_s'] > 0
+    finally:
+        shutil.rmtree(workdir)
+    print("✅ Headless pipeline benchmark")
+
+
+def test_baseline_comparison():
+    """Slowdowns beyond the tolerance are reported, noise is not"""
+    stats = summarize([0.010] * 10)
+    assert stats['p50_ms'] == 10.0
+    baseline = {'s': {'stages': {'decode': stats}, 'peak_rss_mb': 100}}
+
+    assert compare({'s': {'stages': {'decode': summarize([0.011] * 10)}, 'peak_rss_mb': 100}},
+                   baseline) == []
+    regressions = compare({'s': {'stages': {'decode': summarize([0.020] * 10)}, 'peak_rss_mb': 200}},
+                          baseline)
+    assert len(regressions) == 2
+    print("✅ Baseline comparison")
+
+
+def test_content_list_benchmark():
+    """Adding items one by one is timed for both list strategies"""
+    from benchmarks import bench_content_list
+    try:
+        results = bench_content_list.run(50)
+    except Exception as e:
+        print(f"⚠️  Content list benchmark: SKIPPED (no display: {e})")
+        return
+    assert set(results) == {'rebuild', 'diff'}
+    assert all(elapsed > 0 for elapsed in results.values())
+    print("✅ Content list benchmark")
+
+
+def test_fleet_simulator():
+    """Virtual kiosks report to the in-process server; injected faults show up as errors"""
+    from benchmarks import fleet_sim
+
+    report = fleet_sim.run(kiosks=50, seconds=1.0, interval=0.1, seed=1)
+    assert report['requests'] > 200
+    assert report['error_rate'] == 0.0
+    assert report['samples_stored'] == report['requests']
+    assert report['items_played'] >= 50
+    assert report['item_errors'] == 0
+    assert report['latency']['/api/status']['p50_ms'] > 0
+
+    report = fleet_sim.run(kiosks=50, seconds=1.0, interval=0.1, batch_size=2, seed=2,
+                           malformed_rate=0.05, offline_rate=0.05, offline_seconds=0.3,
+                           db_error_rate=0.05)
+    codes = report['status_codes']
+    assert set(codes) <= {'200', '422', '500'} and '422' in codes and '500' in codes
+    assert 0 < report['server_error_rate'] < report['error_rate'] < 0.5
+    assert report['db_errors'] == codes['500']
+    assert '/api/status/batch' in report['latency']
+    print(f"✅ Fleet simulator ({report['throughput_per_s']:.0f} requests/s, "
+          f"error rate {report['error_rate']:.1%})")
+
+
+def test_startup_defers_heavy_imports():
+    """demo_app's own imports load none of pygame, OpenCV, NumPy or psutil"""
+    import ast
+    from benchmarks import bench_startup
+
+    with open(os.path.join(bench_startup.ROOT, 'demo_app.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    # system_utils needs winreg, so only imports on Windows
+    modules = [node.module for node in tree.body
+               if isinstance(node, ast.ImportFrom) and node.module != 'system_utils']
+    assert 'displays' in modules and 'thumbnails' in modules
+    assert bench_startup.deferred_imports(modules) == []
+    print("✅ Startup imports deferred")
+
+    try:
+        report = bench_startup.run(runs=1)
+    except RuntimeError as e:
+        print(f"⚠️  Startup benchmark: SKIPPED ({e})")
+        return
+    assert report['deferred_imported'] == []
+    assert 0 < report['first_frame']['lazy']['first_frame_s'] < report['first_frame']['lazy']['wall_s']
+    print(f"✅ Startup benchmark (first frame {report['first_frame']['lazy']['first_frame_s'] * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_pipeline_runs_headless, test_baseline_comparison, test_content_list_benchmark,
+                 test_fleet_simulator, test_startup_defers_heavy_imports):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 benchmark tests passed")
+    else:
+        print("⚠️  Some benchmark tests failed")
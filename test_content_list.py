@@ -0,0 +1,205 @@
+"""Tests for the virtualized content list and the thumbnail cache."""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from PIL import Image
+
+from benchmarks import fixtures
+from content_list import ROW_HEIGHT, describe, shift_index, visible_rows
+from content_model import Change, ContentModel
+from media_store import MediaStore
+from thumbnails import ThumbnailCache
+
+
+def _request_and_wait(cache, item, timeout=30):
+    """Request a thumbnail and wait for the background result"""
+    done = threading.Event()
+    result = []
+
+    def ready(path):
+        result.append(path)
+        done.set()
+
+    path = cache.request(item, ready)
+    if path:
+        return path
+    assert done.wait(timeout), "thumbnail was not generated in time"
+    return result[0]
+
+
+def test_visible_rows():
+    """Only rows intersecting the viewport are drawn"""
+    assert list(visible_rows(0, 100, 50, 5000)) == [0, 1, 2]
+    assert list(visible_rows(75, 100, 50, 5000)) == [1, 2, 3]
+    assert list(visible_rows(0, 500, 50, 3)) == [0, 1, 2]
+    assert list(visible_rows(0, 500, 50, 0)) == []
+    assert describe({'type': 'application', 'path': '/apps/paint.exe'}) == \
+        "APPLICATION: paint.exe (Launch: desktop)"
+    print("✅ Visible rows")
+
+
+def test_model_emits_diffs():
+    """Every edit is reported as one insert/remove/move change"""
+    model = ContentModel([{'path': 'a'}])
+    changes = []
+    model.subscribe(changes.append)
+
+    model.append({'path': 'b'})
+    model.insert(0, {'path': 'c'})
+    model.move(0, 2)
+    del model[1]
+    assert [item['path'] for item in model] == ['a', 'c']
+    assert [(c.kind, c.index, c.item['path'], c.new_index) for c in changes] == [
+        ('insert', 1, 'b', None), ('insert', 0, 'c', None),
+        ('move', 0, 'c', 2), ('remove', 1, 'b', None)]
+
+    model.reset([])
+    assert changes[-1].kind == 'reset' and len(model) == 0
+    assert model.to_list() == []
+    print("✅ Content model diffs")
+
+
+def test_assign_emits_minimal_diffs():
+    """assign() reaches the new list through inserts, removals and moves only"""
+    model = ContentModel([{'id': k, 'path': k} for k in 'abcd'])
+    changes = []
+    model.subscribe(changes.append)
+
+    new = [{'id': 'c', 'path': 'c'}, {'id': 'a', 'path': 'a'}, {'id': 'e', 'path': 'e'},
+           {'id': 'd', 'path': 'd2'}]
+    model.assign(new)
+    assert model.to_list() == new
+    assert all(change.kind != 'reset' for change in changes)
+    assert len(changes) <= 5, changes
+
+    changes.clear()
+    model.assign(new)
+    assert changes == []
+    print("✅ Content model assign")
+
+
+def test_selection_follows_diffs():
+    """The selected row keeps pointing at the same item across edits"""
+    assert shift_index(3, Change('insert', 1)) == 4
+    assert shift_index(3, Change('insert', 5)) == 3
+    assert shift_index(3, Change('remove', 3)) is None
+    assert shift_index(3, Change('remove', 0)) == 2
+    assert shift_index(3, Change('move', 3, None, 0)) == 0
+    assert shift_index(3, Change('move', 0, None, 5)) == 2
+    assert shift_index(3, Change('move', 5, None, 1)) == 4
+    assert shift_index(3, Change('reset')) is None
+    assert shift_index(None, Change('insert', 0)) is None
+
+    # Cross-check moves against a real list
+    for old in range(5):
+        for new in range(5):
+            for selected in range(5):
+                items = list(range(5))
+                items.insert(new, items.pop(old))
+                assert items.index(selected) == shift_index(selected, Change('move', old, None, new))
+    print("✅ Selection follows diffs")
+
+
+def test_thumbnails_are_cached_by_hash():
+    """Thumbnails are made in worker processes and shared by identical files"""
+    workdir = tempfile.mkdtemp()
+    cache = ThumbnailCache(MediaStore(os.path.join(workdir, 'store')), workers=1)
+    try:
+        # Lookups for rows without a thumbnail don't touch the store
+        assert cache.cached_path({'type': 'photo', 'path': 'x.jpg', 'sha256': 'ab' * 32}) is None
+        assert not os.path.exists(cache.media_store.root)
+
+        photo = fixtures.image_fixture(1920, 1080, fixture_dir=workdir)
+        copy = os.path.join(workdir, 'copy.jpg')
+        shutil.copyfile(photo, copy)
+        video = fixtures.video_fixture(320, 240, frames=5, fixture_dir=workdir)
+
+        first = _request_and_wait(cache, {'type': 'photo', 'path': photo})
+        with Image.open(first) as image:
+            assert image.size[0] <= 96 and image.size[1] <= 54
+        assert cache.cached_path({'type': 'photo', 'path': photo}) == first
+
+        # Same bytes under another name: same thumbnail, already there
+        assert _request_and_wait(cache, {'type': 'photo', 'path': copy}) == first
+        assert '/transforms/' in first.replace(os.sep, '/')
+
+        assert _request_and_wait(cache, {'type': 'video', 'path': video}) != first
+        assert cache.request({'type': 'application', 'path': 'app.exe'}, print) is None
+
+        # Unreadable files report failure once and are not retried
+        broken = os.path.join(workdir, 'broken.jpg')
+        with open(broken, 'wb') as f:
+            f.write(b'not an image')
+        assert _request_and_wait(cache, {'type': 'photo', 'path': broken}) is None
+        assert cache.request({'type': 'photo', 'path': broken}, print) is None
+        assert not cache._pending
+    finally:
+        cache.shutdown()
+        shutil.rmtree(workdir)
+    print("✅ Thumbnail cache")
+
+
+class _CountingThumbnails:
+    def __init__(self):
+        self.requests = 0
+
+    def request(self, item, callback):
+        self.requests += 1
+        return None
+
+
+def test_large_playlist_renders_only_visible_rows():
+    """Showing a 5,000-item playlist draws one screen of rows"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"⚠️  Large playlist: SKIPPED (no display: {e})")
+        return
+
+    from content_list import ContentList
+    try:
+        root.geometry("600x400")
+        frame = tk.Frame(root)
+        frame.pack(fill=tk.BOTH, expand=True)
+        thumbnails = _CountingThumbnails()
+        content_list = ContentList(frame, thumbnails)
+        items = [{'type': 'photo', 'path': f'/media/photo_{i}.jpg'} for i in range(5000)]
+
+        start = time.perf_counter()
+        content_list.set_items(items)
+        root.update()
+        elapsed = time.perf_counter() - start
+
+        rows_in_view = 400 // ROW_HEIGHT + 2
+        assert thumbnails.requests <= rows_in_view * 2
+        assert len(content_list.canvas.find_all()) <= rows_in_view * 3
+        assert elapsed < 0.5, f"set_items took {elapsed:.3f}s"
+
+        content_list.yview('moveto', 1.0)
+        root.update()
+        assert content_list.offset > 0
+    finally:
+        root.destroy()
+    print(f"✅ 5,000-item playlist shown in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_visible_rows, test_model_emits_diffs, test_assign_emits_minimal_diffs,
+                 test_selection_follows_diffs,
+                 test_thumbnails_are_cached_by_hash,
+                 test_large_playlist_renders_only_visible_rows):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 content list tests passed")
+    else:
+        print("⚠️  Some content list tests failed")
@@ -1,6 +1,13 @@
 """Additional tests for the Demo Mode core functionality."""
 
+import contextlib
+import io
 import os
+import random
+import threading
+import time
+
+from content_model import ContentModel
 from demo_core import DemoModeCore
 
 
@@ -37,9 +44,175 @@ def test_export_and_import():
     print("✅ DemoModeCore export/import")
 
 
+def test_concurrent_edits_are_safe():
+    """Writers swap snapshots while readers and the demo loop keep going"""
+    model = ContentModel({'path': f'seed{i}'} for i in range(50))
+    errors = []
+    stop = threading.Event()
+
+    def writer(seed):
+        rng = random.Random(seed)
+        added = removed = 0
+        while not stop.is_set():
+            if rng.random() < 0.5:
+                model.insert(rng.randrange(len(model) + 1), {'path': f'w{seed}'})
+                added += 1
+            else:
+                try:
+                    model.remove(rng.randrange(max(1, len(model))))
+                    removed += 1
+                except IndexError:
+                    pass
+        counts.append(added - removed)
+
+    def reader():
+        while not stop.is_set():
+            snapshot = model.snapshot()
+            items = list(snapshot)
+            time.sleep(0)
+            # A snapshot never changes under the reader, whatever writers do
+            if list(snapshot) != items:
+                errors.append("snapshot changed")
+
+    counts = []
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(1)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(model) == 50 + sum(counts)
+
+    # The demo loop keeps running while items are removed near the end
+    demo = DemoModeCore()
+    demo.demo_content = [{'name': f'item{i}', 'path': f'/tmp/{i}.jpg', 'type': 'photo', 'duration': 0.0005}
+                         for i in range(20)]
+    failures = []
+    hook, threading.excepthook = threading.excepthook, lambda args: failures.append(args.exc_value)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            demo.start_demo()
+            deadline = time.time() + 1
+            while time.time() < deadline:
+                if len(demo.content) > 2:
+                    demo.content.remove(len(demo.content) - 1)
+                else:
+                    demo.content.extend({'name': 'new', 'path': '/tmp/new.jpg', 'type': 'photo',
+                                         'duration': 0.0005} for _ in range(10))
+                time.sleep(0.0005)
+            assert demo.demo_thread.is_alive()
+            demo.stop_demo()
+    finally:
+        threading.excepthook = hook
+    assert not failures, failures
+    print("✅ Concurrent playlist edits")
+
+
+def _long_items(count=3):
+    return [{'name': f'slide{i}', 'path': f'/tmp/slide{i}.jpg', 'type': 'photo', 'duration': 30}
+            for i in range(count)]
+
+
+def _loop_threads():
+    return [t for t in threading.enumerate() if t.name == 'demo-loop' and t.is_alive()]
+
+
+def test_stop_is_prompt():
+    """stop_demo interrupts a 30 s item and returns once the thread has ended"""
+    demo = DemoModeCore()
+    demo.demo_content = _long_items()
+    latencies = []
+    for _ in range(5):
+        assert demo.start_demo()
+        time.sleep(0.05)
+        thread = demo.demo_thread
+        start = time.perf_counter()
+        demo.stop_demo()
+        latencies.append(time.perf_counter() - start)
+        assert not thread.is_alive()
+    worst = max(latencies)
+    assert worst < 0.25, f"stop took {worst * 1000:.0f} ms"
+    print(f"✅ Stop latency {worst * 1000:.1f} ms (worst of 5)")
+
+
+def test_start_is_idempotent():
+    """Starting twice, or restarting right after a stop, runs one demo loop"""
+    demo = DemoModeCore()
+    demo.demo_content = _long_items()
+    assert demo.start_demo()
+    thread = demo.demo_thread
+    assert demo.start_demo()
+    assert demo.demo_thread is thread
+    assert len(_loop_threads()) == 1
+
+    demo.stop_demo()
+    demo.start_demo()
+    time.sleep(0.05)
+    assert len(_loop_threads()) == 1
+    demo.stop_demo()
+    assert not _loop_threads()
+    print("✅ Idempotent start")
+
+
+class _SlowItemCore(DemoModeCore):
+    """Core whose item playback blocks until released"""
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def _simulate_content_playback(self, content):
+        self.release.wait(5)
+
+
+def test_start_after_timed_out_stop():
+    """A start right after a stop whose join timed out runs a new loop"""
+    import demo_core
+    demo = _SlowItemCore()
+    demo.demo_content = _long_items()
+    timeout = demo_core.STOP_TIMEOUT_SECONDS
+    demo_core.STOP_TIMEOUT_SECONDS = 0.05
+    try:
+        assert demo.start_demo()
+        time.sleep(0.05)
+        stuck = demo.demo_thread
+        demo.stop_demo()
+        assert stuck.is_alive() and demo.demo_thread is stuck
+
+        assert demo.start_demo()
+        assert demo.demo_thread is not stuck and demo.demo_thread.is_alive()
+        assert demo.is_demo_active
+        demo.release.set()
+        stuck.join(timeout=2)
+        assert not stuck.is_alive() and demo.demo_thread.is_alive()
+    finally:
+        demo_core.STOP_TIMEOUT_SECONDS = timeout
+        demo.release.set()
+        demo.stop_demo()
+    assert not _loop_threads()
+    print("✅ Start after a timed-out stop")
+
+
+def test_status_index_stays_in_range():
+    """After the last item the reported index wraps to the start"""
+    demo = DemoModeCore(settings={})
+    demo.demo_content = _long_items(1)
+    assert demo.start_demo()
+    try:
+        time.sleep(0.05)
+        assert demo.get_status()['current_content'] == 0
+    finally:
+        demo.stop_demo()
+    print("✅ Status index in range")
+
+
 if __name__ == "__main__":
     all_passed = True
-    for test in (test_defaults, test_add_content_and_status, test_export_and_import):
+    for test in (test_defaults, test_add_content_and_status, test_export_and_import,
+                 test_concurrent_edits_are_safe, test_stop_is_prompt, test_start_is_idempotent,
+                 test_start_after_timed_out_stop, test_status_index_stays_in_range):
         try:
             test()
         except AssertionError as e:
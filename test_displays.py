@@ -0,0 +1,120 @@
+"""Headless tests for multi-display playback using the null renderer."""
+
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks import fixtures
+from displays import DisplayPipeline, create_display_pipelines
+from renderers import parse_geometry
+
+
+class _Settings:
+    def __init__(self, **values):
+        self.values = values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+class _App:
+    def __init__(self, **settings):
+        settings.setdefault('frame_cache_max_mb', 0)
+        self.settings_manager = _Settings(render_backend='null', **settings)
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_displays_share_frame_cache():
+    """Two screens looping the same clip decode it into one shared frame cache"""
+    workdir = tempfile.mkdtemp()
+    cache_dir = os.path.join(workdir, 'frames')
+    app = _App(frame_cache_dir=cache_dir, frame_cache_max_mb=64)
+    clip = fixtures.video_fixture(64, 48, frames=8, fixture_dir=workdir)
+    item = {'type': 'video', 'path': clip, 'duration': 30}
+    displays = [DisplayPipeline(app, {'name': 'left', 'geometry': '64x48+0+0', 'content': [item]}),
+                DisplayPipeline(app, {'name': 'right', 'geometry': '64x48+64+0', 'content': [item]})]
+    try:
+        for display in displays:
+            display.start()
+        for display in displays:
+            assert _wait_for(lambda: getattr(display.player.video_decoder, 'cached', False)), display.name
+            assert not display.player.play_audio
+
+        cached = [f for _, _, files in os.walk(cache_dir) for f in files if f.endswith('.npy')]
+        assert len(cached) == 1
+        assert displays[1].get_status()['current_item'] == os.path.basename(clip)
+    finally:
+        for display in displays:
+            display.cleanup()
+        shutil.rmtree(workdir)
+    print("✅ Displays share frame cache")
+
+
+def test_heavy_display_does_not_starve_light_one():
+    """A 1080p video on one screen leaves the other screen's frame rate intact"""
+    workdir = tempfile.mkdtemp()
+    app = _App()
+    light_clip = fixtures.video_fixture(64, 48, frames=300, fixture_dir=workdir)
+    heavy_clip = fixtures.video_fixture(1920, 1080, frames=60, fixture_dir=workdir)
+    light = DisplayPipeline(app, {'geometry': '64x48+0+0',
+                                  'content': [{'type': 'video', 'path': light_clip, 'duration': 30}]})
+    heavy = DisplayPipeline(app, {'geometry': '1920x1080+64+0',
+                                  'content': [{'type': 'video', 'path': heavy_clip, 'duration': 30}]})
+    try:
+        light.start()
+        heavy.start()
+        assert _wait_for(lambda: light.player.renderer is not None and heavy.player.renderer is not None)
+        time.sleep(0.5)
+
+        start_frames = light.player.renderer.frames_presented
+        time.sleep(2)
+        light_fps = (light.player.renderer.frames_presented - start_frames) / 2
+        assert heavy.player.renderer.frames_presented > 0
+        # The light clip is 30 fps; leave room for a single slow CPU
+        assert light_fps >= 20, f"light display dropped to {light_fps:.1f} fps"
+    finally:
+        light.cleanup()
+        heavy.cleanup()
+        shutil.rmtree(workdir)
+    print(f"✅ Light display kept {light_fps:.1f} fps next to 1080p video")
+
+
+def test_display_configuration():
+    """Geometries are parsed and bad display entries are skipped"""
+    assert parse_geometry('1920x1080+1920+0') == (1920, 1080, 1920, 0)
+    assert parse_geometry('800x600-800+0') == (800, 600, -800, 0)
+    assert parse_geometry(None) is None
+
+    displays = create_display_pipelines(_App(), [
+        {'name': 'side', 'geometry': '1280x720+1920+0',
+         'content': [{'type': 'photo', 'path': 'a.jpg'}, {'type': 'application', 'path': 'x'}]},
+        {'name': 'broken', 'geometry': 'left monitor'},
+    ])
+    assert [display.name for display in displays] == ['side']
+    assert len(displays[0].content) == 1
+    assert displays[0].player.get_renderer().screen_size() == (1280, 720)
+    for display in displays:
+        display.cleanup()
+    print("✅ Display configuration")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_displays_share_frame_cache, test_heavy_display_does_not_starve_light_one,
+                 test_display_configuration):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 display tests passed")
+    else:
+        print("⚠️  Some display tests failed")
@@ -0,0 +1,115 @@
+"""Tests for structured event logging."""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import event_log
+
+
+def _read_events(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_json_lines_and_levels():
+    """Records at or above the level become JSON lines with their extra fields"""
+    workdir = tempfile.mkdtemp()
+    log_file = os.path.join(workdir, 'logs', 'events.jsonl')
+    log = event_log.get_logger('test')
+    try:
+        event_log.setup_logging('INFO', log_file, console=False)
+        log.debug("hidden %d", 1)
+        log.info("🎬 Playing: %s", 'Showcase', extra={'item': 'Showcase', 'type': 'photo'})
+        try:
+            raise ValueError("bad frame")
+        except ValueError:
+            log.exception("Error in video playback")
+        event_log.shutdown_logging()
+
+        events = _read_events(log_file)
+        assert [e['level'] for e in events] == ['INFO', 'ERROR']
+        assert events[0]['msg'] == "🎬 Playing: Showcase"
+        assert events[0]['logger'] == 'demo.test'
+        assert events[0]['item'] == 'Showcase' and events[0]['type'] == 'photo'
+        assert 'ValueError: bad frame' in events[1]['exc']
+        assert 'ts' in events[0] and 'thread' in events[0]
+    finally:
+        event_log.shutdown_logging()
+        shutil.rmtree(workdir)
+    print("✅ JSON lines and levels")
+
+
+def test_rotation_and_full_queue():
+    """The file rotates at max_bytes; a full queue drops records instead of blocking"""
+    workdir = tempfile.mkdtemp()
+    log_file = os.path.join(workdir, 'events.jsonl')
+    log = event_log.get_logger('test')
+    try:
+        event_log.setup_logging('INFO', log_file, max_bytes=2000, backup_count=2, console=False)
+        for i in range(200):
+            log.info("event %d", i)
+        event_log.shutdown_logging()
+        files = sorted(os.listdir(workdir))
+        assert files == ['events.jsonl', 'events.jsonl.1', 'events.jsonl.2']
+        assert all(os.path.getsize(os.path.join(workdir, f)) <= 2000 for f in files)
+        assert _read_events(log_file)[-1]['msg'] == "event 199"
+
+        # Nothing drains the queue while the listener is held up
+        event_log.setup_logging('INFO', log_file, console=False)
+        listener = event_log._listener
+        listener.stop()
+        start = time.perf_counter()
+        for i in range(event_log.QUEUE_SIZE + 50):
+            log.info("event %d", i)
+        assert time.perf_counter() - start < 5
+        assert event_log.dropped_records() == 50
+        listener.start()
+    finally:
+        event_log.shutdown_logging()
+        shutil.rmtree(workdir)
+    print("✅ Rotation and bounded queue")
+
+
+def test_shutdown_restores_logging_flags():
+    """The process-wide record options are only changed while logging is set up"""
+    before = (logging._srcfile, logging.logProcesses, logging.logMultiprocessing)
+    try:
+        event_log.setup_logging('INFO', None, console=False)
+        event_log.setup_logging('INFO', None, console=False)
+        assert logging._srcfile is None and logging.makeLogRecord({}).process is None
+        event_log.shutdown_logging()
+        assert (logging._srcfile, logging.logProcesses, logging.logMultiprocessing) == before
+        assert logging.makeLogRecord({}).process == os.getpid()
+    finally:
+        event_log.shutdown_logging()
+    print("✅ Logging flags restored")
+
+
+def test_disabled_level_is_cheap():
+    """A log call below the configured level costs well under a microsecond"""
+    from benchmarks import bench_logging
+
+    timings, _ = bench_logging.run(50000)
+    assert timings['disabled'] < 1e-6, f"{timings['disabled'] * 1e9:.0f} ns per disabled call"
+    assert not logging.getLogger(event_log.LOGGER_NAME).handlers
+    print(f"✅ Disabled log call: {timings['disabled'] * 1e9:.0f} ns "
+          f"(queued {timings['queued'] * 1e9:.0f} ns, print {timings['print'] * 1e9:.0f} ns)")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_json_lines_and_levels, test_rotation_and_full_queue, test_shutdown_restores_logging_flags,
+                 test_disabled_level_is_cheap):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 event log tests passed")
+    else:
+        print("⚠️  Some event log tests failed")
@@ -0,0 +1,172 @@
+"""Tests for the kiosk heartbeat reporter."""
+
+import asyncio
+import email.utils
+import gzip
+import http.server
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from heartbeat import HeartbeatReporter, ServerBusy, StatusSpool, parse_retry_after
+
+
+def _reporter(spool_dir, **kwargs):
+    status = {'demo_active': True, 'current_item': 'Promo', 'fps': 30.0}
+    return HeartbeatReporter("http://fleet.example", "kiosk-1", lambda: status,
+                             spool_dir=spool_dir, **kwargs)
+
+
+def test_spool_is_bounded():
+    """Oldest batches are evicted once the spool is full"""
+    spool_dir = tempfile.mkdtemp()
+    try:
+        spool = StatusSpool(spool_dir, max_batches=3)
+        for i in range(5):
+            spool.push(str(i).encode())
+        assert len(spool) == 3
+        assert spool.peek()[1] == b'2'
+    finally:
+        shutil.rmtree(spool_dir)
+    print("✅ Bounded status spool")
+
+
+def test_batches_are_compressed_and_drained():
+    """Samples are sent as one gzip'd JSON batch and removed from the spool"""
+    spool_dir = tempfile.mkdtemp()
+    try:
+        reporter = _reporter(spool_dir)
+        sent = []
+        reporter._post = sent.append
+        reporter.pending = [reporter.sample() for _ in range(3)]
+        asyncio.run(reporter.flush())
+
+        assert len(sent) == 1
+        batch = json.loads(gzip.decompress(sent[0]))
+        assert len(batch) == 3
+        assert batch[0]['client_name'] == 'kiosk-1'
+        assert batch[0]['fps'] == 30.0
+        assert len(reporter.spool) == 0
+    finally:
+        shutil.rmtree(spool_dir)
+    print("✅ Compressed batch delivery")
+
+
+def test_offline_buffering_and_backoff():
+    """Batches stay spooled while the server is busy and back off honors Retry-After"""
+    spool_dir = tempfile.mkdtemp()
+    try:
+        reporter = _reporter(spool_dir, interval=1)
+
+        def busy(payload):
+            raise ServerBusy(retry_after=120)
+
+        reporter._post = busy
+        reporter.pending = [reporter.sample()]
+        asyncio.run(reporter.flush())
+        assert len(reporter.spool) == 1
+        assert reporter.failures == 1
+        assert reporter._backoff_delay(120) >= 120
+
+        # While backing off, new batches are spooled but not sent
+        sent = []
+        reporter._post = sent.append
+        reporter.pending = [reporter.sample()]
+        asyncio.run(reporter.flush())
+        assert sent == []
+        assert len(reporter.spool) == 2
+
+        # Once the backoff expires both batches go out in order
+        reporter.next_send_time = 0
+        asyncio.run(reporter.flush())
+        assert len(sent) == 2
+        assert len(reporter.spool) == 0
+        assert reporter.failures == 0
+    finally:
+        shutil.rmtree(spool_dir)
+    print("✅ Offline buffering and backoff")
+
+
+class _BusyHandler(http.server.BaseHTTPRequestHandler):
+    retry_after = None
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(503)
+        self.send_header('Retry-After', self.retry_after)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_retry_after_seconds_and_date():
+    """Retry-After is honored as seconds or as an HTTP date; junk means no hint"""
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(None) is None and parse_retry_after('soon') is None
+    in_a_minute = email.utils.format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60),
+                                              usegmt=True)
+    assert 55 <= parse_retry_after(in_a_minute) <= 60
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+    server = http.server.HTTPServer(('127.0.0.1', 0), _BusyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    spool_dir = tempfile.mkdtemp()
+    try:
+        reporter = HeartbeatReporter(f"http://127.0.0.1:{server.server_port}", "kiosk-1", dict,
+                                     spool_dir=spool_dir, interval=1)
+        for header in ('90', in_a_minute, 'soon'):
+            _BusyHandler.retry_after = header
+            reporter.pending = [reporter.sample()]
+            reporter.next_send_time = 0
+            asyncio.run(reporter.flush())
+            assert len(reporter.spool) >= 1
+            wait = reporter.next_send_time - time.monotonic()
+            if header != 'soon':
+                assert wait >= 50, f"{header!r}: backing off {wait:.0f}s"
+        assert reporter.failures == 3
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(spool_dir)
+    print("✅ Retry-After as seconds and HTTP date")
+
+
+def test_restarts_close_their_loop():
+    """Each stop closes the reporter's event loop, so restarts don't leak descriptors"""
+    spool_dir = tempfile.mkdtemp()
+    try:
+        reporter = _reporter(spool_dir)
+        reporter._post = lambda payload: None
+        loops = []
+        for _ in range(3):
+            reporter.start()
+            loops.append(reporter._loop)
+            time.sleep(0.05)
+            reporter.stop()
+        assert all(loop.is_closed() for loop in loops)
+        assert reporter._loop is None
+    finally:
+        shutil.rmtree(spool_dir)
+    print("✅ Reporter loop closed on stop")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_spool_is_bounded, test_batches_are_compressed_and_drained,
+                 test_offline_buffering_and_backoff, test_retry_after_seconds_and_date,
+                 test_restarts_close_their_loop):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 heartbeat tests passed")
+    else:
+        print("⚠️  Some heartbeat tests failed")
@@ -0,0 +1,526 @@
+"""Headless tests for MediaPlayer using the null renderer."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+import numpy as np
+import psutil
+
+from benchmarks import fixtures
+from media_player import MediaPlayer, decode_photo, scale_photo
+from renderers import NullRenderer, PygameRenderer, TkRenderer, create_renderer
+from video_decoders import (NO_AUDIO_SUFFIX, FFmpegDecoder, FrameCacheDecoder, FrameCacheWriter,
+                            extract_audio, find_ffmpeg, frame_cache_path)
+
+
+class _Settings:
+    def __init__(self, **values):
+        self.values = values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+class _App:
+    def __init__(self, backend='null', **settings):
+        settings.setdefault('frame_cache_max_mb', 0)
+        self.settings_manager = _Settings(render_backend=backend, **settings)
+
+
+def _play_and_measure_drift(player, path, seconds):
+    """Play a clip and return the worst A/V drift in seconds"""
+    player.play_content({'type': 'video', 'path': path})
+    time.sleep(seconds)
+    stats = player.get_playback_stats()
+    drift = player.max_av_drift
+    player.stop_playback()
+    player.video_thread.join(timeout=2)
+    assert stats['frames_shown'] > 0
+    return drift
+
+
+def test_photo_and_video_play_headless():
+    """Frames reach the renderer scaled to its screen size"""
+    workdir = tempfile.mkdtemp()
+    player = MediaPlayer(_App())
+    try:
+        photo = fixtures.image_fixture(640, 480, fixture_dir=workdir)
+        video = fixtures.video_fixture(320, 240, frames=10, fixture_dir=workdir)
+
+        player.play_content({'type': 'photo', 'path': photo})
+        renderer = player.renderer
+        assert isinstance(renderer, NullRenderer)
+        assert renderer.visible
+        assert renderer.last_frame.size == (1440, 1080)
+
+        player.play_content({'type': 'video', 'path': video})
+        deadline = time.time() + 5
+        while renderer.frames_presented < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert renderer.frames_presented >= 5
+        assert renderer.last_frame.shape == (1080, 1440, 3)
+        assert player.get_playback_stats()['frames_shown'] >= 4
+
+        player.stop_playback()
+        player.video_thread.join(timeout=2)
+        assert not renderer.visible
+    finally:
+        player.cleanup()
+        shutil.rmtree(workdir)
+    print("✅ Headless playback")
+
+
+def test_av_drift_opencv():
+    """Frames are presented on the media clock, within one frame of their timestamp"""
+    workdir = tempfile.mkdtemp()
+    player = MediaPlayer(_App(video_audio=False))
+    try:
+        # Short clip so the measurement spans a loop
+        video = fixtures.video_fixture(320, 240, frames=30, fixture_dir=workdir)
+        drift = _play_and_measure_drift(player, video, 1.5)
+        assert drift < 1 / 30, f"drift {drift * 1000:.1f} ms"
+    finally:
+        player.cleanup()
+        shutil.rmtree(workdir)
+    print("✅ A/V drift (OpenCV decoder)")
+
+
+def test_av_drift_ffmpeg():
+    """The ffmpeg pipe decoder delivers scaled frames and keeps sync with audio"""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg or not shutil.which('ffprobe'):
+        print("⚠️  ffmpeg decoder: SKIPPED (ffmpeg not installed)")
+        return
+    workdir = tempfile.mkdtemp()
+    player = MediaPlayer(_App(video_decoder='ffmpeg'))
+    try:
+        clip = os.path.join(workdir, 'av.mp4')
+        subprocess.run([ffmpeg, '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=size=640x360:rate=30',
+                        '-f', 'lavfi', '-i', 'sine=frequency=440', '-t', '2', '-shortest',
+                        '-pix_fmt', 'yuv420p', clip], check=True)
+
+        decoder = FFmpegDecoder(clip, (1280, 1280))
+        assert decoder.read().shape == (720, 1280, 3)
+        assert decoder.has_audio
+        decoder.close()
+
+        drift = _play_and_measure_drift(player, clip, 3)
+        assert drift < 2 / 30, f"drift {drift * 1000:.1f} ms"
+    finally:
+        player.cleanup()
+        shutil.rmtree(workdir)
+    print("✅ A/V drift (ffmpeg decoder)")
+
+
+def _fake_ffmpeg(workdir, script):
+    """Executable standing in for ffmpeg; its last argument is the output file"""
+    path = os.path.join(workdir, 'ffmpeg')
+    with open(path, 'w') as f:
+        f.write('#!/bin/sh\n' + script)
+    os.chmod(path, 0o755)
+    return path
+
+
+def test_audio_extraction_is_remembered():
+    """A silent clip runs ffmpeg once; concurrent extractions use their own temp files"""
+    if os.name != 'posix':
+        print("⚠️  Audio extraction: SKIPPED (needs a POSIX shell)")
+        return
+    workdir = tempfile.mkdtemp()
+    try:
+        calls = os.path.join(workdir, 'calls')
+        silent = _fake_ffmpeg(workdir, f'echo run >> {calls}\nexit 1\n')
+        dest = os.path.join(workdir, 'silent.wav')
+        assert extract_audio('clip.mp4', dest, silent) is None
+        assert extract_audio('clip.mp4', dest, silent) is None
+        with open(calls) as f:
+            assert len(f.readlines()) == 1
+        assert os.path.exists(dest + NO_AUDIO_SUFFIX) and not os.path.exists(dest)
+
+        # Each extraction writes its own partial file, so none is cut short
+        slow = _fake_ffmpeg(workdir, 'for out; do :; done\nsleep 0.2\necho RIFF > "$out"\n')
+        dest = os.path.join(workdir, 'sound.wav')
+        threads = [threading.Thread(target=extract_audio, args=('clip.mp4', dest, slow)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(dest) as f:
+            assert f.read() == 'RIFF\n'
+        assert not [name for name in os.listdir(workdir) if '.part' in name]
+        assert extract_audio('clip.mp4', dest, slow) == dest
+    finally:
+        shutil.rmtree(workdir)
+    print("✅ Audio extraction remembered")
+
+
+class _TimingRenderer(NullRenderer):
+    """Null renderer that records when each frame was presented"""
+    def __init__(self):
+        super().__init__(size=(320, 240))
+        self.times = []
+
+    def show(self, image):
+        super().show(image)
+        self.times.append(time.perf_counter())
+
+
+def test_gapless_loop_and_preload():
+    """Loops switch to a pre-opened decoder without a visible gap"""
+    workdir = tempfile.mkdtemp()
+    player = MediaPlayer(_App(video_audio=False))
+    try:
+        clip = fixtures.video_fixture(320, 240, frames=10, fixture_dir=workdir)
+        renderer = player.renderer = _TimingRenderer()
+
+        # The next item is opened ahead of time and used by play_content
+        player.preload({'type': 'video', 'path': clip})
+        prepared = player._preloaded[1].result()
+        player.play_content({'type': 'video', 'path': clip})
+        assert player.video_decoder is prepared
+
+        time.sleep(1.2)  # several loops of a 1/3 s clip
+        player.stop_playback()
+        player.video_thread.join(timeout=2)
+
+        intervals = [b - a for a, b in zip(renderer.times, renderer.times[1:])]
+        assert len(intervals) > 25
+        assert max(intervals) < 3 / 30, f"longest gap {max(intervals) * 1000:.1f} ms"
+    finally:
+        player.cleanup()
+        shutil.rmtree(workdir)
+    print("✅ Gapless looping")
+
+
+def _rss_mb():
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def test_cycling_items_keeps_memory_flat():
+    """10,000 item changes leave RSS and thread count where they started"""
+    workdir = tempfile.mkdtemp()
+    player = MediaPlayer(_App(transition='cut', video_audio=False))
+    try:
+        photos = [fixtures.image_fixture(64, 48, fixture_dir=workdir),
+                  fixtures.image_fixture(64, 48, 'PNG', fixture_dir=workdir)]
+        video = fixtures.video_fixture(64, 48, frames=5, fixture_dir=workdir)
+        player.renderer = NullRenderer(size=(64, 48))
+
+        baseline_rss = baseline_threads = None
+        for i in range(10000):
+            if i % 500 == 499:
+                player.play_content({'type': 'video', 'path': video})
+            else:
+                player.play_content({'type': 'photo', 'path': photos[i % 2]})
+            if i == 999:
+                time.sleep(0.1)
+                baseline_rss, baseline_threads = _rss_mb(), threading.active_count()
+
+        time.sleep(0.1)
+        assert threading.active_count() <= baseline_threads + 1
+        assert _rss_mb() - baseline_rss < 15, f"RSS grew {_rss_mb() - baseline_rss:.1f} MiB"
+    finally:
+        player.cleanup()
+        shutil.rmtree(workdir)
+    print("✅ Memory flat over 10,000 items")
+
+
+def test_tk_display_surface_is_reused():
+    """The Tk window keeps one label and reuses its image across 10,000 frames"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        print("⚠️  Tk display surface: SKIPPED (no display)")
+        return
+    try:
+        root.withdraw()
+        renderer = TkRenderer()
+        renderer.open()
+        frames = [np.zeros((48, 64, 3), dtype=np.uint8), np.zeros((45, 80, 3), dtype=np.uint8)]
+
+        baseline_rss = None
+        for i in range(10000):
+            # Runs of same-size frames (video) and size changes (new item)
+            renderer.show(frames[(i // 50) % 2])
+            if i % 100 == 0:
+                root.update()
+            if i == 999:
+                baseline_rss = _rss_mb()
+                widgets = len(renderer.window.winfo_children())
+                images = len(root.tk.call('image', 'names'))
+
+        assert len(renderer.window.winfo_children()) == widgets == 1
+        assert len(root.tk.call('image', 'names')) <= images
+        assert _rss_mb() - baseline_rss < 15
+        renderer.close()
+    finally:
+        root.destroy()
+    print("✅ Tk display surface reused")
+
+
+def test_large_jpeg_decodes_near_screen_size():
+    """Draft mode decodes oversized JPEGs at a reduced size that still covers the screen"""
+    workdir = tempfile.mkdtemp()
+    try:
+        jpeg = fixtures.image_fixture(2400, 1600, fixture_dir=workdir)
+        png = fixtures.image_fixture(2400, 1600, 'PNG', fixture_dir=workdir)
+
+        image = decode_photo(jpeg, (640, 480))
+        assert image.size == (1200, 800)  # 1/2 scale; 1/4 would be smaller than 640x426
+        assert scale_photo(image, (640, 480)).size == (640, 426)
+        assert decode_photo(jpeg).size == (2400, 1600)
+        assert decode_photo(png, (640, 480)).size == (2400, 1600)
+        assert scale_photo(decode_photo(png, (640, 480)), (640, 480)).size == (640, 426)
+    finally:
+        shutil.rmtree(workdir)
+    print("✅ Draft-mode JPEG decoding")
+
+
+def test_short_clip_plays_from_frame_cache():
+    """After one full pass a short clip loops from a memory-mapped frame file"""
+    workdir = tempfile.mkdtemp()
+    cache_dir = os.path.join(workdir, 'frames')
+    player = MediaPlayer(_App(video_audio=False, frame_cache_dir=cache_dir, frame_cache_max_mb=64))
+    try:
+        clip = fixtures.video_fixture(64, 48, frames=8, fixture_dir=workdir)
+        player.renderer = NullRenderer(size=(64, 48))
+        player.play_content({'type': 'video', 'path': clip})
+
+        deadline = time.time() + 5
+        while not getattr(player.video_decoder, 'cached', False) and time.time() < deadline:
+            time.sleep(0.02)
+        assert player.video_decoder.cached
+        frame = player.video_decoder.decoder.frames[0]
+        assert isinstance(frame, np.memmap) and frame.shape == (48, 64, 3)
+        player.stop_playback()
+        player.video_thread.join(timeout=2)
+
+        cached = [f for _, _, files in os.walk(cache_dir) for f in files if f.endswith('.npy')]
+        assert len(cached) == 1
+
+        # Clips whose frames don't fit under the threshold are not cached
+        small = MediaPlayer(_App(video_audio=False, frame_cache_dir=cache_dir + '2',
+                                 frame_cache_max_mb=0.01))
+        small.renderer = NullRenderer(size=(64, 48))
+        small.play_content({'type': 'video', 'path': clip})
+        time.sleep(0.6)
+        assert not small.video_decoder.cached
+        small.stop_playback()
+        small.video_thread.join(timeout=2)
+        small.cleanup()
+        assert not os.path.exists(cache_dir + '2')
+    finally:
+        player.cleanup()
+        shutil.rmtree(workdir)
+    print("✅ Memory-mapped frame cache")
+
+
+def _record_clip(cache_dir, key, frames=10, budget=0):
+    path = frame_cache_path(cache_dir, key, (4, 4))
+    writer = FrameCacheWriter(path, frames, 30, 2 ** 20, cache_dir, budget)
+    for _ in range(frames):
+        writer.add(np.zeros((4, 4, 3), np.uint8))
+    return path if writer.finish() else None
+
+
+def test_frame_cache_evicts_least_recently_used():
+    """The frame cache stays under its total budget, dropping the clips played longest ago"""
+    cache_dir = tempfile.mkdtemp()
+    try:
+        clip_bytes = 10 * 4 * 4 * 3
+        budget = 2 * os.path.getsize(_record_clip(cache_dir, 'probe')) + clip_bytes // 2
+        os.remove(frame_cache_path(cache_dir, 'probe', (4, 4)))
+        os.remove(frame_cache_path(cache_dir, 'probe', (4, 4)) + '.json')
+
+        first = _record_clip(cache_dir, 'aa' * 32, budget=budget)
+        second = _record_clip(cache_dir, 'bb' * 32, budget=budget)
+        os.utime(first, (1, 1))
+        os.utime(second, (2, 2))
+        # Playing the first clip again makes it the most recently used
+        FrameCacheDecoder(first).close()
+
+        third = _record_clip(cache_dir, 'cc' * 32, budget=budget)
+        assert os.path.exists(first) and os.path.exists(third)
+        assert not os.path.exists(second) and not os.path.exists(second + '.json')
+
+        # A clip bigger than the whole budget is not cached at all
+        assert _record_clip(cache_dir, 'dd' * 32, frames=100, budget=budget) is None
+        assert os.path.exists(first) and os.path.exists(third)
+    finally:
+        shutil.rmtree(cache_dir)
+    print("✅ Frame cache eviction")
+
+
+class _CountingDecoder:
+    """Stand-in for PreparedVideo that counts close() calls"""
+    def __init__(self, frames, on_end=None):
+        self.fps = 100
+        self.audio_file = None
+        self.cached = False
+        self.frame_count = frames
+        self.remaining = frames
+        self.on_end = on_end
+        self.closed = 0
+
+    def read(self):
+        if self.remaining:
+            self.remaining -= 1
+            return np.zeros((48, 64, 3), dtype=np.uint8)
+        if self.on_end:
+            self.on_end()
+        return None
+
+    def skip(self):
+        if self.remaining:
+            self.remaining -= 1
+            return True
+        return self.read() is not None
+
+    def close(self):
+        self.closed += 1
+
+
+def test_stop_at_loop_boundary_closes_each_decoder_once():
+    """Stopping just as a pass ends closes both that decoder and the next loop's"""
+    workdir = tempfile.mkdtemp()
+    player = MediaPlayer(_App(video_audio=False))
+    decoders = []
+
+    def prepare(content, video_path):
+        # The first decoder stops playback when its pass ends
+        decoder = _CountingDecoder(3, player.stop_playback if not decoders else None)
+        decoders.append(decoder)
+        return decoder
+
+    player._prepare_video = prepare
+    try:
+        video = fixtures.video_fixture(160, 120, frames=5, fixture_dir=workdir)
+        player.play_content({'type': 'video', 'path': video})
+        player.video_thread.join(timeout=5)
+        assert not player.video_thread.is_alive()
+        player._preloader.submit(lambda: None).result()
+        assert len(decoders) == 2
+        assert [d.closed for d in decoders] == [1, 1]
+    finally:
+        player.cleanup()
+        shutil.rmtree(workdir)
+    print("✅ Stop at loop boundary closes each decoder once")
+
+
+class _SurfaceOnlyRenderer(PygameRenderer):
+    """PygameRenderer as it runs where pygame._sdl2 is unavailable"""
+    def _open_window(self):
+        raise RuntimeError("no pygame._sdl2")
+
+    def on_thread(self, func):
+        """Result of func() run on the renderer thread"""
+        done = threading.Event()
+        result = []
+        self.call_soon(lambda: (result.append(func()), done.set()))
+        assert done.wait(2)
+        return result[0]
+
+
+def test_pygame_surface_fallback_visibility():
+    """The display-surface fallback is shown by reveal() and hidden by hide()"""
+    driver = os.environ.get('SDL_VIDEODRIVER')
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    renderer = _SurfaceOnlyRenderer(geometry='64x48+0+0')
+    try:
+        renderer.open()
+        import pygame
+        assert renderer._window is None and not renderer.hardware_scaling
+        assert not renderer.visible and not renderer.on_thread(pygame.display.get_active)
+
+        renderer.call_soon(renderer.show, np.full((48, 64, 3), 200, dtype=np.uint8))
+        renderer.reveal()
+        assert renderer.on_thread(pygame.display.get_active) and renderer.visible
+        # The frame shown before reveal() survives the new surface
+        assert renderer.on_thread(lambda: renderer._surface.get_at((32, 24))[:3]) == (200, 200, 200)
+
+        renderer.hide()
+        assert not renderer.on_thread(pygame.display.get_active) and not renderer.visible
+    finally:
+        renderer.close()
+        if driver is None:
+            del os.environ['SDL_VIDEODRIVER']
+        else:
+            os.environ['SDL_VIDEODRIVER'] = driver
+    print("✅ Pygame surface fallback visibility")
+
+
+def test_pygame_renderers_share_sdl():
+    """Closing one pygame display leaves the others running; key events reach their own window"""
+    import pygame
+    driver = os.environ.get('SDL_VIDEODRIVER')
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    keys = {'left': [], 'right': []}
+    left = PygameRenderer(keys['left'].append, geometry='64x48+0+0')
+    right = PygameRenderer(keys['right'].append, geometry='64x48+64+0')
+    try:
+        left.open()
+        right.open()
+        if not right.hardware_scaling:
+            print("⚠️  Pygame displays: SKIPPED (pygame._sdl2 unavailable)")
+            return
+
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a, window=right._window))
+        deadline = time.time() + 2
+        while not keys['right'] and time.time() < deadline:
+            time.sleep(0.01)
+        assert [event.key for event in keys['right']] == [pygame.K_a] and not keys['left']
+
+        left.close()
+        assert pygame.display.get_init()
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        right.call_soon(right.show, frame)
+        deadline = time.time() + 2
+        while not right.frames_presented and time.time() < deadline:
+            time.sleep(0.01)
+        assert right.frames_presented == 1
+
+        right.close()
+        assert not pygame.display.get_init()
+    finally:
+        left.close()
+        right.close()
+        if driver is None:
+            del os.environ['SDL_VIDEODRIVER']
+        else:
+            os.environ['SDL_VIDEODRIVER'] = driver
+    print("✅ Pygame displays share SDL")
+
+
+def test_backend_selection():
+    """Backends are chosen by name and unknown names fall back to tk"""
+    assert create_renderer('null').name == 'null'
+    assert create_renderer('pygame').name == 'pygame'
+    assert create_renderer('bogus').name == 'tk'
+    assert MediaPlayer(object()).render_backend == 'tk'
+    print("✅ Renderer selection")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_photo_and_video_play_headless, test_av_drift_opencv,
+                 test_av_drift_ffmpeg, test_audio_extraction_is_remembered, test_gapless_loop_and_preload,
+                 test_cycling_items_keeps_memory_flat, test_tk_display_surface_is_reused,
+                 test_large_jpeg_decodes_near_screen_size, test_short_clip_plays_from_frame_cache,
+                 test_frame_cache_evicts_least_recently_used,
+                 test_stop_at_loop_boundary_closes_each_decoder_once,
+                 test_pygame_surface_fallback_visibility, test_pygame_renderers_share_sdl,
+                 test_backend_selection):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 media player tests passed")
+    else:
+        print("⚠️  Some media player tests failed")
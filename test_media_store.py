@@ -0,0 +1,187 @@
+"""Tests for the content-addressed media store."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import media_store
+from demo_core import DemoModeCore
+from media_store import MediaStore, hash_file
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_hash_file_matches_hashlib():
+    """Buffered and memory-mapped hashing give the same digest"""
+    workdir = tempfile.mkdtemp()
+    try:
+        small = _write(os.path.join(workdir, 'small.bin'), b'x' * 1000)
+        large = _write(os.path.join(workdir, 'large.bin'), os.urandom(media_store.MMAP_THRESHOLD + 123))
+        empty = _write(os.path.join(workdir, 'empty.bin'), b'')
+        for path in (small, large, empty):
+            with open(path, 'rb') as f:
+                assert hash_file(path) == hashlib.sha256(f.read()).hexdigest()
+    finally:
+        shutil.rmtree(workdir)
+    print("✅ File hashing")
+
+
+def test_duplicates_are_stored_once():
+    """The same bytes in several folders end up as one stored object"""
+    workdir = tempfile.mkdtemp()
+    try:
+        data = os.urandom(50000)
+        paths = [_write(os.path.join(workdir, folder, 'promo.mp4'), data)
+                 for folder in ('a', 'b', 'c')]
+        paths.append(_write(os.path.join(workdir, 'other.mp4'), b'other'))
+
+        store = MediaStore(os.path.join(workdir, 'store'))
+        hashes = store.ingest_many(paths, workers=4)
+        assert len(set(hashes.values())) == 2
+        objects = [f for _, _, files in os.walk(store.objects_dir) for f in files]
+        assert len(objects) == 2
+
+        # Derived files are shared by every copy of the same content
+        sha256 = hashes[paths[0]]
+        assert store.transform_path(sha256, 'thumb.png') == store.transform_path(hashes[paths[2]], 'thumb.png')
+        assert store.resolve({'path': paths[1], 'sha256': sha256}) == store.find(sha256)
+    finally:
+        shutil.rmtree(workdir)
+    print("✅ Deduplicated storage")
+
+
+def test_portable_export_and_import():
+    """Exports carry hashes and media, not absolute paths"""
+    workdir = tempfile.mkdtemp()
+    try:
+        photo = _write(os.path.join(workdir, 'pc1', 'photos', 'shop.jpg'), b'jpeg-bytes')
+
+        source = DemoModeCore()
+        source.save_settings = lambda: True
+        source.demo_content = []
+        source.media_store = MediaStore(os.path.join(workdir, 'pc1', 'store'))
+        source.add_content('photo', photo, 'Shop', 5)
+        export_file = os.path.join(workdir, 'usb', 'content.json')
+        os.makedirs(os.path.dirname(export_file))
+        assert source.export_content(export_file, include_media=True)
+
+        with open(export_file) as f:
+            exported = json.load(f)
+        assert exported[0]['path'] == 'shop.jpg'
+
+        target = DemoModeCore()
+        target.save_settings = lambda: True
+        target.media_store = MediaStore(os.path.join(workdir, 'pc2', 'store'))
+        assert target.import_content(export_file)
+        resolved = target.media_store.resolve(target.demo_content[0])
+        with open(resolved, 'rb') as f:
+            assert f.read() == b'jpeg-bytes'
+    finally:
+        shutil.rmtree(workdir)
+    print("✅ Portable export/import")
+
+
+class _DiskFullStore(MediaStore):
+    """Store that runs out of space for one particular file"""
+    def __init__(self, root, full_for):
+        super().__init__(root)
+        self.full_for = full_for
+
+    def ingest(self, path, sha256=None):
+        if path == self.full_for:
+            raise OSError(28, "No space left on device")
+        return super().ingest(path, sha256)
+
+
+def test_ingest_links_and_skips_failures():
+    """Objects are hard links where possible; one failed file doesn't drop the rest"""
+    workdir = tempfile.mkdtemp()
+    try:
+        good = _write(os.path.join(workdir, 'good.mp4'), b'good')
+        bad = _write(os.path.join(workdir, 'bad.mp4'), b'bad')
+        store = _DiskFullStore(os.path.join(workdir, 'store'), full_for=bad)
+        hashes = store.ingest_many([bad, good])
+        assert list(hashes) == [good]
+        assert os.path.samefile(store.find(hashes[good]), good)
+        assert store.find(hash_file(bad)) is None
+    finally:
+        shutil.rmtree(workdir)
+    print("✅ Linked ingest with per-file errors")
+
+
+class _FakeRoot:
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, func, *args):
+        self.callbacks.append((func, args))
+
+
+class _BlockingStore:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def ingest_many(self, paths):
+        self.release.wait(5)
+        return {path: 'ab' * 32 for path in paths}
+
+
+def test_app_ingests_in_background():
+    """Adding files returns at once; items are appended later on the Tk thread"""
+    try:
+        from demo_app import DemoModeApp
+    except ImportError as e:
+        print(f"⚠️  Background ingest: SKIPPED ({e})")
+        return
+
+    class _App:
+        add_files = DemoModeApp.add_files
+        _add_ingested = DemoModeApp._add_ingested
+
+        def __init__(self):
+            self.root = _FakeRoot()
+            self.media_store = _BlockingStore()
+            self._ingest_pool = ThreadPoolExecutor(max_workers=1)
+            self.demo_content = []
+            self.saved = 0
+
+        def save_content(self):
+            self.saved += 1
+
+    app = _App()
+    app.add_files('video', ['a.mp4', 'b.mp4'])
+    assert app.demo_content == [] and app.root.callbacks == []
+
+    app.media_store.release.set()
+    app._ingest_pool.shutdown(wait=True)
+    for func, args in app.root.callbacks:
+        func(*args)
+    assert [item['path'] for item in app.demo_content] == ['a.mp4', 'b.mp4']
+    assert all(item['sha256'] == 'ab' * 32 for item in app.demo_content)
+    assert app.saved == 1
+    print("✅ Background ingest")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_hash_file_matches_hashlib, test_duplicates_are_stored_once,
+                 test_portable_export_and_import, test_ingest_links_and_skips_failures,
+                 test_app_ingests_in_background):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 media store tests passed")
+    else:
+        print("⚠️  Some media store tests failed")
@@ -0,0 +1,128 @@
+"""Tests for the status server metrics and timing middleware."""
+
+import asyncio
+import time
+
+from metrics import ServerMetrics, MetricsMiddleware, MongoCommandMetrics
+
+
+class _Route:
+    path = "/api/status"
+
+
+async def _hello_app(scope, receive, send):
+    scope["route"] = _Route()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _failing_app(scope, receive, send):
+    raise RuntimeError("boom")
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+def _scope():
+    return {"type": "http", "method": "GET", "path": "/api/status"}
+
+
+def test_histogram_render():
+    """Histograms render cumulative buckets in Prometheus format"""
+    metrics = ServerMetrics()
+    metrics.request_duration.labels("GET", "/x").observe(0.003)
+    metrics.request_duration.labels("GET", "/x").observe(0.3)
+    text = metrics.render()
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="0.005"} 1' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="+Inf"} 2' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/x"} 2' in text
+    print("✅ Histogram rendering")
+
+
+def test_middleware_records_requests():
+    """Middleware labels by route template and counts errors"""
+    metrics = ServerMetrics()
+    ok = MetricsMiddleware(_hello_app, metrics)
+    failing = MetricsMiddleware(_failing_app, metrics)
+
+    async def run():
+        await ok(_scope(), _receive, _send)
+        try:
+            await failing(_scope(), _receive, _send)
+        except RuntimeError:
+            pass
+
+    asyncio.run(run())
+    text = metrics.render()
+    assert 'http_requests_total{method="GET",route="/api/status",status="200"} 1' in text
+    assert 'http_request_errors_total{method="GET",route="<unmatched>"} 1' in text
+    assert 'http_requests_in_progress 0' in text
+    print("✅ Middleware request recording")
+
+
+def test_mongo_listener():
+    """Command listener records durations and failures"""
+    metrics = ServerMetrics()
+    listener = MongoCommandMetrics(metrics)
+
+    class Event:
+        command_name = "insert"
+        duration_micros = 1500
+
+    listener.started(Event())
+    listener.succeeded(Event())
+    listener.started(Event())
+    listener.failed(Event())
+    text = metrics.render()
+    assert 'mongodb_command_duration_seconds_count{command="insert"} 2' in text
+    assert 'mongodb_command_errors_total{command="insert"} 1' in text
+    assert 'mongodb_commands_in_progress 0' in text
+    print("✅ Mongo command listener")
+
+
+def test_middleware_overhead():
+    """Middleware adds only a few microseconds per request"""
+    metrics = ServerMetrics()
+    wrapped = MetricsMiddleware(_hello_app, metrics)
+    iterations = 20000
+
+    async def measure(app):
+        scope = _scope()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await app(scope, _receive, _send)
+        return (time.perf_counter() - start) / iterations
+
+    async def run():
+        # Warm up both paths, then keep the best of a few rounds
+        await measure(_hello_app)
+        await measure(wrapped)
+        bare = min([await measure(_hello_app) for _ in range(3)])
+        instrumented = min([await measure(wrapped) for _ in range(3)])
+        return instrumented - bare
+
+    overhead = asyncio.run(run())
+    print(f"⏱️  Middleware overhead: {overhead * 1e6:.2f} µs/request")
+    # Generous bound so the test is stable on slow CI machines
+    assert overhead < 50e-6
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_histogram_render, test_middleware_records_requests,
+                 test_mongo_listener, test_middleware_overhead):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 metrics tests passed")
+    else:
+        print("⚠️  Some metrics tests failed")
@@ -0,0 +1,131 @@
+"""Tests for the always-on latency histograms."""
+
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import perf_stats
+from perf_stats import Histogram, PerfStats, bucket_index, bucket_value
+
+
+def test_buckets_are_contiguous_and_precise():
+    """Every value maps to a bucket whose midpoint is within ~3% of it"""
+    previous = -1
+    for micros in list(range(5000)) + [10 ** 6, 3_600_000_000]:
+        index = bucket_index(micros)
+        assert index >= previous
+        previous = index
+        assert abs(bucket_value(index) - micros) <= max(0.5, micros * 0.033)
+    assert bucket_index(32) == 32 and bucket_value(bucket_index(1000)) == 1007.5
+    print("✅ Log-linear buckets")
+
+
+def test_percentiles_match_exact_values():
+    """Percentiles from the buckets agree with sorting the raw values"""
+    rng = random.Random(5)
+    values = [rng.expovariate(1 / 0.01) for _ in range(20000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for fraction in (0.5, 0.9, 0.99):
+        exact = values[int(fraction * len(values)) - 1]
+        assert abs(histogram.percentile(fraction) - exact) <= exact * 0.04 + 1e-6
+    summary = histogram.summary()
+    assert summary['count'] == 20000 and abs(summary['max_ms'] - values[-1] * 1000) < 0.001
+    assert len(histogram.counts) < 300
+
+    other = Histogram()
+    other.record(2.0)
+    histogram.merge(other)
+    assert histogram.count == 20001 and histogram.percentile(1.0) == 2.0
+    assert Histogram().summary() == {'count': 0}
+    print(f"✅ Percentiles (p99 {summary['p99_ms']:.2f} ms from {len(histogram.counts)} buckets)")
+
+
+def test_timers_status_and_cli():
+    """Timed blocks show up in get_status() and in `cli.py stats`"""
+    import cli
+    import server
+    from demo_core import DemoModeCore
+
+    stats = PerfStats()
+    for _ in range(3):
+        with stats.timer('play_photo'):
+            time.sleep(0.002)
+    summary = stats.summary()['play_photo']
+    assert summary['count'] == 3 and summary['p50_ms'] >= 2
+
+    calls = 100000
+    histogram = stats.histogram('frame_decode')
+    start = time.perf_counter()
+    for _ in range(calls):
+        histogram.record(0.004)
+    per_record = (time.perf_counter() - start) / calls
+    assert per_record < 5e-6, f"{per_record * 1e9:.0f} ns per record"
+
+    perf_stats.record('settings_save', 0.001)
+    status = DemoModeCore(settings={}).get_status()
+    assert status['perf']['settings_save']['count'] >= 1
+    check = server.StatusCheckCreate(client_name='kiosk-1', perf=status['perf'])
+    assert check.dict(exclude_none=True)['perf'] == status['perf']
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, 'perf_stats.json')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cli.show_stats(path)
+        assert 'No stats' in output.getvalue()
+
+        stats.save(path)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cli.show_stats(path)
+        assert 'play_photo' in output.getvalue() and 'frame_decode' in output.getvalue()
+    finally:
+        shutil.rmtree(workdir)
+    print(f"✅ Timers, status and cli stats ({per_record * 1e9:.0f} ns per record)")
+
+
+def test_status_reports_summary_now_and_then():
+    """Status payloads carry the summary on its own interval, and only after new values"""
+    from demo_core import DemoModeCore
+
+    perf_stats.record('settings_save', 0.001)
+    demo = DemoModeCore(settings={})
+    assert 'settings_save' in demo.get_status()['perf']
+    assert 'perf' not in demo.get_status()
+
+    stats = PerfStats()
+    report = perf_stats.SummaryReport(stats, interval=0)
+    assert report.due() == {}
+    assert report.due() is None
+    stats.record('blit', 0.002)
+    assert report.due()['blit']['count'] == 1
+    assert report.due() is None
+
+    report = perf_stats.SummaryReport(stats, interval=3600)
+    assert report.due()
+    stats.record('blit', 0.002)
+    assert report.due() is None
+    print("✅ Summary reported now and then")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_buckets_are_contiguous_and_precise, test_percentiles_match_exact_values,
+                 test_timers_status_and_cli, test_status_reports_summary_now_and_then):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 perf stats tests passed")
+    else:
+        print("⚠️  Some perf stats tests failed")
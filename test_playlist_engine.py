@@ -0,0 +1,157 @@
+"""Tests for weighted, scheduled and capped playlist selection."""
+
+import random
+import time
+from collections import Counter
+from datetime import datetime
+
+from demo_core import DemoModeCore
+from playlist_engine import FenwickTree, PlaylistEngine, schedule_intervals
+
+# 2024-01-01 was a Monday
+MONDAY_8AM = datetime(2024, 1, 1, 8, 0).timestamp()
+MONDAY_7PM = datetime(2024, 1, 1, 19, 0).timestamp()
+MONDAY_1AM = datetime(2024, 1, 1, 1, 0).timestamp()
+
+
+def _names(engine, picks, now=MONDAY_8AM):
+    indices = []
+    start = 0
+    for _ in range(picks):
+        index = engine.next_index(start, now=now)
+        indices.append(None if index is None else engine.items[index]['path'])
+        start = 0 if index is None else index + 1
+    return indices
+
+
+def test_fenwick_tree_matches_brute_force():
+    """Prefix sums and searches agree with a plain list"""
+    rng = random.Random(1)
+    weights = [rng.choice([0, 0.5, 1, 3]) for _ in range(37)]
+    tree = FenwickTree(weights)
+    for _ in range(50):
+        i = rng.randrange(len(weights))
+        weights[i] = rng.choice([0, 1, 2])
+        tree.set(i, weights[i])
+        assert abs(tree.prefix(i) - sum(weights[:i])) < 1e-9
+        target = rng.random() * sum(weights)
+        expected = next(k for k in range(len(weights)) if sum(weights[:k + 1]) > target)
+        assert tree.find(target) == expected
+    print("✅ Fenwick tree")
+
+
+def test_plain_playlist_rotates_in_order():
+    """Without weights, schedules or caps the playlist plays round-robin"""
+    engine = PlaylistEngine([{'path': 'a'}, {'path': 'b'}, {'path': 'c'}])
+    assert _names(engine, 5) == ['a', 'b', 'c', 'a', 'b']
+    assert engine.items[engine.next_index(7)]['path'] == 'b'
+    assert PlaylistEngine([]).next_index(0) is None
+    print("✅ Round-robin order")
+
+
+def test_weights():
+    """A weight-3 item is picked about three times as often as a weight-1 item"""
+    engine = PlaylistEngine([{'path': 'promo', 'weight': 3}, {'path': 'normal', 'weight': 1},
+                             {'path': 'off', 'weight': 0}], rng=random.Random(7))
+    counts = Counter(_names(engine, 8000))
+    assert 'off' not in counts
+    ratio = counts['promo'] / counts['normal']
+    assert 2.4 < ratio < 3.6, f"promo/normal ratio {ratio:.2f}"
+    print(f"✅ Weighted rotation (ratio {ratio:.2f})")
+
+
+def test_dayparts():
+    """Items only play inside their schedule windows, including past midnight"""
+    items = [
+        {'path': 'breakfast', 'schedule': [{'start': '06:00', 'end': '11:00'}]},
+        {'path': 'evening', 'schedule': {'days': ['sun', 'mon'], 'start': '18:00', 'end': '02:00'}},
+        {'path': 'always'},
+    ]
+    engine = PlaylistEngine(items)
+    assert set(_names(engine, 6, MONDAY_8AM)) == {'breakfast', 'always'}
+    assert set(_names(engine, 6, MONDAY_7PM)) == {'evening', 'always'}
+    # Sunday's evening window runs into Monday 01:00
+    assert set(_names(engine, 6, MONDAY_1AM)) == {'evening', 'always'}
+
+    only_breakfast = PlaylistEngine(items[:1])
+    assert only_breakfast.next_index(0, now=MONDAY_7PM) is None
+    assert schedule_intervals({'days': ['sun'], 'start': '23:00', 'end': '01:00'}) == [(0, 60), (10020, 10080)]
+    print("✅ Dayparting")
+
+
+def test_frequency_cap():
+    """Capped items sit out until their oldest play is an hour old"""
+    engine = PlaylistEngine([{'path': 'capped', 'max_per_hour': 2}, {'path': 'filler'}])
+    now = MONDAY_8AM
+    picks = [engine.items[engine.next_index(0, now=now + i)]['path'] for i in range(4)]
+    assert picks == ['capped', 'capped', 'filler', 'filler']
+    assert engine.items[engine.next_index(0, now=now + 3600)]['path'] == 'capped'
+
+    # Cap history survives a rebuild for an edited playlist
+    recent = time.time()
+    engine = PlaylistEngine([{'path': 'capped', 'max_per_hour': 1}, {'path': 'filler'}])
+    assert engine.next_index(0, now=recent) == 0
+    rebuilt = PlaylistEngine([{'path': 'new'}, *engine.items], engine.history())
+    assert [rebuilt.items[rebuilt.next_index(i, now=recent)]['path'] for i in range(3)] == \
+        ['new', 'filler', 'filler']
+    print("✅ Frequency caps")
+
+
+def test_large_catalog_picks_fast():
+    """Picking from 100k weighted, scheduled and capped items stays in microseconds"""
+    rng = random.Random(3)
+    items = []
+    for i in range(100_000):
+        item = {'path': f'item_{i}', 'weight': rng.choice([1, 1, 1, 2, 5])}
+        if i % 10 == 0:
+            hour = rng.randrange(24)
+            item['schedule'] = [{'start': f'{hour:02d}:00', 'end': f'{(hour + 4) % 24:02d}:00'}]
+        if i % 7 == 0:
+            item['max_per_hour'] = 1
+        items.append(item)
+
+    start = time.perf_counter()
+    engine = PlaylistEngine(items, rng=rng)
+    build = time.perf_counter() - start
+
+    picks = 20_000
+    start = time.perf_counter()
+    for i in range(picks):
+        assert engine.next_index(0, now=MONDAY_8AM + i) is not None
+    per_pick = (time.perf_counter() - start) / picks
+    assert per_pick < 0.0005, f"{per_pick * 1e6:.0f} µs per pick"
+    print(f"✅ 100k catalog: built in {build:.2f}s, {per_pick * 1e6:.1f} µs per pick")
+
+
+def test_core_uses_engine():
+    """DemoModeCore picks through the engine and rebuilds it after edits"""
+    # In-memory settings, so remove_content doesn't rewrite demo_settings.json
+    demo = DemoModeCore(settings={})
+    demo.demo_content = [
+        {'name': 'breakfast', 'path': '/tmp/breakfast.jpg', 'type': 'photo', 'duration': 1,
+         'schedule': [{'start': '06:00', 'end': '11:00'}]},
+        {'name': 'day', 'path': '/tmp/day.jpg', 'type': 'photo', 'duration': 1},
+    ]
+    expected = 0 if 6 <= datetime.now().hour < 11 else 1
+    assert demo.next_content(0)[0] == expected
+    engine = demo.playlist
+    demo.remove_content(0)
+    assert demo.next_content(0) == (0, demo.demo_content[0])
+    assert demo.playlist is not engine
+    print("✅ DemoModeCore playlist engine")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_fenwick_tree_matches_brute_force, test_plain_playlist_rotates_in_order,
+                 test_weights, test_dayparts, test_frequency_cap, test_large_catalog_picks_fast,
+                 test_core_uses_engine):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 playlist engine tests passed")
+    else:
+        print("⚠️  Some playlist engine tests failed")
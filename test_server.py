@@ -0,0 +1,339 @@
+"""Tests for the status server."""
+
+import asyncio
+import gzip
+import json
+import os
+import hashlib
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import server
+
+
+TOKEN = 'test-publish-token'
+AUTH = ('Authorization', f'Bearer {TOKEN}')
+
+
+def _settings(**overrides):
+    values = {'mongo_url': 'mongodb://localhost:1', 'db_name': 'demo_test', 'publish_token': TOKEN}
+    values.update(overrides)
+    return server.ServerSettings(**values)
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.documents = []
+
+    def _matches(self, doc, query):
+        for key, value in query.items():
+            if isinstance(value, dict):
+                if not doc.get(key, float('inf')) <= value['$lte']:
+                    return False
+            elif doc.get(key) != value:
+                return False
+        return True
+
+    async def insert_one(self, document):
+        self.documents.append(document)
+
+    async def insert_many(self, documents, ordered=True):
+        self.documents.extend(documents)
+
+    async def find_one(self, query, projection=None, sort=None):
+        matches = [d for d in self.documents if self._matches(d, query)]
+        if sort:
+            key, direction = sort[0]
+            matches.sort(key=lambda d: d[key], reverse=direction < 0)
+        return matches[0] if matches else None
+
+    async def delete_many(self, query):
+        self.documents = [d for d in self.documents if not self._matches(d, query)]
+
+    async def create_index(self, keys, **kwargs):
+        pass
+
+
+class _FakeDB:
+    def __init__(self):
+        self.status_checks = _FakeCollection()
+        self.playlists = _FakeCollection()
+
+
+async def _call(app, method, path, body=b"", headers=()):
+    """Minimal in-process ASGI request returning (status, headers, body)"""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '', 'server': ('test', 80), 'client': ('test', 1),
+        'headers': [(k.lower().encode(), v.encode()) for k, v in headers],
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    response = {'body': b''}
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # Client stays connected until the response is complete
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {k.decode(): v.decode() for k, v in message['headers']}
+        elif message['type'] == 'http.response.body':
+            response['body'] += message.get('body', b'')
+
+    await app(scope, receive, send)
+    return response['status'], response['headers'], response['body']
+
+
+def test_import_has_no_side_effects():
+    """Importing server must not need MONGO_URL or create a client"""
+    env = {k: v for k, v in os.environ.items() if k not in ('MONGO_URL', 'DB_NAME')}
+    code = "import server, sys; assert 'motor.motor_asyncio' not in sys.modules"
+    result = subprocess.run([sys.executable, '-c', code], env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    print("✅ Side-effect-free import")
+
+
+def test_lifespan_creates_tuned_client():
+    """Mongo client is created lazily with the configured pool sizes"""
+    app = server.create_app(_settings(mongo_max_pool_size=20, mongo_min_pool_size=2))
+    assert not hasattr(app.state, 'db')
+
+    async def run():
+        async with app.router.lifespan_context(app):
+            pool = app.state.mongo_client.options.pool_options
+            assert pool.max_pool_size == 20
+            assert pool.min_pool_size == 2
+            assert app.state.db.name == 'demo_test'
+            assert app.state.metrics.cold_start._default.value > 0
+
+    asyncio.run(run())
+    print("✅ Lazy Mongo client in lifespan")
+
+
+def test_apps_are_independent():
+    """Each app gets its own metrics so workers and tests don't share state"""
+    first = server.create_app(_settings())
+    second = server.create_app(_settings())
+    assert first.state.metrics is not second.state.metrics
+    print("✅ Independent app instances")
+
+
+def test_status_batch():
+    """Gzip'd heartbeat batches are stored without empty fields"""
+    app = server.create_app(_settings())
+    app.state.db = _FakeDB()
+    samples = [
+        {'client_name': 'kiosk-1', 'fps': 29.7, 'dropped_frames': 3, 'current_item': 'Promo'},
+        {'client_name': 'kiosk-1', 'timestamp': '2025-01-01T10:00:00+00:00'},
+    ]
+    body = gzip.compress(json.dumps(samples).encode())
+    status, _, payload = asyncio.run(_call(
+        app, 'POST', '/api/status/batch', body,
+        [('Content-Type', 'application/json'), ('Content-Encoding', 'gzip')]))
+    assert status == 200, payload
+    assert json.loads(payload) == {'accepted': 2}
+
+    stored = app.state.db.status_checks.documents
+    assert stored[0]['fps'] == 29.7
+    assert 'cpu_percent' not in stored[1]
+    assert stored[1]['timestamp'].year == 2025
+    print("✅ Status batch ingestion")
+
+
+def test_status_batch_sheds_load():
+    """Batches are refused with Retry-After when the server is saturated"""
+    app = server.create_app(_settings(max_in_flight_requests=0))
+    app.state.db = _FakeDB()
+    status, headers, _ = asyncio.run(_call(app, 'POST', '/api/status/batch', b'[]'))
+    assert status == 503
+    assert headers['retry-after'] == '30'
+    print("✅ Load shedding")
+
+
+def test_playlist_versions_and_delta():
+    """Kiosks get only the delta from the version they already have"""
+    app = server.create_app(_settings(playlist_history=2))
+    app.state.db = _FakeDB()
+    items = [{'id': f'item{i}', 'name': f'Item {i}', 'type': 'photo'} for i in range(3)]
+
+    async def run():
+        put = lambda body: _call(app, 'PUT', '/api/playlists/main', json.dumps(body).encode(),
+                                 [('Content-Type', 'application/json'), AUTH])
+        status, _, body = await put({'items': items})
+        assert status == 200 and json.loads(body)['version'] == 1
+
+        status, _, body = await put({'items': items[1:] + [{'id': 'new', 'name': 'New', 'type': 'video'}]})
+        assert json.loads(body)['version'] == 2
+
+        status, _, body = await _call(app, 'GET', '/api/playlists/main/poll?since=1&timeout=1')
+        data = json.loads(body)
+        assert data['version'] == 2 and data['from_version'] == 1
+        assert data['delta']['removed'] == ['item0']
+        assert [i['id'] for i in data['delta']['upserted']] == ['new']
+
+        # A kiosk that is up to date waits and gets 204 when nothing changes
+        status, _, _ = await _call(app, 'GET', '/api/playlists/main/poll?since=2&timeout=0.1')
+        assert status == 204
+
+        # A long-poll is woken up by a publish
+        waiter = asyncio.ensure_future(_call(app, 'GET', '/api/playlists/main/poll?since=2&timeout=5'))
+        await asyncio.sleep(0.05)
+        await put({'items': items})
+        status, _, body = await asyncio.wait_for(waiter, 1)
+        assert json.loads(body)['version'] == 3
+
+        # Version 1 was pruned by playlist_history, so the full list is sent
+        status, _, body = await _call(app, 'GET', '/api/playlists/main?since=1')
+        assert json.loads(body)['full'] is True
+
+    asyncio.run(run())
+    print("✅ Playlist versions and delta sync")
+
+
+class _UniqueVersionCollection(_FakeCollection):
+    """Playlists with the unique (name, version) index; writes yield to other tasks"""
+    async def insert_one(self, document):
+        from pymongo.errors import DuplicateKeyError
+        await asyncio.sleep(0)
+        if any(d['name'] == document['name'] and d['version'] == document['version']
+               for d in self.documents):
+            raise DuplicateKeyError("E11000 duplicate key error")
+        await super().insert_one(document)
+
+
+def test_concurrent_publishes_get_distinct_versions():
+    """Publishes racing for the next version number all succeed"""
+    app = server.create_app(_settings())
+    app.state.db = _FakeDB()
+    app.state.db.playlists = _UniqueVersionCollection()
+    body = json.dumps({'items': [{'id': 'a', 'name': 'A', 'type': 'photo'}]}).encode()
+
+    async def run():
+        return await asyncio.gather(*(
+            _call(app, 'PUT', '/api/playlists/main', body, [('Content-Type', 'application/json'), AUTH])
+            for _ in range(5)))
+
+    responses = asyncio.run(run())
+    assert [status for status, _, _ in responses] == [200] * 5
+    assert sorted(json.loads(body)['version'] for _, _, body in responses) == [1, 2, 3, 4, 5]
+    print("✅ Concurrent playlist publishes")
+
+
+def test_media_upload_and_ranged_download():
+    """Media is stored by hash and can be downloaded in ranges"""
+    media_dir = tempfile.mkdtemp()
+    try:
+        app = server.create_app(_settings(media_dir=media_dir))
+        data = bytes(range(256)) * 100
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        async def run():
+            status, _, _ = await _call(app, 'PUT', f'/api/media/{"0" * 64}', data, [AUTH])
+            assert status == 400
+
+            status, _, _ = await _call(app, 'PUT', f'/api/media/{sha256}', data, [AUTH])
+            assert status == 201
+
+            status, headers, body = await _call(app, 'GET', f'/api/media/{sha256}',
+                                                headers=[('Range', 'bytes=25000-')])
+            assert status == 206
+            assert headers['content-range'] == f'bytes 25000-{len(data) - 1}/{len(data)}'
+            assert body == data[25000:]
+
+            status, _, body = await _call(app, 'GET', f'/api/media/{sha256}')
+            assert status == 200 and body == data
+
+        asyncio.run(run())
+    finally:
+        shutil.rmtree(media_dir)
+    print("✅ Media upload and ranged download")
+
+
+def test_writes_need_publish_token():
+    """Publishing and uploading are refused without the shared token"""
+    media_dir = tempfile.mkdtemp()
+    try:
+        data = b'media'
+        sha256 = hashlib.sha256(data).hexdigest()
+        playlist = json.dumps({'items': []}).encode()
+        json_header = ('Content-Type', 'application/json')
+
+        async def run(app, headers):
+            publish, _, _ = await _call(app, 'PUT', '/api/playlists/main', playlist,
+                                        [json_header] + headers)
+            upload, _, _ = await _call(app, 'PUT', f'/api/media/{sha256}', data, headers)
+            return publish, upload
+
+        app = server.create_app(_settings(media_dir=media_dir))
+        app.state.db = _FakeDB()
+        assert asyncio.run(run(app, [])) == (401, 401)
+        assert asyncio.run(run(app, [('Authorization', 'Bearer wrong')])) == (401, 401)
+        assert app.state.db.playlists.documents == []
+        assert os.listdir(media_dir) == []
+
+        # A server without a token accepts no writes at all
+        app = server.create_app(_settings(media_dir=media_dir, publish_token=None))
+        app.state.db = _FakeDB()
+        assert asyncio.run(run(app, [AUTH])) == (403, 403)
+
+        app = server.create_app(_settings(media_dir=media_dir))
+        app.state.db = _FakeDB()
+        assert asyncio.run(run(app, [AUTH])) == (200, 201)
+    finally:
+        shutil.rmtree(media_dir)
+    print("✅ Write endpoints need the publish token")
+
+
+def test_upload_size_limit():
+    """Oversized uploads are aborted and leave nothing behind"""
+    media_dir = tempfile.mkdtemp()
+    try:
+        app = server.create_app(_settings(media_dir=media_dir, max_upload_bytes=1000))
+        data = b'x' * 1001
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        # Content-Length announced up front
+        status, _, _ = asyncio.run(_call(app, 'PUT', f'/api/media/{sha256}', data,
+                                         [AUTH, ('Content-Length', str(len(data)))]))
+        assert status == 413
+
+        # No (or a lying) Content-Length: stopped while streaming
+        status, _, _ = asyncio.run(_call(app, 'PUT', f'/api/media/{sha256}', data, [AUTH]))
+        assert status == 413
+        stored = [name for _, _, files in os.walk(media_dir) for name in files]
+        assert stored == [], stored
+
+        data = data[:1000]
+        status, _, _ = asyncio.run(_call(app, 'PUT', f'/api/media/{hashlib.sha256(data).hexdigest()}',
+                                         data, [AUTH]))
+        assert status == 201
+    finally:
+        shutil.rmtree(media_dir)
+    print("✅ Upload size limit")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_import_has_no_side_effects, test_lifespan_creates_tuned_client,
+                 test_apps_are_independent, test_status_batch, test_status_batch_sheds_load,
+                 test_playlist_versions_and_delta, test_concurrent_publishes_get_distinct_versions,
+                 test_media_upload_and_ranged_download, test_writes_need_publish_token,
+                 test_upload_size_limit):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 server tests passed")
+    else:
+        print("⚠️  Some server tests failed")
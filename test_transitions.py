@@ -0,0 +1,99 @@
+"""Tests for crossfade and slide transitions."""
+
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import fixtures
+from media_player import MediaPlayer
+from renderers import NullRenderer
+from transitions import Transition, letterbox
+
+
+def test_blends_into_reused_buffers():
+    """Crossfade and slide compute the expected pixels without allocating per frame"""
+    black = np.zeros((4, 8, 3), dtype=np.uint8)
+    white = np.full((4, 8, 3), 200, dtype=np.uint8)
+
+    fade = Transition('crossfade')
+    fade.prepare(black, white)
+    first = fade.render(0.5)
+    assert np.all(first == 100)
+    second = fade.render(0.25)
+    assert second is not first and np.all(second == 50)
+    assert fade.render(0.75) is first
+
+    slide = Transition('slide')
+    slide.prepare(black, white)
+    frame = slide.render(0.25)
+    assert np.all(frame[:, :6] == 0) and np.all(frame[:, 6:] == 200)
+
+    # Outgoing frames of another size are letterboxed onto the incoming size
+    boxed = letterbox(np.full((2, 2, 3), 9, dtype=np.uint8), (8, 4))
+    assert boxed.shape == (4, 8, 3) and boxed[0, 0, 0] == 0 and boxed[2, 4, 0] == 9
+    print("✅ Blending")
+
+
+def test_runs_at_display_rate_and_falls_back_to_cut():
+    """A 1080p crossfade keeps up with 60 fps, an impossible budget cuts"""
+    outgoing = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    incoming = np.full((1080, 1920, 3), 255, dtype=np.uint8)
+    presented = []
+
+    transition = Transition('crossfade', duration=0.25, fps=60)
+    assert transition.run(outgoing, incoming, presented.append)
+    assert len(presented) >= 10
+
+    impossible = Transition('crossfade', duration=0.25, fps=10 ** 9)
+    start = time.perf_counter()
+    assert not impossible.run(outgoing, incoming, presented.append)
+    assert impossible.fallbacks == 1
+    assert time.perf_counter() - start < 0.1
+    print("✅ Display rate and budget fallback")
+
+
+class _Settings:
+    def get(self, key, default=None):
+        return {'render_backend': 'null', 'transition_duration': 0.2}.get(key, default)
+
+
+class _App:
+    settings_manager = _Settings()
+
+
+def test_player_crossfades_between_photos():
+    """Switching photos shows blended frames before the new photo"""
+    workdir = tempfile.mkdtemp()
+    player = MediaPlayer(_App())
+    try:
+        first = fixtures.image_fixture(320, 240, fixture_dir=workdir)
+        second = fixtures.image_fixture(320, 240, 'PNG', fixture_dir=workdir)
+        player.renderer = NullRenderer(size=(320, 240))
+
+        player.play_content({'type': 'photo', 'path': first})
+        player.play_content({'type': 'photo', 'path': second})
+        time.sleep(0.4)
+        assert player.transition.completed == 1
+        assert player.renderer.frames_presented > 3
+        assert player.last_frame.size == (320, 240)
+    finally:
+        player.cleanup()
+        shutil.rmtree(workdir)
+    print("✅ Photo crossfade")
+
+
+if __name__ == "__main__":
+    all_passed = True
+    for test in (test_blends_into_reused_buffers, test_runs_at_display_rate_and_falls_back_to_cut,
+                 test_player_crossfades_between_photos):
+        try:
+            test()
+        except AssertionError as e:
+            all_passed = False
+            print(f"❌ {test.__name__} failed: {e}")
+    if all_passed:
+        print("🎉 transition tests passed")
+    else:
+        print("⚠️  Some transition tests failed")
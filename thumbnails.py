@@ -0,0 +1,146 @@
+"""
+Thumbnails - Preview images for the content list
+
+Thumbnails are generated in a pool of worker processes, so decoding a few
+hundred large photos never blocks the GUI (or competes with it for the GIL),
+and stored in the media store next to the object they belong to:
+
+    <media_store>/transforms/ab/abcdef.../thumb_96x54.png
+
+Because they are keyed by file hash, every copy of the same photo or video
+shares one thumbnail, and thumbnails survive restarts and playlist edits.
+"""
+
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from event_log import get_logger
+from media_store import MediaStore, hash_file
+
+THUMBNAIL_SIZE = (96, 54)
+THUMBNAIL_TYPES = ('photo', 'video')
+
+log = get_logger('thumbnails')
+
+
+def make_thumbnail(path, kind, dest, size=THUMBNAIL_SIZE):
+    """Write a PNG preview of a photo or of a video's first frame"""
+    if kind == 'video':
+        # Only the worker processes need OpenCV; the GUI doesn't import it
+        import cv2
+        capture = cv2.VideoCapture(path)
+        try:
+            ok, frame = capture.read()
+        finally:
+            capture.release()
+        if not ok:
+            raise ValueError(f"Could not read a frame from {path}")
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    else:
+        image = Image.open(path)
+        # Let the JPEG decoder scale down while decoding
+        image.draft('RGB', size)
+        image = image.convert('RGB')
+    image.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    tmp_path = f"{dest}.{uuid.uuid4().hex}.part"
+    try:
+        image.save(tmp_path, 'PNG')
+        os.replace(tmp_path, dest)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return dest
+
+
+def _generate(store_root, path, kind, sha256, size):
+    """Worker process entry point: (sha256, thumbnail path)"""
+    sha256 = sha256 or hash_file(path)
+    dest = MediaStore(store_root).transform_path(sha256, _thumbnail_name(size))
+    if not os.path.exists(dest):
+        make_thumbnail(path, kind, dest, size)
+    return sha256, dest
+
+
+def _thumbnail_name(size):
+    return f"thumb_{size[0]}x{size[1]}.png"
+
+
+class ThumbnailCache:
+    """Finds or generates thumbnails for content items"""
+    def __init__(self, media_store, size=THUMBNAIL_SIZE, workers=None):
+        self.media_store = media_store
+        self.size = tuple(size)
+        self.workers = workers or max(1, (os.cpu_count() or 1) - 1)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._hashes = {}
+        self._failed = set()
+
+    def _hash(self, item):
+        return item.get('sha256') or self._hashes.get(item['path'])
+
+    def cached_path(self, item):
+        """Thumbnail path if it already exists, else None"""
+        sha256 = self._hash(item)
+        if not sha256:
+            return None
+        # Called for every visible row on every redraw, so no mkdir here;
+        # the worker that writes the thumbnail creates the directory
+        path = self.media_store.transform_path(sha256, _thumbnail_name(self.size), create=False)
+        return path if os.path.exists(path) else None
+
+    def request(self, item, callback):
+        """Thumbnail path for an item, or None if there is none yet.
+
+        Missing thumbnails are generated in the background; callback(path)
+        is then called from a pool thread, with None if generation failed.
+        Items that aren't photos or videos have no thumbnail.
+        """
+        if item.get('type') not in THUMBNAIL_TYPES:
+            return None
+        path = self.cached_path(item)
+        if path:
+            return path
+
+        key = item['path']
+        with self._lock:
+            if key in self._failed:
+                return None
+            if key in self._pending:
+                self._pending[key].append(callback)
+                return None
+            if self._pool is None:
+                # Started on first use so the app doesn't pay for idle workers
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._pending[key] = [callback]
+            future = self._pool.submit(_generate, self.media_store.root, key, item['type'],
+                                       item.get('sha256'), self.size)
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return None
+
+    def _finished(self, key, future):
+        try:
+            sha256, path = future.result()
+            self._hashes[key] = sha256
+        except Exception as e:
+            log.warning("Could not create thumbnail for %s: %s", key, e)
+            path = None
+        with self._lock:
+            callbacks = self._pending.pop(key, [])
+            if path is None:
+                self._failed.add(key)
+        for callback in callbacks:
+            callback(path)
+
+    def shutdown(self):
+        """Stop the worker processes; pending thumbnails are dropped"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
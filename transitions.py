@@ -0,0 +1,104 @@
+"""
+Transitions - Crossfades and slides between content items
+
+Blends are computed on the CPU with cv2.addWeighted / NumPy slicing into
+two preallocated output buffers that alternate, so a transition allocates
+nothing per frame and a buffer is never rewritten while the renderer may
+still be reading it. If blending a frame takes longer than one display
+frame, the transition gives up and cuts to the incoming item rather than
+stalling playback.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from video_decoders import fit_size
+
+TRANSITIONS = ('cut', 'crossfade', 'slide')
+DISPLAY_FPS = 60
+
+
+def letterbox(frame, size, out=None):
+    """Fit an RGB frame into a black (width, height) canvas"""
+    width, height = size
+    if out is None or out.shape != (height, width, 3):
+        out = np.zeros((height, width, 3), dtype=np.uint8)
+    else:
+        out.fill(0)
+    frame_height, frame_width = frame.shape[:2]
+    if (frame_width, frame_height) != (width, height):
+        frame = cv2.resize(frame, fit_size((frame_width, frame_height), size))
+        frame_height, frame_width = frame.shape[:2]
+    top = (height - frame_height) // 2
+    left = (width - frame_width) // 2
+    out[top:top + frame_height, left:left + frame_width] = frame
+    return out
+
+
+class Transition:
+    """Renders the frames between an outgoing and an incoming frame"""
+    def __init__(self, kind='crossfade', duration=0.5, fps=DISPLAY_FPS):
+        self.kind = kind if kind in TRANSITIONS else 'cut'
+        self.duration = duration
+        self.fps = fps
+        self.completed = 0
+        self.fallbacks = 0
+        self._from = None
+        self._to = None
+        self._buffers = []
+        self._next = 0
+
+    def prepare(self, outgoing, incoming):
+        """Bring both frames to the incoming frame's size in reused buffers"""
+        incoming = np.ascontiguousarray(np.asarray(incoming))
+        height, width = incoming.shape[:2]
+        self._from = letterbox(np.asarray(outgoing), (width, height), self._from)
+        self._to = incoming
+        if not self._buffers or self._buffers[0].shape != incoming.shape:
+            self._buffers = [np.empty_like(incoming), np.empty_like(incoming)]
+
+    def render(self, progress):
+        """Blend for progress in [0, 1]; returns one of the reused buffers"""
+        out = self._buffers[self._next]
+        self._next ^= 1
+        if self.kind == 'slide':
+            width = out.shape[1]
+            offset = min(width, int(width * progress))
+            out[:, :width - offset] = self._from[:, offset:]
+            out[:, width - offset:] = self._to[:, :offset]
+        else:
+            cv2.addWeighted(self._from, 1.0 - progress, self._to, progress, 0, dst=out)
+        return out
+
+    def run(self, outgoing, incoming, present, should_continue=None):
+        """Present intermediate frames via present(frame) at display rate.
+
+        The caller presents the incoming frame itself afterwards. Returns
+        True if the transition ran to the end, False if it was a cut, was
+        over budget or was interrupted.
+        """
+        if self.kind == 'cut' or outgoing is None or self.duration <= 0:
+            return False
+        self.prepare(outgoing, incoming)
+
+        budget = 1.0 / self.fps
+        start = time.perf_counter()
+        tick = start
+        while should_continue is None or should_continue():
+            progress = (time.perf_counter() - start) / self.duration
+            if progress >= 1.0:
+                self.completed += 1
+                return True
+            blend_start = time.perf_counter()
+            frame = self.render(progress)
+            if time.perf_counter() - blend_start > budget:
+                self.fallbacks += 1
+                return False
+            present(frame)
+            tick += budget
+            delay = tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return False
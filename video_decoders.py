@@ -0,0 +1,464 @@
+"""
+Video Decoders - Frame sources for MediaPlayer video playback
+
+Both decoders return RGB frames already scaled to the target size:
+
+    opencv  cv2.VideoCapture, scaled and converted on the CPU (default)
+    ffmpeg  ffmpeg subprocess piping raw rgb24 frames; scaling and colour
+            conversion happen inside the decoder (hardware decoding where
+            ffmpeg supports it), so Python only copies bytes
+
+Short clips can be decoded once into a memory-mapped .npy frame file
+(FrameCacheWriter) and then played straight from the page cache
+(FrameCacheDecoder) on every later pass. The cache directory is kept under a
+total size by evicting the least recently used clips (prune_frame_cache).
+
+PlaybackClock paces presentation and, when an audio track is playing through
+pygame.mixer, follows the audio position so picture and sound stay in sync.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+from event_log import get_logger
+from profiler import span
+
+VIDEO_DECODERS = ('opencv', 'ffmpeg')
+
+# Frame cache files being recorded in this process. When several displays
+# play the same clip, one records it and the others pick up the result.
+_recording = set()
+_recording_lock = threading.Lock()
+
+# Marker next to an audio WAV path for videos that have no audio track
+NO_AUDIO_SUFFIX = '.none'
+
+# Re-anchor the clock to the audio position when they differ by more than this
+AUDIO_RESYNC_SECONDS = 0.04
+
+log = get_logger('video')
+
+
+def find_ffmpeg():
+    """Path of the ffmpeg executable, or None"""
+    return shutil.which('ffmpeg')
+
+
+def fit_size(src_size, screen_size):
+    """Largest size with src_size's aspect ratio that fits on screen"""
+    src_width, src_height = src_size
+    screen_width, screen_height = screen_size
+    scale = min(screen_width / src_width, screen_height / src_height)
+    return max(1, int(src_width * scale)), max(1, int(src_height * scale))
+
+
+def probe_video(path):
+    """Size, frame rate and audio presence of a video via ffprobe"""
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe:
+        raise FileNotFoundError("ffprobe not found")
+    output = subprocess.run(
+        [ffprobe, '-v', 'error', '-show_entries', 'stream=codec_type,width,height,avg_frame_rate,nb_frames',
+         '-of', 'json', path],
+        capture_output=True, check=True).stdout
+    streams = json.loads(output).get('streams', [])
+    video = next(s for s in streams if s.get('codec_type') == 'video')
+    num, _, den = video.get('avg_frame_rate', '30/1').partition('/')
+    fps = float(num) / float(den or 1) if float(num or 0) else 30.0
+    return {
+        'width': video['width'],
+        'height': video['height'],
+        'fps': fps,
+        'frame_count': int(video.get('nb_frames') or 0),
+        'has_audio': any(s.get('codec_type') == 'audio' for s in streams),
+    }
+
+
+def extract_audio(path, dest, ffmpeg=None):
+    """Decode a video's audio track to a WAV file. Returns dest, or None if there is none.
+
+    A video without audio leaves an empty dest + NO_AUDIO_SUFFIX marker, so
+    silent clips aren't run through ffmpeg again on every loop or preload.
+    """
+    ffmpeg = ffmpeg or find_ffmpeg()
+    if not ffmpeg:
+        return None
+    if os.path.exists(dest):
+        return dest
+    no_audio = dest + NO_AUDIO_SUFFIX
+    if os.path.exists(no_audio):
+        return None
+    # The preloader and the playback thread may extract the same file at once
+    tmp_path = f"{dest}.{uuid.uuid4().hex}.part.wav"
+    try:
+        result = subprocess.run(
+            [ffmpeg, '-nostdin', '-v', 'error', '-y', '-i', path, '-vn', '-ac', '2', '-ar', '44100',
+             tmp_path],
+            capture_output=True)
+        if result.returncode != 0 or not os.path.exists(tmp_path):
+            open(no_audio, 'wb').close()
+            return None
+        os.replace(tmp_path, dest)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return dest
+
+
+class OpenCVDecoder:
+    """cv2.VideoCapture frames, resized and converted to RGB on the CPU"""
+    name = 'opencv'
+
+    def __init__(self, path, target_size=None):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video: {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.frame_count = max(0, int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+        self.target_size = target_size
+        self._frame_size = None
+
+    def read(self):
+        """Next RGB frame, or None at the end of the video"""
+        with span('frame_decode'):
+            ret, frame = self.cap.read()
+        if not ret:
+            return None
+        if self.target_size:
+            if self._frame_size is None:
+                height, width = frame.shape[:2]
+                self._frame_size = fit_size((width, height), self.target_size)
+            with span('frame_scale'):
+                frame = cv2.resize(frame, self._frame_size)
+        with span('frame_convert'):
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def skip(self):
+        """Advance one frame without decoding it to pixels. Returns False at the end."""
+        return self.cap.grab()
+
+    def rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def close(self):
+        self.cap.release()
+
+
+class FFmpegDecoder:
+    """Raw rgb24 frames piped from an ffmpeg subprocess at the target size"""
+    name = 'ffmpeg'
+
+    def __init__(self, path, target_size=None, ffmpeg=None):
+        self.path = path
+        self.ffmpeg = ffmpeg or find_ffmpeg()
+        if not self.ffmpeg:
+            raise FileNotFoundError("ffmpeg not found")
+        info = probe_video(path)
+        self.fps = info['fps']
+        self.frame_count = info['frame_count']
+        self.has_audio = info['has_audio']
+        source_size = (info['width'], info['height'])
+        self.width, self.height = fit_size(source_size, target_size) if target_size else source_size
+        self.frame_bytes = self.width * self.height * 3
+        self.process = None
+        self._start()
+
+    def _start(self):
+        cmd = [self.ffmpeg, '-nostdin', '-v', 'error', '-hwaccel', 'auto', '-i', self.path, '-an',
+               '-vf', f'scale={self.width}:{self.height}:flags=bilinear',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-']
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        bufsize=self.frame_bytes * 2)
+
+    def read(self):
+        """Next RGB frame, or None at the end of the video"""
+        with span('frame_decode'):
+            data = self.process.stdout.read(self.frame_bytes)
+        if len(data) < self.frame_bytes:
+            return None
+        # Each read returns fresh bytes, so frames still queued for display
+        # are never overwritten
+        return np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def skip(self):
+        return len(self.process.stdout.read(self.frame_bytes)) == self.frame_bytes
+
+    def rewind(self):
+        self.close()
+        self._start()
+
+    def close(self):
+        if self.process:
+            self.process.kill()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+
+
+class FrameCacheDecoder:
+    """Frames of a clip decoded earlier, read from a memory-mapped .npy file.
+
+    read() returns views into the mapping, so frames come straight from the
+    page cache without decoding or copying, and rewinding is free.
+    """
+    name = 'frame_cache'
+
+    def __init__(self, path):
+        with open(path + '.json', 'r') as f:
+            meta = json.load(f)
+        try:
+            # The mtime is the last use, for least-recently-used eviction
+            os.utime(path)
+        except OSError:
+            pass
+        self.path = path
+        self.fps = meta['fps']
+        self.frame_count = meta['frames']
+        self.frames = np.load(path, mmap_mode='r')
+        self.position = 0
+
+    def read(self):
+        if self.position >= self.frame_count:
+            return None
+        frame = self.frames[self.position]
+        self.position += 1
+        return frame
+
+    def skip(self):
+        if self.position >= self.frame_count:
+            return False
+        self.position += 1
+        return True
+
+    def rewind(self):
+        self.position = 0
+
+    def close(self):
+        self.frames = None
+
+
+class FrameCacheWriter:
+    """Records the frames of one playback pass into a frame cache file.
+
+    The file is only published (renamed into place) if a complete pass was
+    recorded and it fits in max_bytes; anything else is discarded. With a
+    cache_dir and cache_max_bytes, least recently used clips in cache_dir are
+    evicted first to make room for this one.
+    """
+    def __init__(self, path, frame_count, fps, max_bytes, cache_dir=None, cache_max_bytes=0):
+        self.path = path
+        self.frame_count = frame_count
+        self.fps = fps
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.frames = None
+        self.written = 0
+        self._tmp_path = f"{path}.{uuid.uuid4().hex}.part.npy"
+        with _recording_lock:
+            self.failed = frame_count <= 0 or path in _recording
+            if not self.failed:
+                _recording.add(path)
+
+    def add(self, frame):
+        if self.failed:
+            return
+        if self.frames is None:
+            size = self.frame_count * frame.nbytes
+            if size > self.max_bytes or (self.cache_max_bytes and size > self.cache_max_bytes):
+                self.abort()
+                return
+            if self.cache_dir and self.cache_max_bytes:
+                prune_frame_cache(self.cache_dir, self.cache_max_bytes - size)
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.frames = np.lib.format.open_memmap(
+                self._tmp_path, mode='w+', dtype=np.uint8, shape=(self.frame_count,) + frame.shape)
+        if self.written >= self.frame_count or frame.shape != self.frames.shape[1:]:
+            # Container frame count was wrong; don't guess
+            self.abort()
+            return
+        self.frames[self.written] = frame
+        self.written += 1
+
+    def finish(self):
+        """Publish the cache. Returns True if a usable cache now exists."""
+        if self.failed or self.frames is None or self.written == 0:
+            self.abort()
+            return False
+        self.frames.flush()
+        self.frames = None
+        with open(self.path + '.json', 'w') as f:
+            json.dump({'fps': self.fps, 'frames': self.written}, f)
+        os.replace(self._tmp_path, self.path)
+        self._release()
+        return True
+
+    def abort(self):
+        if not self.failed:
+            self._release()
+        self.failed = True
+        self.frames = None
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _release(self):
+        with _recording_lock:
+            _recording.discard(self.path)
+
+
+def prune_frame_cache(cache_dir, max_bytes):
+    """Evict the least recently used clips until cache_dir holds at most max_bytes.
+
+    Clips still open elsewhere (Windows can't delete mapped files) are
+    skipped. Returns the number of bytes freed.
+    """
+    entries = []
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith('.npy') or name.endswith('.part.npy'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        try:
+            os.remove(path + '.json')
+        except OSError:
+            pass
+        freed += size
+        log.info("Evicted frame cache %s (%.0f MB)", os.path.basename(path), size / 2 ** 20)
+    return freed
+
+
+def frame_cache_path(cache_dir, key, target_size):
+    """Frame cache file for a clip (by content key) at a decode size"""
+    size = f"{target_size[0]}x{target_size[1]}" if target_size else 'native'
+    return os.path.join(cache_dir, key[:2], f"{key}_{size}.npy")
+
+
+def create_decoder(backend, path, target_size=None, frame_cache=None):
+    """Decoder for a backend name, falling back to OpenCV if ffmpeg is missing.
+
+    If frame_cache names an existing frame cache file, frames are read from
+    it instead of decoding.
+    """
+    if frame_cache and os.path.exists(frame_cache) and os.path.exists(frame_cache + '.json'):
+        try:
+            return FrameCacheDecoder(frame_cache)
+        except (OSError, ValueError, KeyError) as e:
+            log.warning("Ignoring unreadable frame cache %s: %s", frame_cache, e)
+    if backend == 'ffmpeg':
+        if find_ffmpeg() and shutil.which('ffprobe'):
+            return FFmpegDecoder(path, target_size)
+        log.info("ffmpeg not found, decoding video with OpenCV")
+    return OpenCVDecoder(path, target_size)
+
+
+class PreparedVideo:
+    """A decoder opened ahead of time with its first frame already decoded.
+
+    Opening a container and decoding up to the first keyframe is the slow
+    part of starting (or re-seeking) a video; doing it before the frame is
+    needed makes loops and item-to-item changes gapless.
+    """
+    def __init__(self, backend, path, target_size=None, frame_cache=None):
+        self.path = path
+        self.target_size = target_size
+        self.decoder = create_decoder(backend, path, target_size, frame_cache)
+        self.fps = self.decoder.fps
+        self.frame_count = self.decoder.frame_count
+        self.cached = isinstance(self.decoder, FrameCacheDecoder)
+        self.audio_file = None
+        self._first_frame = self.decoder.read()
+
+    def read(self):
+        if self._first_frame is not None:
+            frame, self._first_frame = self._first_frame, None
+            return frame
+        return self.decoder.read()
+
+    def skip(self):
+        if self._first_frame is not None:
+            self._first_frame = None
+            return True
+        return self.decoder.skip()
+
+    def close(self):
+        self.decoder.close()
+
+
+class PlaybackClock:
+    """Media clock for a playing video.
+
+    Without audio this is a monotonic clock. With audio, the WAV is played
+    through pygame.mixer.music and the clock is re-anchored to the mixer
+    position whenever they diverge, so video frames follow the sound.
+    """
+    def __init__(self, audio_file=None):
+        self.audio_file = audio_file
+        self.started = None
+
+    def start(self):
+        if self.audio_file:
+            import pygame
+            try:
+                pygame.mixer.music.load(self.audio_file)
+                pygame.mixer.music.play()
+            except pygame.error as e:
+                log.warning("Could not play audio: %s", e)
+                self.audio_file = None
+        self.started = time.perf_counter()
+
+    def time(self):
+        """Seconds of media played since start()"""
+        now = time.perf_counter()
+        elapsed = now - self.started
+        if self.audio_file:
+            import pygame
+            position = pygame.mixer.music.get_pos()
+            if position >= 0 and abs(position / 1000 - elapsed) > AUDIO_RESYNC_SECONDS:
+                self.started = now - position / 1000
+                elapsed = position / 1000
+        return elapsed
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def stop(self):
+        if self.audio_file:
+            import pygame
+            try:
+                pygame.mixer.music.stop()
+            except pygame.error:
+                pass
+
+
+def temp_audio_path(path):
+    """Scratch WAV path for media that isn't in the media store"""
+    digest = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    name = f"demo_audio_{digest}.wav"
+    return os.path.join(tempfile.gettempdir(), name)